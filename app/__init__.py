@@ -1,12 +1,10 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
 from config import Config
 
 db = SQLAlchemy()
-migrate = Migrate()
 login = LoginManager()
 csrf = CSRFProtect()
 login.login_view = 'auth.login'
@@ -17,7 +15,10 @@ def create_app(config_class=Config):
     app.config.from_object(config_class)
 
     db.init_app(app)
-    migrate.init_app(app, db)
+    # Flask-Migrate imports Alembic, Mako and Pygments (~80ms of cold start).
+    # With LAZY_IMPORTS it is loaded by the first `flask db` command instead.
+    if not app.config.get('LAZY_IMPORTS', True):
+        init_migrate(app)
     login.init_app(app)
     csrf.init_app(app)  # Enable CSRF protection
 
@@ -30,11 +31,9 @@ def create_app(config_class=Config):
         except:
             return dict(csrf_token='')
 
-    # User loader for Flask-Login
-    @login.user_loader
-    def load_user(user_id):
-        from app.models.user import User
-        return User.query.get(int(user_id))
+    # User loader for Flask-Login (cached snapshots, see app/utils/user_cache.py)
+    from app.utils.user_cache import init_user_cache
+    init_user_cache(login)
 
     from app.routes import main, auth, admin, manager, teacher, user, finance, calendar, expense, financial, api
     app.register_blueprint(main.bp)
@@ -49,6 +48,40 @@ def create_app(config_class=Config):
     app.register_blueprint(financial.bp)
     app.register_blueprint(api.bp)
 
+    from app.utils.ledger import init_ledger
+    init_ledger(app)
+
+    from app.utils.budgets import init_budgets
+    init_budgets(app)
+
+    from app.utils.availability import init_availability
+    init_availability(app)
+
+    from app.utils.rooms import init_rooms
+    init_rooms(app)
+
+    from app.utils.payroll import init_payroll
+    init_payroll(app)
+
+    from app.utils.kpi import init_kpis
+    init_kpis(app)
+
+    from app.utils.reference_data import init_reference_data
+    init_reference_data(app)
+
+    from app.cli import register_commands
+    register_commands(app)
+
+    from app.utils.db_tuning import init_db_tuning
+    init_db_tuning(app)
+
+    from app.utils.metrics import init_metrics
+    init_metrics(app)
+
     return app
 
+def init_migrate(app):
+    from flask_migrate import Migrate
+    Migrate(app, db)
+
 from app import models
@@ -0,0 +1,276 @@
+"""
+Flask CLI commands (run with `flask <command>`)
+"""
+
+import click
+
+
+class LazyMigrateCommand(click.Command):
+    """
+    Stand-in for `flask db`: loads Flask-Migrate on first use and hands
+    the arguments to its real command group
+    """
+
+    def __init__(self, app):
+        super().__init__('db', help='Perform database migrations.', add_help_option=False,
+                         context_settings={'ignore_unknown_options': True, 'allow_extra_args': True})
+        self.app = app
+
+    def invoke(self, ctx):
+        from app import init_migrate
+        if 'migrate' not in self.app.extensions:
+            init_migrate(self.app)
+        from flask_migrate.cli import db
+
+        with db.make_context(ctx.info_name, list(ctx.args), parent=ctx.parent) as db_ctx:
+            return db.invoke(db_ctx)
+
+
+def init_database(echo=click.echo):
+    """Create missing tables and the default admin account"""
+    from app import db
+    from app.models.user import User
+
+    from app.utils.calendar_dim import populate
+
+    db.create_all()
+    echo('Database initialized successfully!')
+    added = populate()
+    if added:
+        echo(f'✅ Calendar table filled ({added} days)')
+
+    admin = User.query.filter_by(username='admin').first()
+    if admin:
+        echo('✅ Admin user already exists')
+        return
+    admin = User(
+        username='admin',
+        email='admin@qllhttbb.vn',
+        full_name='Administrator',
+        role='admin',
+        is_active=True
+    )
+    admin.set_password('admin123')
+    db.session.add(admin)
+    db.session.commit()
+    echo('✅ Admin user created: admin/admin123')
+
+
+def register_commands(app):
+    """Attach maintenance commands to the app"""
+
+    if 'migrate' not in app.extensions:
+        app.cli.add_command(LazyMigrateCommand(app))
+
+    @app.cli.command('init-db')
+    def init_db():
+        """Create tables and the default admin (one-time setup, not run at boot)"""
+        init_database()
+
+    @app.cli.command('startup-profile')
+    @click.option('--runs', default=3, help='Fresh interpreters started per mode')
+    @click.option('--top', default=15, help='Packages listed in the import-time breakdown')
+    @click.option('--path', default='/auth/login', help='URL of the first request')
+    def startup_profile(runs, top, path):
+        """Import-time breakdown and time-to-first-response, lazy vs eager imports"""
+        from app.utils.startup_profile import import_profile, first_response
+
+        packages, total = import_profile()
+        click.echo(f'Import time of create_app(): {total:.0f} ms')
+        for name, ms in packages[:top]:
+            click.echo(f'  {name:28} {ms:8.1f} ms')
+
+        click.echo(f'\nTime to first response ({path}, median of {runs}):')
+        for label, lazy in (('eager', 'false'), ('lazy', 'true')):
+            result = first_response(path=path, runs=runs, env_overrides={'LAZY_IMPORTS': lazy})
+            click.echo(f"  {label:6} import {result['import_ms']} ms + create_app {result['create_app_ms']} ms "
+                       f"+ first request {result['first_request_ms']} ms = {result['total_ms']} ms "
+                       f"(HTTP {result['status']})")
+
+    @app.cli.command('outbox-worker')
+    @click.option('--batch-size', default=100, help='Messages claimed per batch')
+    @click.option('--workers', default=4, help='Parallel gateway sends')
+    @click.option('--interval', default=5, help='Seconds to sleep when the outbox is empty')
+    @click.option('--once', is_flag=True, help='Exit when no message is due')
+    def outbox_worker(batch_size, workers, interval, once):
+        """Deliver queued parent notifications"""
+        from app.utils.messaging import run_worker, outbox_stats
+        run_worker(batch_size=batch_size, workers=workers, interval=interval, once=once)
+        click.echo(f'Outbox: {outbox_stats()}')
+
+    @app.cli.command('attendance-stats')
+    @click.option('--full', is_flag=True, help='Recompute every student instead of new rows only')
+    def attendance_stats(full):
+        """Update absence streaks and attendance risk scores"""
+        from app.utils.attendance_analytics import process_new_attendance, rebuild_all
+        if full:
+            click.echo(f'Rebuilt stats for {rebuild_all()} students')
+        else:
+            click.echo(f'Processed {process_new_attendance()} new attendance rows')
+
+    @app.cli.command('ledger-backfill')
+    @click.option('--batch-size', default=1000, help='Source rows per transaction')
+    def ledger_backfill(batch_size):
+        """Append missing ledger entries for all four money tables (safe to re-run)"""
+        from app.utils.ledger import backfill
+        appended = backfill(batch_size=batch_size, echo=click.echo)
+        click.echo(f'Appended {sum(appended.values())} ledger entries')
+
+    @app.cli.command('budget-totals')
+    def budget_totals():
+        """Recompute budget running totals from approved expenses"""
+        from app import db
+        from app.utils.budgets import recompute
+        updated = recompute(db.session.connection())
+        db.session.commit()
+        click.echo(f'Recomputed {updated} budgets')
+
+    @app.cli.command('availability')
+    def availability():
+        """Rebuild the teacher availability bitsets from active schedules"""
+        from app import db
+        from app.utils.availability import rebuild
+        written = rebuild(db.session.connection())
+        db.session.commit()
+        click.echo(f'Rebuilt {written} teacher-week bitsets')
+
+    @app.cli.command('archive-terms')
+    @click.option('--term', 'terms', multiple=True, help='Term to archive, e.g. 2024-2025-hk1 (default: every finished term)')
+    @click.option('--chunk-size', default=500, help='Schedules moved per transaction')
+    @click.option('--export', 'export_dir', default=None, type=click.Path(file_okay=False),
+                  help='Also write each archived term to DIR/<term>.jsonl.gz')
+    @click.option('--list', 'list_only', is_flag=True, help='Only list the finished terms still in the live tables')
+    def archive_terms(terms, chunk_size, export_dir, list_only):
+        """Move finished terms' schedules, enrollments and attendance to the archive tables"""
+        from app.utils.archive import ArchiveError, archive_term, export_term, finished_terms
+        if list_only or not terms:
+            pending = finished_terms()
+            for key, count in pending:
+                click.echo(f'{key}: {count} schedules')
+            if list_only:
+                return
+            terms = [key for key, _ in pending]
+        for key in terms:
+            try:
+                record = archive_term(key, chunk_size=chunk_size)
+                click.echo(f'{key}: {record.schedules} schedules, {record.enrollments} enrollments, '
+                           f'{record.attendance} attendance rows archived')
+                if export_dir:
+                    click.echo(f'{key}: exported to {export_term(key, export_dir)}')
+            except ArchiveError as e:
+                raise click.ClickException(str(e))
+
+    @app.cli.command('payroll-snapshot')
+    @click.option('--from', 'first', default=None, help='First month, YYYY-MM (default: last month)')
+    @click.option('--to', 'last', default=None, help='Last month, YYYY-MM (default: --from)')
+    @click.option('--recompute', is_flag=True, help='Recompute months that already have a snapshot')
+    def payroll_snapshot(first, last, recompute):
+        """Store teacher workload of closed months for the payroll report"""
+        from datetime import date, timedelta
+        from app.utils.payroll import month_key, months_between, snapshot
+        first = first or month_key(date.today().replace(day=1) - timedelta(days=1))
+        try:
+            computed = snapshot(months_between(first, last or first), recompute=recompute)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f'Snapshotted {len(computed)} months' + (f': {", ".join(computed)}' if computed else ''))
+
+    @app.cli.command('dim-date')
+    def dim_date():
+        """Fill the dim_date calendar table (ISO weeks, terms, holidays) for 2020-2035"""
+        from app.utils.calendar_dim import populate
+        click.echo(f'Added {populate()} days to dim_date')
+
+    @app.cli.command('seed-scale')
+    @click.option('--classes', default=200, help='Number of classes')
+    @click.option('--students', default=10000, help='Number of students')
+    @click.option('--teachers', default=100, help='Number of teachers')
+    @click.option('--managers', default=10, help='Number of managers')
+    @click.option('--weeks', default=156, help='Weeks of schedules, ending this week')
+    @click.option('--sessions-per-week', default=3, help='Schedule rows per class per week')
+    @click.option('--transactions-per-month', default=300, help='Financial transactions per month')
+    @click.option('--seed', default=42, help='Random seed')
+    def seed_scale(classes, students, teachers, managers, weeks, sessions_per_week, transactions_per_month, seed):
+        """Generate a large synthetic dataset for load testing"""
+        import time
+        from app.utils.seed_scale import seed_scale as generate
+        start = time.perf_counter()
+        try:
+            generate(classes=classes, students=students, teachers=teachers, managers=managers, weeks=weeks,
+                     sessions_per_week=sessions_per_week, transactions_per_month=transactions_per_month,
+                     seed=seed, echo=click.echo)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f'Done in {time.perf_counter() - start:.1f}s')
+
+    @app.cli.command('bench')
+    @click.option('--iterations', default=20, help='Timed requests per route')
+    @click.option('--route', 'routes', multiple=True, help='Only run the named route (repeatable)')
+    @click.option('--output', default=None, help='Write the JSON report to this file')
+    @click.option('--compare', default=None, type=click.Path(exists=True), help='Earlier report to compare against')
+    def bench(iterations, routes, output, compare):
+        """Benchmark the hot routes (p50/p95 latency, queries, peak memory)"""
+        import json
+        from app.utils.benchmark import run_benchmarks, save_report, compare_reports
+
+        report = run_benchmarks(app, iterations=iterations, only=set(routes) or None)
+        click.echo(f"{'route':32} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'peak KB':>9}")
+        for name, result in report['routes'].items():
+            if 'skipped' in result:
+                click.echo(f"{name:32} skipped ({result['skipped']})")
+                continue
+            click.echo(f"{name:32} {result['status']:>6} {result['p50_ms']:>9} {result['p95_ms']:>9} "
+                       f"{result['queries']:>8} {result['peak_memory_kb']:>9}")
+
+        if compare:
+            with open(compare, encoding='utf-8') as f:
+                previous = json.load(f)
+            click.echo(f"\nCompared with {previous.get('revision')}:")
+            for name, p95_before, p95_now, queries_before, queries_now in compare_reports(previous, report):
+                click.echo(f'{name:32} p95 {p95_before} -> {p95_now} ms, queries {queries_before} -> {queries_now}')
+
+        if output:
+            save_report(report, output)
+            click.echo(f'Report saved to {output}')
+
+    @app.cli.command('check-budgets')
+    @click.option('--iterations', default=5, help='Timed requests per route')
+    @click.option('--endpoint', 'endpoints', multiple=True, help='Only check the named endpoint (repeatable)')
+    def check_budgets(iterations, endpoints):
+        """Fail when a route exceeds its query-count or latency budget"""
+        from app.utils.perf_budgets import check_budgets as run_checks
+
+        failed = 0
+        for result in run_checks(app, iterations=iterations, only=set(endpoints) or None):
+            if 'skipped' in result:
+                click.echo(f"SKIP {result['endpoint']}: {result['skipped']}")
+                continue
+            summary = (f"{result['endpoint']}: {result['queries']}/{result['max_queries']} queries, "
+                       f"p95 {result['p95_ms']}/{result['max_p95_ms']} ms")
+            if not result['violations']:
+                click.echo(f'ok   {summary}')
+                continue
+            failed += 1
+            click.echo(f"FAIL {summary} ({'; '.join(result['violations'])})")
+            for statement, count in result['top_statements']:
+                click.echo(f'       {count:>4}x {statement[:200]}')
+
+        if failed:
+            raise click.ClickException(f'{failed} route(s) over budget')
+
+    @app.cli.command('bench-writes')
+    @click.option('--writers', default=20, help='Concurrent writers')
+    @click.option('--submissions', default=50, help='Attendance submissions per writer')
+    @click.option('--rows', default=30, help='Attendance rows per submission')
+    @click.option('--readers', default=5, help='Concurrent readers querying while writers run')
+    def bench_writes(writers, submissions, rows, readers):
+        """Compare SQLite write throughput with default and configured PRAGMAs"""
+        from app.utils.db_tuning import benchmark_writes, sqlite_pragmas, DEFAULT_PRAGMAS
+
+        for label, pragmas in (('default', DEFAULT_PRAGMAS), ('tuned', sqlite_pragmas(app.config))):
+            result = benchmark_writes(pragmas, writers=writers, submissions=submissions, rows=rows, readers=readers)
+            click.echo(f"{label:8} journal={result['journal_mode']:8} {result['submissions_per_second']:>8} submissions/s  "
+                       f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  "
+                       f"reads {result['reads']}  errors {result['errors']} in {result['seconds']}s")
+            if result['error_sample']:
+                click.echo(f"         e.g. {result['error_sample']}")
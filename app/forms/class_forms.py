@@ -1,7 +1,7 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField, SelectField, SubmitField, DateField, BooleanField
 from wtforms.validators import DataRequired, Length
-from app.models.user import User
+from app.utils import reference_data
 
 class ClassForm(FlaskForm):
     name = StringField('Tên lớp', validators=[DataRequired(), Length(min=1, max=50)])
@@ -13,9 +13,7 @@ class ClassForm(FlaskForm):
     
     def __init__(self, *args, **kwargs):
         super(ClassForm, self).__init__(*args, **kwargs)
-        self.manager_id.choices = [(0, 'Chọn quản sinh')] + [
-            (u.id, u.full_name) for u in User.query.filter_by(role='manager', is_active=True).all()
-        ]
+        self.manager_id.choices = [(0, 'Chọn quản sinh')] + reference_data.person_choices(reference_data.managers())
 
 class StudentForm(FlaskForm):
     student_code = StringField('Mã học sinh', validators=[DataRequired(), Length(min=1, max=20)])
@@ -68,9 +68,8 @@ class ExpenseForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(ExpenseForm, self).__init__(*args, **kwargs)
         # Populate category choices
-        from app.models.expense import ExpenseCategory
-        categories = ExpenseCategory.query.filter_by(is_active=True).all()
-        self.category_id.choices = [(c.id, c.name) for c in categories]
+        from app.utils import reference_data
+        self.category_id.choices = reference_data.named_choices(reference_data.expense_categories())
 
 class BudgetForm(FlaskForm):
     name = StringField('Tên ngân sách', validators=[
@@ -103,9 +102,9 @@ class BudgetForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(BudgetForm, self).__init__(*args, **kwargs)
         # Populate category choices
-        from app.models.expense import ExpenseCategory
-        categories = ExpenseCategory.query.filter_by(is_active=True).all()
-        self.category_id.choices = [(0, 'Tất cả danh mục')] + [(c.id, c.name) for c in categories]
+        from app.utils import reference_data
+        self.category_id.choices = [(0, 'Tất cả danh mục')] + reference_data.named_choices(
+            reference_data.expense_categories())
     
     def validate_end_date(self, end_date):
         if end_date.data <= self.start_date.data:
@@ -133,9 +132,9 @@ class ExpenseFilterForm(FlaskForm):
         super(ExpenseFilterForm, self).__init__(*args, **kwargs)
         
         # Populate category choices
-        from app.models.expense import ExpenseCategory
-        categories = ExpenseCategory.query.filter_by(is_active=True).all()
-        self.category_id.choices = [(0, 'Tất cả danh mục')] + [(c.id, c.name) for c in categories]
+        from app.utils import reference_data
+        self.category_id.choices = [(0, 'Tất cả danh mục')] + reference_data.named_choices(
+            reference_data.expense_categories())
         
         # Status choices
         self.status.choices = [
@@ -1,8 +1,7 @@
 from flask_wtf import FlaskForm
 from wtforms import SelectField, FloatField, TextAreaField, StringField, DateField, SubmitField
 from wtforms.validators import DataRequired, NumberRange
-from app.models.class_model import Class
-from app.models.event import Event
+from app.utils import reference_data
 
 class FinanceForm(FlaskForm):
     type = SelectField('Loại', choices=[
@@ -19,11 +18,5 @@ class FinanceForm(FlaskForm):
     
     def __init__(self, *args, **kwargs):
         super(FinanceForm, self).__init__(*args, **kwargs)
-        self.class_id.choices = [(0, 'Không chọn')] + [
-            (c.id, f"{c.name} - {c.block_name}") 
-            for c in Class.query.filter_by(is_active=True).all()
-        ]
-        self.event_id.choices = [(0, 'Không chọn')] + [
-            (e.id, e.name) 
-            for e in Event.query.filter_by(is_active=True).all()
-        ]
+        self.class_id.choices = [(0, 'Không chọn')] + reference_data.class_choices()
+        self.event_id.choices = [(0, 'Không chọn')] + reference_data.named_choices(reference_data.events())
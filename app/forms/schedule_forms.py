@@ -1,9 +1,7 @@
 from flask_wtf import FlaskForm
-from wtforms import SelectField, StringField, TimeField, TextAreaField, SubmitField, DateField, HiddenField
-from wtforms.validators import DataRequired, Length
-from app.models.user import User
-from app.models.class_model import Class
-from datetime import datetime, timedelta
+from wtforms import SelectField, StringField, TimeField, TextAreaField, SubmitField, DateField, HiddenField, IntegerField, BooleanField
+from wtforms.validators import DataRequired, Length, NumberRange, Optional
+from app.utils import calendar_dim, reference_data
 
 class ScheduleForm(FlaskForm):
     class_id = SelectField('Lớp học', coerce=int, validators=[DataRequired()])
@@ -26,31 +24,11 @@ class ScheduleForm(FlaskForm):
     
     def __init__(self, *args, **kwargs):
         super(ScheduleForm, self).__init__(*args, **kwargs)
-        self.class_id.choices = [
-            (c.id, c.name)
-            for c in Class.query.filter_by(is_active=True).all()
-        ]
-        self.teacher_id.choices = [
-            (u.id, u.full_name)
-            for u in User.query.filter_by(role='teacher', is_active=True).all()
-        ]
+        self.class_id.choices = reference_data.class_choices()
+        self.teacher_id.choices = reference_data.person_choices(reference_data.teachers())
 
-        # Generate week choices (current week + next 8 weeks)
-        week_choices = []
-        current_date = datetime.now()
-        for i in range(9):  # Current week + 8 future weeks
-            week_date = current_date + timedelta(weeks=i)
-            year, week, _ = week_date.isocalendar()
-            week_str = f"{year}-W{week:02d}"
-
-            # Calculate week start date for display
-            week_start = week_date - timedelta(days=week_date.weekday())
-            week_end = week_start + timedelta(days=6)
-
-            display_text = f"Tuần {week} ({week_start.strftime('%d/%m')} - {week_end.strftime('%d/%m/%Y')})"
-            week_choices.append((week_str, display_text))
-
-        self.week_number.choices = week_choices
+        # Current week + next 8 weeks
+        self.week_number.choices = calendar_dim.week_choices(0, 8)
 
 class CopyScheduleForm(FlaskForm):
     source_week = SelectField('Tuần nguồn', validators=[DataRequired()])
@@ -65,37 +43,60 @@ class CopyScheduleForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(CopyScheduleForm, self).__init__(*args, **kwargs)
 
-        # Generate week choices for source and target
-        week_choices = []
-        current_date = datetime.now()
+        # Past 4 weeks + current week + next 8 weeks
+        week_choices = calendar_dim.week_choices(-4, 8, mark_current=True)
+        self.source_week.choices = week_choices
+        self.target_week.choices = week_choices
 
-        # Add past 4 weeks + current week + next 8 weeks
-        for i in range(-4, 9):
-            week_date = current_date + timedelta(weeks=i)
-            year, week, _ = week_date.isocalendar()
-            week_str = f"{year}-W{week:02d}"
+        # Class choices
+        self.class_id.choices = [(0, 'Tất cả lớp')] + reference_data.class_choices()
 
-            # Calculate week start date for display
-            week_start = week_date - timedelta(days=week_date.weekday())
-            week_end = week_start + timedelta(days=6)
+class RolloutScheduleForm(FlaskForm):
+    source_week = SelectField('Tuần mẫu', validators=[DataRequired()])
+    first_week = SelectField('Áp dụng từ tuần', validators=[DataRequired()])
+    week_count = IntegerField('Số tuần', default=16, validators=[DataRequired(), NumberRange(min=1, max=53)])
+    every = SelectField('Lặp lại', choices=[(1, 'Mỗi tuần'), (2, 'Cách 1 tuần')], coerce=int, default=1)
+    target_weeks = StringField('Hoặc danh sách tuần (VD: 2025-W36, 2025-W38)', validators=[Optional(), Length(max=600)])
+    class_id = SelectField('Lớp học', coerce=int)
+    skip_holidays = BooleanField('Bỏ qua buổi rơi vào ngày nghỉ (lễ, lịch nghỉ)', default=True)
+    submit = SubmitField('Áp dụng lịch')
 
-            if i == 0:
-                display_text = f"Tuần {week} - Tuần hiện tại ({week_start.strftime('%d/%m')} - {week_end.strftime('%d/%m/%Y')})"
-            elif i < 0:
-                display_text = f"Tuần {week} ({week_start.strftime('%d/%m')} - {week_end.strftime('%d/%m/%Y')})"
-            else:
-                display_text = f"Tuần {week} ({week_start.strftime('%d/%m')} - {week_end.strftime('%d/%m/%Y')})"
+    def __init__(self, *args, **kwargs):
+        super(RolloutScheduleForm, self).__init__(*args, **kwargs)
+        self.source_week.choices = calendar_dim.week_choices(-4, 8, mark_current=True)
+        self.first_week.choices = calendar_dim.week_choices(0, 26, mark_current=True)
+        self.class_id.choices = [(0, 'Tất cả lớp')] + reference_data.class_choices()
 
-            week_choices.append((week_str, display_text))
+class CalendarExceptionForm(FlaskForm):
+    kind = SelectField('Loại', choices=[
+        ('closure', 'Nghỉ (không có buổi học)'),
+        ('open', 'Vẫn học trong ngày lễ')
+    ], validators=[DataRequired()])
+    start_date = DateField('Từ ngày', validators=[DataRequired()])
+    end_date = DateField('Đến ngày', validators=[DataRequired()])
+    class_id = SelectField('Lớp học', coerce=int)
+    reason = StringField('Lý do', validators=[Length(max=200)])
+    submit = SubmitField('Thêm')
 
-        self.source_week.choices = week_choices
-        self.target_week.choices = week_choices
+    def __init__(self, *args, **kwargs):
+        super(CalendarExceptionForm, self).__init__(*args, **kwargs)
+        self.class_id.choices = [(0, 'Toàn trung tâm')] + reference_data.class_choices()
 
-        # Class choices
-        self.class_id.choices = [(0, 'Tất cả lớp')] + [
-            (c.id, c.name)
-            for c in Class.query.filter_by(is_active=True).all()
-        ]
+class MakeupSessionForm(FlaskForm):
+    class_id = SelectField('Lớp học', coerce=int, validators=[DataRequired()])
+    teacher_id = SelectField('Giáo viên', coerce=int, validators=[DataRequired()])
+    date = DateField('Ngày học bù', validators=[DataRequired()])
+    start_time = TimeField('Giờ bắt đầu', validators=[DataRequired()])
+    end_time = TimeField('Giờ kết thúc', validators=[DataRequired()])
+    room = StringField('Phòng học', validators=[Length(max=50)])
+    replaces_date = DateField('Bù cho ngày', validators=[Optional()])
+    reason = StringField('Ghi chú', validators=[Length(max=200)])
+    submit = SubmitField('Tạo buổi học bù')
+
+    def __init__(self, *args, **kwargs):
+        super(MakeupSessionForm, self).__init__(*args, **kwargs)
+        self.class_id.choices = reference_data.class_choices()
+        self.teacher_id.choices = reference_data.person_choices(reference_data.teachers())
 
 class AttendanceForm(FlaskForm):
     schedule_id = HiddenField()
@@ -128,9 +128,8 @@ class CreateClassForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(CreateClassForm, self).__init__(*args, **kwargs)
         # Populate manager choices
-        from app.models.user import User
-        managers = User.query.filter_by(role='manager', is_active=True).all()
-        self.manager_id.choices = [(0, 'Chọn quản sinh')] + [(m.id, m.full_name) for m in managers]
+        from app.utils import reference_data
+        self.manager_id.choices = [(0, 'Chọn quản sinh')] + reference_data.person_choices(reference_data.managers())
 
 class EditClassForm(FlaskForm):
     name = StringField('Tên lớp', validators=[
@@ -152,9 +151,8 @@ class EditClassForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(EditClassForm, self).__init__(*args, **kwargs)
         # Populate manager choices
-        from app.models.user import User
-        managers = User.query.filter_by(role='manager', is_active=True).all()
-        self.manager_id.choices = [(0, 'Chọn quản sinh')] + [(m.id, m.full_name) for m in managers]
+        from app.utils import reference_data
+        self.manager_id.choices = [(0, 'Chọn quản sinh')] + reference_data.person_choices(reference_data.managers())
 
 class CreateStudentForm(FlaskForm):
     full_name = StringField('Họ và tên', validators=[
@@ -242,9 +240,8 @@ class EditStudentForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(EditStudentForm, self).__init__(*args, **kwargs)
         # Populate class choices
-        from app.models.class_model import Class
-        classes = Class.query.filter_by(is_active=True).all()
-        self.class_id.choices = [(0, 'Chọn lớp học')] + [(c.id, c.name) for c in classes]
+        from app.utils import reference_data
+        self.class_id.choices = [(0, 'Chọn lớp học')] + reference_data.class_choices()
 
 class AddStudentsToClassForm(FlaskForm):
     """Form for adding students to class"""
@@ -8,3 +8,15 @@ from .event import Event
 from .finance import Finance
 from .expense import Expense, ExpenseCategory, Budget
 from .financial_transaction import FinancialTransaction, DonationAsset, DonationRecord
+from .outbound_message import OutboundMessage
+from .attendance_stat import StudentAttendanceStat, AnalyticsCursor
+from .attendance_sync import AttendanceSyncRecord
+from .ledger import LedgerEntry
+from .reference_version import ReferenceVersion
+from .dim_date import DimDate
+from .teacher_availability import TeacherAvailability
+from .room import Room
+from .schedule_batch import ScheduleBatch
+from .calendar_exception import CalendarException
+from .archive import ArchivedTerm
+from .payroll import PayrollSnapshot, PayrollMonth
@@ -0,0 +1,54 @@
+from datetime import datetime
+from app import db
+from .attendance import Attendance
+from .attendance_sync import AttendanceSyncRecord
+from .schedule import Schedule
+from .student_schedule import StudentSchedule
+
+
+def _archive_of(model, name, *indexes):
+    """Same columns as the model's table, without foreign keys, plus the term the rows came from"""
+    columns = [db.Column(column.name, column.type, primary_key=column.primary_key,
+                         nullable=column.nullable, autoincrement=False)
+               for column in model.__table__.columns]
+    return db.Table(
+        name,
+        *columns,
+        db.Column('term_key', db.String(20), nullable=False),  # 2024-2025-hk1
+        db.Column('archived_at', db.DateTime, nullable=False),
+        db.Index(f'ix_{name}_term', 'term_key'),
+        *[db.Index(f'ix_{name}_{"_".join(index)}', *index) for index in indexes],
+    )
+
+
+# Rows of finished terms, moved out of the live tables by app/utils/archive.py
+schedule_archive = _archive_of(Schedule, 'schedule_archive', ('class_id', 'week_number'))
+student_schedule_archive = _archive_of(StudentSchedule, 'student_schedule_archive', ('schedule_id',))
+attendance_archive = _archive_of(Attendance, 'attendance_archive', ('schedule_id',), ('student_id', 'date'))
+attendance_sync_archive = _archive_of(AttendanceSyncRecord, 'attendance_sync_records_archive', ('schedule_id',))
+
+# live table: archive table, children before their schedules
+ARCHIVE_TABLES = {
+    Attendance.__table__: attendance_archive,
+    StudentSchedule.__table__: student_schedule_archive,
+    AttendanceSyncRecord.__table__: attendance_sync_archive,
+    Schedule.__table__: schedule_archive,
+}
+
+class ArchivedTerm(db.Model):
+    """Progress and row counts of one term moved to the archive tables"""
+    __tablename__ = 'archived_terms'
+
+    term_key = db.Column(db.String(20), primary_key=True)  # 2024-2025-hk1
+    status = db.Column(db.String(20), nullable=False, default='archiving')  # archiving, archived
+    schedules = db.Column(db.Integer, default=0)
+    enrollments = db.Column(db.Integer, default=0)
+    attendance = db.Column(db.Integer, default=0)
+    sync_records = db.Column(db.Integer, default=0)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    archived_at = db.Column(db.DateTime)
+    export_path = db.Column(db.String(500))
+    exported_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<ArchivedTerm {self.term_key} {self.status}>'
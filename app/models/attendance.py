@@ -15,6 +15,8 @@ class Attendance(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (db.Index('ix_attendance_student_date', 'student_id', 'date'),)
+
     def __repr__(self):
         return f'<Attendance {self.student.full_name} - {self.date} - {self.status}>'
     
@@ -0,0 +1,39 @@
+from datetime import datetime
+from app import db
+
+class StudentAttendanceStat(db.Model):
+    """Per-student attendance summary maintained incrementally from Attendance rows"""
+    __tablename__ = 'student_attendance_stats'
+
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), primary_key=True)
+    class_id = db.Column(db.Integer, db.ForeignKey('class.id'))  # Class of the latest attended schedule
+    absence_streak = db.Column(db.Integer, default=0)  # Consecutive absences up to the latest session
+    recent_total = db.Column(db.Integer, default=0)  # Sessions in the rolling window
+    recent_present = db.Column(db.Integer, default=0)
+    recent_rate = db.Column(db.Float, default=100.0)  # Attendance rate (%) over the rolling window
+    total_sessions = db.Column(db.Integer, default=0)
+    present_sessions = db.Column(db.Integer, default=0)
+    risk_score = db.Column(db.Integer, default=0)
+    last_attendance_date = db.Column(db.Date)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    student = db.relationship('Student', backref=db.backref('attendance_stat', uselist=False))
+
+    __table_args__ = (db.Index('ix_student_attendance_stats_class_risk', 'class_id', 'risk_score'),)
+
+    @property
+    def attendance_rate(self):
+        if not self.total_sessions:
+            return 0
+        return round(self.present_sessions / self.total_sessions * 100, 2)
+
+    def __repr__(self):
+        return f'<StudentAttendanceStat {self.student_id} streak={self.absence_streak}>'
+
+class AnalyticsCursor(db.Model):
+    """Watermark of the last source row processed by an incremental job"""
+    __tablename__ = 'analytics_cursors'
+
+    name = db.Column(db.String(50), primary_key=True)
+    last_id = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,28 @@
+from datetime import datetime
+from app import db
+
+class AttendanceSyncRecord(db.Model):
+    """One attendance record received from an offline client sync batch"""
+    __tablename__ = 'attendance_sync_records'
+
+    id = db.Column(db.Integer, primary_key=True)  # Also serves as the sync cursor
+    idempotency_key = db.Column(db.String(100), nullable=False)  # Client-generated, unique per teacher
+    teacher_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    schedule_id = db.Column(db.Integer, db.ForeignKey('schedule.id'), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    notes = db.Column(db.Text)
+    device_id = db.Column(db.String(100))
+    client_updated_at = db.Column(db.DateTime, nullable=False)  # UTC time the client recorded the change
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+    result = db.Column(db.String(20), nullable=False)  # applied, stale
+    attendance_id = db.Column(db.Integer)
+
+    __table_args__ = (
+        db.UniqueConstraint('teacher_id', 'idempotency_key', name='uq_attendance_sync_records_teacher_key'),
+        db.Index('ix_attendance_sync_records_cell', 'schedule_id', 'student_id', 'date'),
+    )
+
+    def __repr__(self):
+        return f'<AttendanceSyncRecord {self.idempotency_key} {self.result}>'
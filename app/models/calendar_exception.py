@@ -0,0 +1,39 @@
+from datetime import datetime
+from app import db
+
+class CalendarException(db.Model):
+    """
+    A change to the regular calendar, for the whole center (class_id NULL)
+    or one class:
+    - closure: no sessions from start_date to end_date
+    - open: sessions are held on public holidays in that range
+    - makeup: an extra session on start_date (the Schedule row schedule_id),
+      replacing the one missed on replaces_date; never closed itself
+    Read through app/utils/calendar_exceptions.py.
+    """
+    __tablename__ = 'calendar_exceptions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False, default='closure')  # closure, open, makeup
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    class_id = db.Column(db.Integer, db.ForeignKey('class.id'))  # NULL = every class
+    schedule_id = db.Column(db.Integer, db.ForeignKey('schedule.id', ondelete='SET NULL'))  # makeup session
+    replaces_date = db.Column(db.Date)  # makeup: date of the missed session
+    reason = db.Column(db.String(200))
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    class_obj = db.relationship('Class', backref=db.backref('calendar_exceptions', lazy='dynamic'))
+    schedule = db.relationship('Schedule', backref=db.backref('makeup_of', uselist=False))
+    creator = db.relationship('User')
+
+    __table_args__ = (db.Index('ix_calendar_exceptions_dates', 'start_date', 'end_date'),)
+
+    @property
+    def kind_name(self):
+        names = {'closure': 'Nghỉ', 'open': 'Học ngày lễ', 'makeup': 'Buổi học bù'}
+        return names.get(self.kind, self.kind)
+
+    def __repr__(self):
+        return f'<CalendarException {self.kind} {self.start_date}-{self.end_date} class={self.class_id}>'
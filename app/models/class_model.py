@@ -1,5 +1,6 @@
 from datetime import datetime
 from app import db
+from .student import Student
 
 class Class(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -8,6 +9,11 @@ class Class(db.Model):
     manager_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Active students, counted in the same SELECT that loads the class (ix_student_class_active)
+    student_count = db.column_property(
+        db.select(db.func.count(Student.id)).where(Student.class_id == id, Student.is_active == True)
+        .correlate_except(Student).scalar_subquery())
     
     # Relationships
     students = db.relationship('Student', backref='class_obj', lazy='dynamic')
@@ -21,10 +27,6 @@ class Class(db.Model):
 
     def __repr__(self):
         return f'<Class {self.name} - {self.block_name}>'
-    
-    @property
-    def student_count(self):
-        return self.students.filter_by(is_active=True).count()
 
 # Association table for many-to-many relationship between Class and Teacher
 class_teacher = db.Table('class_teacher',
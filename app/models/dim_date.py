@@ -0,0 +1,31 @@
+from app import db
+
+class DimDate(db.Model):
+    """
+    One row per calendar day (2020-2035), filled by app/utils/calendar_dim.py.
+    Lets queries join dates to ISO weeks, terms and holidays with an index
+    instead of recomputing them in Python.
+    """
+    __tablename__ = 'dim_date'
+
+    date = db.Column(db.Date, primary_key=True)
+    week_key = db.Column(db.String(8), nullable=False)  # ISO week: 2025-W25
+    iso_year = db.Column(db.Integer, nullable=False)
+    iso_week = db.Column(db.Integer, nullable=False)
+    weekday = db.Column(db.Integer, nullable=False)  # 1=Monday, 7=Sunday (matches Schedule.day_of_week)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    month_key = db.Column(db.String(7), nullable=False)  # YYYY-MM
+    school_year = db.Column(db.String(9), nullable=False)  # 2025-2026
+    term = db.Column(db.String(10), nullable=False)  # hk1, hk2, summer
+    is_weekend = db.Column(db.Boolean, nullable=False, default=False)
+    is_holiday = db.Column(db.Boolean, nullable=False, default=False)
+    holiday_name = db.Column(db.String(50))
+
+    __table_args__ = (
+        db.Index('ix_dim_date_week_weekday', 'week_key', 'weekday'),
+        db.Index('ix_dim_date_month_key', 'month_key'),
+    )
+
+    def __repr__(self):
+        return f'<DimDate {self.date} {self.week_key}>'
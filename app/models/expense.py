@@ -23,16 +23,19 @@ class Expense(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
-    amount = db.Column(db.Numeric(12, 2), nullable=False)
-    expense_date = db.Column(db.Date, nullable=False)
+    # Budget running totals (app/utils/budgets.py) need the old value of
+    # amount, expense_date, status and category_id even when it was expired
+    amount = db.column_property(db.Column(db.Numeric(12, 2), nullable=False), active_history=True)
+    expense_date = db.column_property(db.Column(db.Date, nullable=False), active_history=True)
     receipt_number = db.Column(db.String(50))
     vendor = db.Column(db.String(200))
     payment_method = db.Column(db.String(50))  # cash, bank_transfer, card, etc.
-    status = db.Column(db.String(20), default='pending')  # pending, approved, rejected
+    status = db.column_property(db.Column(db.String(20), default='pending'), active_history=True)  # pending, approved, rejected
     notes = db.Column(db.Text)
     
     # Foreign Keys
-    category_id = db.Column(db.Integer, db.ForeignKey('expense_categories.id'), nullable=False)
+    category_id = db.column_property(db.Column(db.Integer, db.ForeignKey('expense_categories.id'), nullable=False),
+                                     active_history=True)
     created_by = db.Column(db.Integer, nullable=False)
     approved_by = db.Column(db.Integer)
     
@@ -40,6 +43,9 @@ class Expense(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     approved_at = db.Column(db.DateTime)
+
+    # Keyset pagination of the expense list (newest first)
+    __table_args__ = (db.Index('ix_expenses_date_id', 'expense_date', 'id'),)
     
     # Note: Relationships will be defined after User model is available
     
@@ -79,6 +85,9 @@ class Budget(db.Model):
     # Foreign Keys
     category_id = db.Column(db.Integer, db.ForeignKey('expense_categories.id'))
     created_by = db.Column(db.Integer, nullable=False)
+
+    # Approved expenses in range, kept up to date by app/utils/budgets.py
+    spent_total = db.Column(db.Numeric(14, 2), nullable=False, default=0, server_default='0')
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -88,22 +97,8 @@ class Budget(db.Model):
     
     @property
     def spent_amount(self):
-        """Calculate total spent amount for this budget"""
-        if self.category_id:
-            expenses = Expense.query.filter(
-                Expense.category_id == self.category_id,
-                Expense.expense_date >= self.start_date,
-                Expense.expense_date <= self.end_date,
-                Expense.status == 'approved'
-            ).all()
-        else:
-            expenses = Expense.query.filter(
-                Expense.expense_date >= self.start_date,
-                Expense.expense_date <= self.end_date,
-                Expense.status == 'approved'
-            ).all()
-        
-        return sum(expense.amount for expense in expenses)
+        """Total approved expenses for this budget (running total)"""
+        return self.spent_total or 0
     
     @property
     def remaining_amount(self):
@@ -26,6 +26,9 @@ class FinancialTransaction(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     approved_at = db.Column(db.DateTime)
+
+    # Keyset pagination of the transaction list (newest first)
+    __table_args__ = (db.Index('ix_financial_transactions_date_id', 'transaction_date', 'id'),)
     
     @property
     def transaction_type_display(self):
@@ -92,6 +95,8 @@ class DonationAsset(db.Model):
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_donation_assets_date_id', 'donation_date', 'id'),)
     
     @property
     def status_display(self):
@@ -161,6 +166,9 @@ class DonationRecord(db.Model):
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    approved_at = db.Column(db.DateTime)
+
+    __table_args__ = (db.Index('ix_donation_records_date_id', 'transaction_date', 'id'),)
 
     @property
     def record_type_display(self):
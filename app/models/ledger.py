@@ -0,0 +1,38 @@
+from datetime import datetime
+from app import db
+
+class LedgerEntry(db.Model):
+    """
+    Append-only, normalized copy of every money movement recorded in
+    Finance, FinancialTransaction, Expense and DonationRecord. Rows are
+    never updated: a change to the source row appends a reversal of its
+    current entry (negated amount) followed by the new entry, so the sum
+    over a source row is always its current effective amount.
+    """
+    __tablename__ = 'ledger_entries'
+
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(30), nullable=False)  # finance, financial_transaction, expense, donation_record
+    source_id = db.Column(db.Integer, nullable=False)
+    entry_type = db.Column(db.String(10), nullable=False)  # income, expense
+    amount = db.Column(db.Numeric(14, 2), nullable=False)  # Negative for reversals
+    entry_date = db.Column(db.Date, nullable=False)
+    period = db.Column(db.String(7), nullable=False)  # YYYY-MM, for monthly grouping on any database
+    category = db.Column(db.String(100))
+    class_id = db.Column(db.Integer)
+    description = db.Column(db.String(200))
+    reverses_id = db.Column(db.Integer, db.ForeignKey('ledger_entries.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_ledger_entries_date_type_category_class', 'entry_date', 'entry_type', 'category', 'class_id'),
+        db.Index('ix_ledger_entries_period_type', 'period', 'entry_type'),
+        db.Index('ix_ledger_entries_source', 'source', 'source_id', 'id'),
+    )
+
+    @property
+    def is_reversal(self):
+        return self.reverses_id is not None
+
+    def __repr__(self):
+        return f'<LedgerEntry {self.source}#{self.source_id} {self.entry_type} {self.amount}>'
@@ -0,0 +1,43 @@
+from datetime import datetime
+from app import db
+
+class OutboundMessage(db.Model):
+    """Outbox of messages waiting to be delivered to parents"""
+    __tablename__ = 'outbound_messages'
+
+    id = db.Column(db.Integer, primary_key=True)
+    channel = db.Column(db.String(20), nullable=False, default='sms')  # sms, email
+    recipient = db.Column(db.String(200), nullable=False)  # Phone number or email address
+    subject = db.Column(db.String(200))
+    body = db.Column(db.Text, nullable=False)
+    category = db.Column(db.String(50))  # absence_alert, schedule_notice, broadcast
+    dedupe_key = db.Column(db.String(64), unique=True, nullable=False)  # sha256(scope|channel|recipient|body), scope = send date or campaign
+    status = db.Column(db.String(20), default='pending')  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime)
+    claim_token = db.Column(db.String(32))  # Set per claim; only the claiming worker may mark the result
+    last_error = db.Column(db.Text)
+
+    # Foreign Keys
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'))
+    created_by = db.Column(db.Integer)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (db.Index('ix_outbound_messages_status_next', 'status', 'next_attempt_at'),)
+
+    @property
+    def status_display(self):
+        status_map = {
+            'pending': 'Chờ gửi',
+            'sending': 'Đang gửi',
+            'sent': 'Đã gửi',
+            'failed': 'Gửi lỗi'
+        }
+        return status_map.get(self.status, self.status)
+
+    def __repr__(self):
+        return f'<OutboundMessage {self.channel} {self.recipient} {self.status}>'
@@ -0,0 +1,31 @@
+from datetime import datetime
+from app import db
+
+class PayrollSnapshot(db.Model):
+    """
+    Delivered sessions and minutes of one teacher, session type and closed
+    month. Filled by app/utils/payroll.py; amounts are applied from the
+    configured rates when reported.
+    """
+    __tablename__ = 'payroll_snapshots'
+
+    month_key = db.Column(db.String(7), primary_key=True)  # YYYY-MM
+    teacher_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    session = db.Column(db.String(20), primary_key=True)  # morning, afternoon, evening
+    sessions = db.Column(db.Integer, nullable=False, default=0)
+    minutes = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<PayrollSnapshot {self.month_key} teacher={self.teacher_id} {self.session}>'
+
+
+class PayrollMonth(db.Model):
+    """A closed month whose payroll_snapshots rows are complete; deleted when its attendance changes"""
+    __tablename__ = 'payroll_months'
+
+    month_key = db.Column(db.String(7), primary_key=True)  # YYYY-MM
+    sessions = db.Column(db.Integer, nullable=False, default=0)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<PayrollMonth {self.month_key} {self.sessions} sessions>'
@@ -0,0 +1,15 @@
+from app import db
+
+class ReferenceVersion(db.Model):
+    """
+    Change counter per reference table (classes, users, events, ...),
+    bumped in the same transaction as any change to a column shown in
+    dropdowns. Workers compare it with their cached copy.
+    """
+    __tablename__ = 'reference_versions'
+
+    table_name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ReferenceVersion {self.table_name}={self.version}>'
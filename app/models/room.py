@@ -0,0 +1,20 @@
+from datetime import datetime
+from app import db
+
+class Room(db.Model):
+    """
+    A classroom. Schedule.room keeps the display text; Schedule.room_id is
+    resolved from it (see app/utils/rooms.py) so occupancy can be queried.
+    """
+    __tablename__ = 'rooms'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)  # Normalized: P101, LAB A
+    capacity = db.Column(db.Integer)
+    is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    schedules = db.relationship('Schedule', backref='room_obj', lazy='dynamic')
+
+    def __repr__(self):
+        return f'<Room {self.name}>'
@@ -4,14 +4,19 @@ from app import db
 class Schedule(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     class_id = db.Column(db.Integer, db.ForeignKey('class.id'), nullable=False)
-    teacher_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # active_history: availability bitsets (app/utils/availability.py) rebuild the old (teacher, week) too
+    teacher_id = db.column_property(db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False),
+                                    active_history=True)
     day_of_week = db.Column(db.Integer, nullable=False)  # 1=Monday, 7=Sunday
     session = db.Column(db.String(20), nullable=False)  # 'morning' or 'afternoon'
     start_time = db.Column(db.Time, nullable=False)
     end_time = db.Column(db.Time, nullable=False)
     subject = db.Column(db.String(100))
     room = db.Column(db.String(50))
-    week_number = db.Column(db.String(10), nullable=False)  # Format: 2025-W25 - Specific week for this schedule
+    room_id = db.Column(db.Integer, db.ForeignKey('rooms.id'))  # Resolved from room, see app/utils/rooms.py
+    batch_id = db.Column(db.Integer, db.ForeignKey('schedule_batches.id'))  # Set for generated/rolled-out schedules
+    week_number = db.column_property(db.Column(db.String(10), nullable=False),  # Format: 2025-W25 - Specific week for this schedule
+                                     active_history=True)
     week_created = db.Column(db.String(10))  # Week when schedule was created: 2025-W25
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -19,27 +24,31 @@ class Schedule(db.Model):
     # Relationships
     attendances = db.relationship('Attendance', backref='schedule', lazy='dynamic')
 
+    # Week views and aggregates filter on week_number (and day); room occupancy
+    # lookups ask which rooms are booked on a day of a week
+    __table_args__ = (
+        db.Index('ix_schedule_week_day', 'week_number', 'day_of_week'),
+        db.Index('ix_schedule_room_week_day', 'room_id', 'week_number', 'day_of_week'),
+        db.Index('ix_schedule_batch_id', 'batch_id'),
+    )
+
     @staticmethod
     def get_current_week():
         """Get current week in YYYY-WXX format"""
-        from datetime import datetime
-        now = datetime.now()
-        year, week, _ = now.isocalendar()
-        return f"{year}-W{week:02d}"
+        from app.utils.calendar_dim import current_week_key
+        return current_week_key()
 
     @staticmethod
     def get_next_week():
         """Get next week in YYYY-WXX format"""
-        from datetime import datetime, timedelta
-        next_week_date = datetime.now() + timedelta(weeks=1)
-        year, week, _ = next_week_date.isocalendar()
-        return f"{year}-W{week:02d}"
+        from app.utils.calendar_dim import current_week_key, shift_week
+        return shift_week(current_week_key(), 1)
 
     @staticmethod
     def get_week_from_date(date_obj):
         """Get week string from date object"""
-        year, week, _ = date_obj.isocalendar()
-        return f"{year}-W{week:02d}"
+        from app.utils.calendar_dim import week_key
+        return week_key(date_obj)
 
     def __repr__(self):
         return f'<Schedule {self.class_obj.name if self.class_obj else "Unknown"} - Day {self.day_of_week} Session {self.session} Week {self.week_number}>'
@@ -74,22 +83,6 @@ class Schedule(db.Model):
         else:
             return '#ffc107'  # Yellow for evening
 
-    @staticmethod
-    def get_current_week():
-        """Get current week in format YYYY-WXX"""
-        from datetime import datetime
-        now = datetime.now()
-        year, week, _ = now.isocalendar()
-        return f"{year}-W{week:02d}"
-
-    @staticmethod
-    def get_next_week():
-        """Get next week in format YYYY-WXX"""
-        from datetime import datetime, timedelta
-        next_week = datetime.now() + timedelta(weeks=1)
-        year, week, _ = next_week.isocalendar()
-        return f"{year}-W{week:02d}"
-
     def confirm_for_week(self, week_number=None):
         """Confirm schedule for specific week - TODO: Implement after migration"""
         # if not week_number:
@@ -97,9 +90,3 @@ class Schedule(db.Model):
         # self.week_number = week_number
         # self.is_confirmed = True
         pass
-
-    @staticmethod
-    def get_week_from_date(date_obj):
-        """Get week number from date object"""
-        year, week, _ = date_obj.isocalendar()
-        return f"{year}-W{week:02d}"
@@ -0,0 +1,43 @@
+from datetime import datetime
+import json
+from app import db
+
+class ScheduleBatch(db.Model):
+    """
+    A group of Schedule rows written together (timetable generator,
+    multi-week rollout, week copy). Draft batches keep their schedules
+    inactive until a manager publishes them; discarding deletes them.
+    A published batch can be reverted as a whole.
+    """
+    __tablename__ = 'schedule_batches'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False, default='generated')  # generated, rollout, copy
+    week_number = db.Column(db.String(10), nullable=False)  # Generated week, or source week of a rollout/copy
+    status = db.Column(db.String(20), nullable=False, default='draft')  # draft, published, discarded, reverted
+    summary = db.Column(db.Text)  # JSON: placed/unplaced sessions, soft-constraint costs, timings
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    published_at = db.Column(db.DateTime)
+
+    creator = db.relationship('User', backref='schedule_batches')
+    schedules = db.relationship('Schedule', backref='batch', lazy='dynamic')
+
+    __table_args__ = (db.Index('ix_schedule_batches_status_week', 'status', 'week_number'),)
+
+    @property
+    def summary_data(self):
+        return json.loads(self.summary) if self.summary else {}
+
+    @property
+    def status_name(self):
+        names = {'draft': 'Bản nháp', 'published': 'Đã áp dụng', 'discarded': 'Đã hủy', 'reverted': 'Đã hoàn tác'}
+        return names.get(self.status, self.status)
+
+    @property
+    def kind_name(self):
+        names = {'generated': 'Xếp tự động', 'rollout': 'Áp dụng nhiều tuần', 'copy': 'Sao chép tuần'}
+        return names.get(self.kind, self.kind)
+
+    def __repr__(self):
+        return f'<ScheduleBatch {self.id} {self.week_number} {self.status}>'
@@ -13,6 +13,12 @@ class Student(db.Model):
     class_id = db.Column(db.Integer, db.ForeignKey('class.id'))
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Keyset pagination of the student list (by name); class head counts (Class.student_count)
+    __table_args__ = (
+        db.Index('ix_student_active_name_id', 'is_active', 'full_name', 'id'),
+        db.Index('ix_student_class_active', 'class_id', 'is_active'),
+    )
     
     # Relationships
     attendances = db.relationship('Attendance', backref='student', lazy='dynamic')
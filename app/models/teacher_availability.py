@@ -0,0 +1,21 @@
+from datetime import datetime
+from app import db
+
+class TeacherAvailability(db.Model):
+    """
+    Busy bitset of a teacher for one ISO week, maintained from Schedule
+    writes by app/utils/availability.py. Bit (day - 1) * 96 + quarter is
+    set when an active schedule covers that 15-minute slot.
+    """
+    __tablename__ = 'teacher_availability'
+
+    teacher_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    week_number = db.Column(db.String(10), primary_key=True)  # Format: 2025-W25
+    busy = db.Column(db.LargeBinary, nullable=False)  # 84 bytes, little-endian
+    sessions = db.Column(db.Integer, nullable=False, default=0)  # Active schedules in the week
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_teacher_availability_week', 'week_number'),)
+
+    def __repr__(self):
+        return f'<TeacherAvailability {self.teacher_id} {self.week_number} sessions={self.sessions}>'
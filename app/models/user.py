@@ -2,7 +2,7 @@ from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
-from app import db, login
+from app import db
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -42,7 +42,3 @@ class User(UserMixin, db.Model):
 
     def is_user(self):
         return self.role == 'user'
-
-@login.user_loader
-def load_user(id):
-    return User.query.get(int(id))
@@ -14,6 +14,71 @@ def admin_or_manager_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def admin_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated or not current_user.is_admin():
+            return jsonify({'error': 'Unauthorized'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+def _keyset_list(name):
+    """
+    One page of a list from app/utils/list_queries.py. Takes the same
+    filters as the HTML view plus `cursor`, `limit` (max 100) and
+    `include_total=1` for an estimated total.
+    """
+    from flask import request
+    from app.utils.keyset import keyset_paginate
+    from app.utils.list_queries import LISTS
+
+    build_query, serialize, descending = LISTS[name]
+    try:
+        query, sort_column = build_query(request.args)
+        page = keyset_paginate(query, sort_column,
+                               cursor=request.args.get('cursor'),
+                               per_page=request.args.get('limit', 20, type=int),
+                               descending=descending,
+                               with_total=request.args.get('include_total') in ('1', 'true'))
+    except ValueError as e:  # Bad cursor or date filter
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True, **page.to_dict(serialize)})
+
+@bp.route('/transactions')
+@login_required
+@admin_required
+def list_transactions():
+    """Financial transactions, newest first, keyset-paginated"""
+    return _keyset_list('transactions')
+
+@bp.route('/donations')
+@login_required
+@admin_required
+def list_donations():
+    """Donation assets, newest first, keyset-paginated"""
+    return _keyset_list('donations')
+
+@bp.route('/donation-records')
+@login_required
+@admin_required
+def list_donation_records():
+    """Donation records, newest first, keyset-paginated"""
+    return _keyset_list('donation-records')
+
+@bp.route('/expenses')
+@login_required
+@admin_or_manager_required
+def list_expenses():
+    """Expenses, newest first, keyset-paginated"""
+    return _keyset_list('expenses')
+
+@bp.route('/students/page')
+@login_required
+@admin_or_manager_required
+def list_students():
+    """Active students by name, keyset-paginated (/api/students returns all for dropdowns)"""
+    return _keyset_list('students')
+
 @bp.route('/students')
 @login_required
 @admin_or_manager_required
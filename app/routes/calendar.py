@@ -6,23 +6,17 @@ from app.models.schedule import Schedule
 from app.models.class_model import Class
 from app.models.attendance import Attendance
 from app.models.user import User
+from app.utils import calendar_dim, calendar_exceptions
 
 bp = Blueprint('calendar', __name__)
 
 def get_week_dates(year, week):
     """Get start and end dates of a week"""
-    jan1 = date(year, 1, 1)
-    week_start = jan1 + timedelta(weeks=week-1)
-    # Adjust to Monday
-    week_start = week_start - timedelta(days=week_start.weekday())
-    week_end = week_start + timedelta(days=6)
-    return week_start, week_end
+    return calendar_dim.week_bounds(calendar_dim.make_week_key(year, week))
 
 def get_current_week():
     """Get current week number and year"""
-    today = date.today()
-    year, week, _ = today.isocalendar()
-    return year, week
+    return calendar_dim.parse_week_key(calendar_dim.current_week_key())
 
 @bp.route('/calendar')
 @login_required
@@ -33,8 +27,11 @@ def calendar_view():
     
     if not year or not week:
         year, week = get_current_week()
-    
-    week_start, week_end = get_week_dates(year, week)
+    try:
+        week_start, week_end = get_week_dates(year, week)
+    except ValueError:
+        year, week = get_current_week()
+        week_start, week_end = get_week_dates(year, week)
     
     # Get schedules for the week based on user role
     # Filter schedules to only show those created in the selected week or current week
@@ -52,25 +49,44 @@ def calendar_view():
     # Get schedules for the specific week only
     selected_week_str = f"{year}-W{week:02d}"
 
+    # Class and teacher names are shown on every session card
+    from sqlalchemy.orm import joinedload
+    schedule_query = Schedule.query.options(joinedload(Schedule.class_obj), joinedload(Schedule.teacher))
+
     if current_user.is_admin():
-        schedules = Schedule.query.filter_by(
+        schedules = schedule_query.filter_by(
             week_number=selected_week_str,
             is_active=True
         ).all()
     elif current_user.is_manager():
         managed_class_ids = [c.id for c in Class.query.filter_by(manager_id=current_user.id, is_active=True)]
-        schedules = Schedule.query.filter(
+        schedules = schedule_query.filter(
             Schedule.class_id.in_(managed_class_ids),
             Schedule.week_number == selected_week_str,
             Schedule.is_active == True
         ).all()
     else:  # teacher
-        schedules = Schedule.query.filter_by(
+        schedules = schedule_query.filter_by(
             teacher_id=current_user.id,
             week_number=selected_week_str,
             is_active=True
         ).all()
     
+    # Sessions cancelled by holidays and closures are not shown
+    week_calendar = calendar_exceptions.for_week(selected_week_str)
+    schedules = [s for s in schedules if not week_calendar.is_closed(s)]
+
+    # Attendance rows per (schedule, date) of the week in one grouped query
+    attendance_counts = {}
+    if schedules:
+        attendance_counts = {(schedule_id, day): count for schedule_id, day, count in db.session.query(
+            Attendance.schedule_id, Attendance.date, db.func.count(Attendance.id)
+        ).filter(
+            Attendance.schedule_id.in_([s.id for s in schedules]),
+            Attendance.date >= week_start,
+            Attendance.date <= week_end
+        ).group_by(Attendance.schedule_id, Attendance.date)}
+
     # Create calendar data structure
     calendar_data = {}
     for day in range(7):  # Monday to Sunday
@@ -81,6 +97,7 @@ def calendar_view():
             'date': current_date,
             'date_str': current_date.strftime('%d/%m'),
             'is_today': current_date == date.today(),
+            'closed_reason': week_calendar.reason(current_date),
             'periods': {}
         }
         
@@ -91,10 +108,7 @@ def calendar_view():
                 calendar_data[day_of_week]['periods'][schedule.session] = []
 
             # Check if there's attendance for this date
-            attendance_count = Attendance.query.filter_by(
-                schedule_id=schedule.id,
-                date=current_date
-            ).count()
+            attendance_count = attendance_counts.get((schedule.id, current_date), 0)
 
             calendar_data[day_of_week]['periods'][schedule.session].append({
                 'schedule': schedule,
@@ -103,11 +117,9 @@ def calendar_view():
                 'date': current_date
             })
     
-    # Navigation data
-    prev_week = week - 1 if week > 1 else 52
-    prev_year = year if week > 1 else year - 1
-    next_week = week + 1 if week < 52 else 1
-    next_year = year if week < 52 else year + 1
+    # Navigation data (ISO years have 52 or 53 weeks)
+    prev_year, prev_week = calendar_dim.parse_week_key(calendar_dim.shift_week(selected_week_str, -1))
+    next_year, next_week = calendar_dim.parse_week_key(calendar_dim.shift_week(selected_week_str, 1))
     
     return render_template('calendar/calendar_tailwind.html',
                          title='Lịch dạy',
@@ -135,8 +147,7 @@ def day_view(date_str):
     day_of_week = view_date.weekday() + 1  # Convert to 1=Monday format
 
     # Get week number for the specific date
-    year, week, _ = view_date.isocalendar()
-    week_str = f"{year}-W{week:02d}"
+    week_str = calendar_dim.week_key(view_date)
 
     # Get schedules for this day and week based on user role
     if current_user.is_admin():
@@ -162,31 +173,38 @@ def day_view(date_str):
         ).order_by(Schedule.session, Schedule.start_time).all()
     
     # Get attendance data for each schedule
+    week_calendar = calendar_exceptions.for_week(week_str)
     schedule_data = []
     for schedule in schedules:
         attendance_records = Attendance.query.filter_by(
             schedule_id=schedule.id,
             date=view_date
         ).all()
-        
+
+        # No attendance is expected for a session cancelled by a holiday or closure
+        closed_reason = None if schedule.id in week_calendar.makeups else \
+            week_calendar.reason(view_date, schedule.class_id)
         attendance_summary = {
             'total': schedule.class_obj.student_count,
             'present': len([a for a in attendance_records if a.status == 'present']),
             'absent_with_reason': len([a for a in attendance_records if a.status == 'absent_with_reason']),
             'absent_without_reason': len([a for a in attendance_records if a.status == 'absent_without_reason']),
-            'not_taken': schedule.class_obj.student_count - len(attendance_records)
+            'not_taken': 0 if closed_reason else schedule.class_obj.student_count - len(attendance_records)
         }
         
         schedule_data.append({
             'schedule': schedule,
             'attendance_summary': attendance_summary,
             'attendance_records': attendance_records,
+            'closed_reason': closed_reason,
             'can_take_attendance': current_user.is_teacher() and schedule.teacher_id == current_user.id
+                                   and not closed_reason
         })
     
     return render_template('calendar/day_view_tailwind.html',
                          title=f'Lịch dạy {view_date.strftime("%d/%m/%Y")}',
                          view_date=view_date,
+                         closed_reason=week_calendar.reason(view_date),
                          schedule_data=schedule_data,
                          timedelta=timedelta,
                          day_name=['', 'Thứ 2', 'Thứ 3', 'Thứ 4', 'Thứ 5', 'Thứ 6', 'Thứ 7', 'Chủ nhật'][day_of_week])
@@ -229,78 +247,56 @@ def month_view():
     month = request.args.get('month', date.today().month, type=int)
 
     # Validate year and month
-    if year < 2020 or year > 2030:
+    if year < calendar_dim.FIRST_DATE.year or year > calendar_dim.LAST_DATE.year:
         year = date.today().year
     if month < 1 or month > 12:
         month = date.today().month
     
-    # Get first day of month and calculate calendar grid
-    first_day = date(year, month, 1)
-    if month == 12:
-        last_day = date(year + 1, 1, 1) - timedelta(days=1)
-    else:
-        last_day = date(year, month + 1, 1) - timedelta(days=1)
-    
-    # Calculate calendar grid (6 weeks)
-    calendar_start = first_day - timedelta(days=first_day.weekday())
-    calendar_end = calendar_start + timedelta(days=41)  # 6 weeks
-    
-    # Get all schedules for the month - collect all weeks in the month view
-    week_numbers = []
-    current_date = calendar_start
-    while current_date <= calendar_end:
-        year, week, _ = current_date.isocalendar()
-        week_str = f"{year}-W{week:02d}"
-        if week_str not in week_numbers:
-            week_numbers.append(week_str)
-        current_date += timedelta(days=7)
+    from app.models.dim_date import DimDate
+    from sqlalchemy.orm import joinedload
 
-    if current_user.is_admin():
-        schedules = Schedule.query.filter(
-            Schedule.week_number.in_(week_numbers),
-            Schedule.is_active == True
-        ).all()
-    elif current_user.is_manager():
+    # 6-week grid starting on the Monday on or before the 1st
+    grid = calendar_dim.month_grid(year, month)
+    calendar_start, calendar_end = grid[0][0].date, grid[-1][-1].date
+
+    # Schedules of every day in the grid: one indexed join of dim_date
+    # (week_key, weekday) to Schedule (week_number, day_of_week)
+    calendar_dim.ensure_populated()
+    query = db.session.query(DimDate.date, Schedule).join(
+        Schedule, db.and_(Schedule.week_number == DimDate.week_key, Schedule.day_of_week == DimDate.weekday)
+    ).filter(
+        DimDate.date >= calendar_start, DimDate.date <= calendar_end, Schedule.is_active == True
+    ).options(joinedload(Schedule.class_obj), joinedload(Schedule.teacher))
+    if current_user.is_manager():
         managed_class_ids = [c.id for c in Class.query.filter_by(manager_id=current_user.id, is_active=True)]
-        schedules = Schedule.query.filter(
-            Schedule.class_id.in_(managed_class_ids),
-            Schedule.week_number.in_(week_numbers),
-            Schedule.is_active == True
-        ).all()
-    else:  # teacher
-        schedules = Schedule.query.filter(
-            Schedule.teacher_id == current_user.id,
-            Schedule.week_number.in_(week_numbers),
-            Schedule.is_active == True
-        ).all()
-    
+        query = query.filter(Schedule.class_id.in_(managed_class_ids))
+    elif not current_user.is_admin():  # teacher
+        query = query.filter(Schedule.teacher_id == current_user.id)
+
+    calendars = calendar_exceptions.load(item.week_key for grid_week in grid for item in grid_week)
+    schedules_by_date = {}
+    for day, schedule in query.order_by(DimDate.date, Schedule.start_time):
+        if not calendars[schedule.week_number].is_closed(schedule):
+            schedules_by_date.setdefault(day, []).append(schedule)
+
     # Build calendar data
+    today = date.today()
     calendar_weeks = []
-    current_date = calendar_start
-    
-    for week in range(6):
+    for grid_week in grid:
         week_data = []
-        for day in range(7):
-            day_of_week = day + 1  # 1=Monday
-
-            # Get week number for this specific date
-            year_iso, week_iso, _ = current_date.isocalendar()
-            date_week_str = f"{year_iso}-W{week_iso:02d}"
-
-            # Filter schedules by both day_of_week AND week_number
-            day_schedules = [s for s in schedules
-                           if s.day_of_week == day_of_week and s.week_number == date_week_str]
-
+        for item in grid_week:
+            day_schedules = schedules_by_date.get(item.date, [])
             week_data.append({
-                'date': current_date,
-                'is_current_month': current_date.month == month,
-                'is_today': current_date == date.today(),
+                'date': item.date,
+                'is_current_month': item.month == month,
+                'is_today': item.date == today,
+                'is_holiday': item.is_holiday,
+                'holiday_name': item.holiday_name,
+                'closed_reason': calendars[item.week_key].reason(item.date),
                 'schedule_count': len(day_schedules),
                 'schedules': day_schedules[:3],  # Show max 3 schedules
-                'week_number': date_week_str
+                'week_number': item.week_key
             })
-            current_date += timedelta(days=1)
-
         calendar_weeks.append(week_data)
     
     # Navigation
@@ -22,22 +22,10 @@ def admin_or_manager_required(f):
 @login_required
 @admin_or_manager_required
 def dashboard():
-    # Get current month statistics
-    current_month = date.today().replace(day=1)
-    next_month = (current_month.replace(day=28) + timedelta(days=4)).replace(day=1)
-    
-    # Monthly expenses
-    monthly_expenses = db.session.query(func.sum(Expense.amount)).filter(
-        Expense.expense_date >= current_month,
-        Expense.expense_date < next_month,
-        Expense.status == 'approved'
-    ).scalar() or 0
-    
-    # Pending expenses count
-    pending_count = Expense.query.filter_by(status='pending').count()
-    
-    # Total categories
-    categories_count = ExpenseCategory.query.filter_by(is_active=True).count()
+    from app.utils.kpi import expense_kpis
+
+    # Current month statistics (one cached query, see app/utils/kpi.py)
+    kpis = expense_kpis()
     
     # Active budgets
     active_budgets = Budget.query.filter(
@@ -49,66 +37,23 @@ def dashboard():
     # Recent expenses
     recent_expenses = Expense.query.order_by(Expense.created_at.desc()).limit(10).all()
     
-    # Expenses by category (current month)
-    category_stats = db.session.query(
-        ExpenseCategory.name,
-        ExpenseCategory.color,
-        func.sum(Expense.amount).label('total')
-    ).join(Expense).filter(
-        Expense.expense_date >= current_month,
-        Expense.expense_date < next_month,
-        Expense.status == 'approved'
-    ).group_by(ExpenseCategory.id).all()
-    
     return render_template('expense/dashboard_tailwind.html',
                          title='Quản lý chi tiêu',
-                         monthly_expenses=monthly_expenses,
-                         pending_count=pending_count,
-                         categories_count=categories_count,
                          active_budgets=active_budgets,
                          recent_expenses=recent_expenses,
-                         category_stats=category_stats)
+                         **kpis)
 
 @bp.route('/expenses')
 @login_required
 @admin_or_manager_required
 def expenses():
-    page = request.args.get('page', 1, type=int)
+    from app.utils.keyset import paginate_view
+    from app.utils.list_queries import expenses_query
+
     filter_form = ExpenseFilterForm()
-    
-    # Build query
-    query = Expense.query
-    
-    # Apply filters
-    if request.args.get('start_date'):
-        start_date = datetime.strptime(request.args.get('start_date'), '%Y-%m-%d').date()
-        query = query.filter(Expense.expense_date >= start_date)
-    
-    if request.args.get('end_date'):
-        end_date = datetime.strptime(request.args.get('end_date'), '%Y-%m-%d').date()
-        query = query.filter(Expense.expense_date <= end_date)
-    
-    if request.args.get('category_id', type=int):
-        query = query.filter(Expense.category_id == request.args.get('category_id', type=int))
-    
-    if request.args.get('status'):
-        query = query.filter(Expense.status == request.args.get('status'))
-    
-    if request.args.get('payment_method'):
-        query = query.filter(Expense.payment_method == request.args.get('payment_method'))
-    
-    # Search
+    query, sort_column = expenses_query(request.args)
     search = request.args.get('search', '')
-    if search:
-        query = query.filter(or_(
-            Expense.title.contains(search),
-            Expense.description.contains(search),
-            Expense.vendor.contains(search)
-        ))
-    
-    expenses = query.order_by(Expense.expense_date.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    expenses = paginate_view(query, sort_column, request.args)
     
     return render_template('expense/expenses_tailwind.html',
                          title='Danh sách chi tiêu',
@@ -236,6 +181,27 @@ def approve_expense(id):
     
     return jsonify({'success': False, 'message': 'Dữ liệu không hợp lệ'})
 
+@bp.route('/expenses/bulk-review', methods=['POST'])
+@login_required
+@admin_or_manager_required
+def bulk_review_expenses():
+    """Approve or reject pending expenses by ids or by the list filters"""
+    from app.utils.approvals import ApprovalError, bulk_review, review_request
+
+    if not current_user.is_admin():
+        return jsonify({'success': False, 'message': 'Chỉ admin mới có quyền duyệt chi tiêu'})
+
+    try:
+        decision, ids, filters, notes = review_request(request.get_json(silent=True))
+        summary = bulk_review('expense', decision, current_user.id, ids=ids, filters=filters, notes=notes)
+        status_text = 'duyệt' if decision == 'approved' else 'từ chối'
+        return jsonify({'success': True, 'message': f'Đã {status_text} {summary["updated"]} chi tiêu', **summary})
+    except ApprovalError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'Có lỗi xảy ra: {str(e)}'})
+
 @bp.route('/categories')
 @login_required
 @admin_or_manager_required
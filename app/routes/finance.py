@@ -4,8 +4,8 @@ from datetime import datetime, date
 from app import db
 from app.models.finance import Finance
 from app.models.class_model import Class
-from app.models.event import Event
 from app.forms.finance_forms import FinanceForm
+from app.utils import reference_data
 
 bp = Blueprint('finance', __name__)
 
@@ -145,22 +145,8 @@ def add_transaction():
     form = FinanceForm()
     
     # Set choices based on user permissions
-    if current_user.is_admin():
-        form.class_id.choices = [(0, 'Không chọn')] + [
-            (c.id, f"{c.name} - {c.block_name}") 
-            for c in Class.query.filter_by(is_active=True).all()
-        ]
-    else:
-        managed_classes = Class.query.filter_by(manager_id=current_user.id, is_active=True).all()
-        form.class_id.choices = [(0, 'Không chọn')] + [
-            (c.id, f"{c.name} - {c.block_name}") 
-            for c in managed_classes
-        ]
-    
-    form.event_id.choices = [(0, 'Không chọn')] + [
-        (e.id, e.name) 
-        for e in Event.query.filter_by(is_active=True).all()
-    ]
+    if not current_user.is_admin():
+        form.class_id.choices = [(0, 'Không chọn')] + reference_data.class_choices(current_user.id)
     
     if form.validate_on_submit():
         transaction = Finance(
@@ -202,22 +188,8 @@ def edit_transaction(transaction_id):
     form = FinanceForm(obj=transaction)
     
     # Set choices
-    if current_user.is_admin():
-        form.class_id.choices = [(0, 'Không chọn')] + [
-            (c.id, f"{c.name} - {c.block_name}") 
-            for c in Class.query.filter_by(is_active=True).all()
-        ]
-    else:
-        managed_classes = Class.query.filter_by(manager_id=current_user.id, is_active=True).all()
-        form.class_id.choices = [(0, 'Không chọn')] + [
-            (c.id, f"{c.name} - {c.block_name}") 
-            for c in managed_classes
-        ]
-    
-    form.event_id.choices = [(0, 'Không chọn')] + [
-        (e.id, e.name) 
-        for e in Event.query.filter_by(is_active=True).all()
-    ]
+    if not current_user.is_admin():
+        form.class_id.choices = [(0, 'Không chọn')] + reference_data.class_choices(current_user.id)
     
     # Set current values
     if transaction.class_id:
@@ -287,8 +259,9 @@ def financial_report():
     else:
         end_date = date.today()
     
-    # Base query
-    query = Finance.query.filter(
+    # Base query (class names are read for every transaction)
+    from sqlalchemy.orm import joinedload
+    query = Finance.query.options(joinedload(Finance.related_class)).filter(
         Finance.transaction_date >= start_date,
         Finance.transaction_date <= end_date
     )
@@ -33,41 +33,10 @@ def admin_or_manager_required(f):
 @admin_required
 def dashboard():
     """Financial dashboard with income/expense overview"""
-    # Get current month statistics
-    current_month = date.today().replace(day=1)
-    next_month = (current_month.replace(day=28) + timedelta(days=4)).replace(day=1)
-    
-    # Monthly income and expenses
-    monthly_income = db.session.query(func.sum(FinancialTransaction.amount)).filter(
-        FinancialTransaction.transaction_date >= current_month,
-        FinancialTransaction.transaction_date < next_month,
-        FinancialTransaction.transaction_type == 'income',
-        FinancialTransaction.status == 'approved'
-    ).scalar() or 0
-    
-    monthly_expense = db.session.query(func.sum(FinancialTransaction.amount)).filter(
-        FinancialTransaction.transaction_date >= current_month,
-        FinancialTransaction.transaction_date < next_month,
-        FinancialTransaction.transaction_type == 'expense',
-        FinancialTransaction.status == 'approved'
-    ).scalar() or 0
-    
-    # Net income
-    net_income = monthly_income - monthly_expense
-    
-    # Donation assets statistics
-    total_assets = DonationAsset.query.count()
-    distributed_assets = DonationAsset.query.filter_by(status='distributed').count()
-    available_assets = DonationAsset.query.filter_by(status='received').count()
-
-    # Donation expense (chi quyên góp) statistics
-    donation_expense = db.session.query(func.sum(FinancialTransaction.amount)).filter(
-        FinancialTransaction.transaction_date >= current_month,
-        FinancialTransaction.transaction_date < next_month,
-        FinancialTransaction.transaction_type == 'expense',
-        FinancialTransaction.category == 'donation',
-        FinancialTransaction.status == 'approved'
-    ).scalar() or 0
+    from app.utils.kpi import financial_kpis
+
+    # Current month statistics (one cached query, see app/utils/kpi.py)
+    kpis = financial_kpis()
     
     # Recent transactions
     recent_transactions = FinancialTransaction.query.order_by(
@@ -79,79 +48,23 @@ def dashboard():
         DonationAsset.donation_date.desc()
     ).limit(5).all()
     
-    # Income by category (current month)
-    income_stats = db.session.query(
-        FinancialTransaction.category,
-        func.sum(FinancialTransaction.amount).label('total')
-    ).filter(
-        FinancialTransaction.transaction_date >= current_month,
-        FinancialTransaction.transaction_date < next_month,
-        FinancialTransaction.transaction_type == 'income',
-        FinancialTransaction.status == 'approved'
-    ).group_by(FinancialTransaction.category).all()
-    
-    # Expense by category (current month)
-    expense_stats = db.session.query(
-        FinancialTransaction.category,
-        func.sum(FinancialTransaction.amount).label('total')
-    ).filter(
-        FinancialTransaction.transaction_date >= current_month,
-        FinancialTransaction.transaction_date < next_month,
-        FinancialTransaction.transaction_type == 'expense',
-        FinancialTransaction.status == 'approved'
-    ).group_by(FinancialTransaction.category).all()
-    
     return render_template('financial/dashboard_tailwind.html',
                          title='Quản lý tài chính',
-                         monthly_income=monthly_income,
-                         monthly_expense=monthly_expense,
-                         net_income=net_income,
-                         total_assets=total_assets,
-                         distributed_assets=distributed_assets,
-                         available_assets=available_assets,
-                         donation_expense=donation_expense,
                          recent_transactions=recent_transactions,
                          recent_donations=recent_donations,
-                         income_stats=income_stats,
-                         expense_stats=expense_stats)
+                         **kpis)
 
 @bp.route('/transactions')
 @login_required
 @admin_required
 def transactions():
     """List all financial transactions"""
-    page = request.args.get('page', 1, type=int)
-    
-    # Build query
-    query = FinancialTransaction.query
-    
-    # Apply filters
-    if request.args.get('start_date'):
-        start_date = datetime.strptime(request.args.get('start_date'), '%Y-%m-%d').date()
-        query = query.filter(FinancialTransaction.transaction_date >= start_date)
-    
-    if request.args.get('end_date'):
-        end_date = datetime.strptime(request.args.get('end_date'), '%Y-%m-%d').date()
-        query = query.filter(FinancialTransaction.transaction_date <= end_date)
-    
-    if request.args.get('transaction_type'):
-        query = query.filter(FinancialTransaction.transaction_type == request.args.get('transaction_type'))
-    
-    if request.args.get('category'):
-        query = query.filter(FinancialTransaction.category == request.args.get('category'))
-    
-    # Search
+    from app.utils.keyset import paginate_view
+    from app.utils.list_queries import transactions_query
+
+    query, sort_column = transactions_query(request.args)
     search = request.args.get('search', '')
-    if search:
-        query = query.filter(or_(
-            FinancialTransaction.title.contains(search),
-            FinancialTransaction.description.contains(search),
-            FinancialTransaction.vendor_payer.contains(search)
-        ))
-    
-    transactions = query.order_by(FinancialTransaction.transaction_date.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    transactions = paginate_view(query, sort_column, request.args)
     
     return render_template('financial/transactions_tailwind.html',
                          title='Quản lý thu chi',
@@ -199,30 +112,12 @@ def create_transaction():
 @admin_required
 def donations():
     """List all donation assets"""
-    page = request.args.get('page', 1, type=int)
-
-    # Build query
-    query = DonationAsset.query
+    from app.utils.keyset import paginate_view
+    from app.utils.list_queries import donations_query
 
-    # Apply filters
-    if request.args.get('status'):
-        query = query.filter(DonationAsset.status == request.args.get('status'))
-
-    if request.args.get('category'):
-        query = query.filter(DonationAsset.category == request.args.get('category'))
-
-    # Search
+    query, sort_column = donations_query(request.args)
     search = request.args.get('search', '')
-    if search:
-        query = query.filter(or_(
-            DonationAsset.asset_name.contains(search),
-            DonationAsset.description.contains(search),
-            DonationAsset.donor_name.contains(search)
-        ))
-
-    donations = query.order_by(DonationAsset.donation_date.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    donations = paginate_view(query, sort_column, request.args)
 
     return render_template('financial/donations_tailwind.html',
                          title='Quản lý tài sản quyên góp',
@@ -368,6 +263,34 @@ def delete_transaction(id):
         db.session.rollback()
         return jsonify({'success': False, 'message': f'Có lỗi xảy ra: {str(e)}'})
 
+@bp.route('/transactions/bulk-review', methods=['POST'])
+@login_required
+@admin_required
+def bulk_review_transactions():
+    """Approve or reject pending transactions by ids or by the list filters"""
+    return _bulk_review('transaction')
+
+@bp.route('/donation-records/bulk-review', methods=['POST'])
+@login_required
+@admin_required
+def bulk_review_donation_records():
+    """Complete or cancel pending donation records by ids or by the list filters"""
+    return _bulk_review('donation_record')
+
+def _bulk_review(kind):
+    from app.utils.approvals import ApprovalError, bulk_review, review_request
+
+    try:
+        decision, ids, filters, notes = review_request(request.get_json(silent=True))
+        summary = bulk_review(kind, decision, current_user.id, ids=ids, filters=filters, notes=notes)
+        status_text = 'duyệt' if decision == 'approved' else 'từ chối'
+        return jsonify({'success': True, 'message': f'Đã {status_text} {summary["updated"]} mục', **summary})
+    except ApprovalError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'Có lỗi xảy ra: {str(e)}'})
+
 @bp.route('/reports')
 @login_required
 @admin_required
@@ -383,36 +306,79 @@ def reports():
     return render_template('financial/reports_tailwind.html',
                          title='Báo cáo tài chính', form=form)
 
+@bp.route('/ledger/summary')
+@login_required
+@admin_required
+def ledger_summary():
+    """Cash flow across all money sources from the unified ledger (JSON)"""
+    from app.utils.ledger import cash_flow, totals
+
+    try:
+        today = date.today()
+        start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date() \
+            if request.args.get('start_date') else today.replace(day=1)
+        end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date() \
+            if request.args.get('end_date') else today
+        group_by = [name for name in request.args.get('group_by', 'period,entry_type').split(',') if name]
+        class_id = request.args.get('class_id', type=int)
+        class_ids = [class_id] if class_id else None
+
+        return jsonify({
+            'success': True,
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'totals': totals(start_date, end_date, class_ids=class_ids),
+            'rows': cash_flow(start_date, end_date, group_by=group_by, class_ids=class_ids),
+        })
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@bp.route('/payroll')
+@login_required
+@admin_required
+def payroll():
+    """Teacher workload and pay per month from sessions with attendance taken"""
+    from app.utils import payroll as payroll_engine
+
+    current_month = date.today().strftime('%Y-%m')
+    first = request.args.get('from') or current_month
+    last = request.args.get('to') or first
+    teacher_id = request.args.get('teacher_id', type=int)
+    try:
+        report = payroll_engine.report(first, last, teacher_id=teacher_id)
+    except ValueError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('financial.payroll'))
+
+    if request.args.get('format') == 'excel':
+        from app.utils.excel_export import create_streaming_excel_response
+        headers = ['Giáo viên', 'Tháng', 'Loại buổi', 'Số buổi', 'Số giờ', 'Đơn giá/giờ (VNĐ)', 'Thành tiền (VNĐ)']
+        label = first if first == last else f'{first}_{last}'
+        return create_streaming_excel_response(headers, payroll_engine.excel_rows(report), f'bang_luong_{label}.xlsx',
+                                               'Bảng lương', column_widths=[28, 10, 14, 10, 10, 18, 18])
+
+    from app.utils import reference_data
+    return render_template('financial/payroll_tailwind.html',
+                         title='Khối lượng giảng dạy và lương',
+                         report=report,
+                         first=first,
+                         last=last,
+                         teacher_id=teacher_id,
+                         teachers=reference_data.teachers(),
+                         rates=payroll_engine.rates(),
+                         session_names=payroll_engine.SESSION_NAMES)
+
 @bp.route('/donation-records')
 @login_required
 @admin_required
 def donation_records():
     """List all donation records"""
-    page = request.args.get('page', 1, type=int)
-
-    # Build query
-    query = DonationRecord.query
-
-    # Apply filters
-    if request.args.get('record_type'):
-        query = query.filter(DonationRecord.record_type == request.args.get('record_type'))
-
-    if request.args.get('category'):
-        query = query.filter(DonationRecord.category == request.args.get('category'))
+    from app.utils.keyset import paginate_view
+    from app.utils.list_queries import donation_records_query
 
-    # Search
+    query, sort_column = donation_records_query(request.args)
     search = request.args.get('search', '')
-    if search:
-        query = query.filter(or_(
-            DonationRecord.title.contains(search),
-            DonationRecord.description.contains(search),
-            DonationRecord.donor_name.contains(search),
-            DonationRecord.recipient_name.contains(search)
-        ))
-
-    records = query.order_by(DonationRecord.transaction_date.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    records = paginate_view(query, sort_column, request.args)
 
     return render_template('financial/donation_records_tailwind.html',
                          title='Bản ghi quyên góp',
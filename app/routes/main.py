@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, redirect, url_for, jsonify
+from flask import Blueprint, render_template, redirect, url_for, jsonify, request, current_app, Response, abort
 from flask_login import login_required, current_user
 from app.models.user import User
 from app.models.class_model import Class
@@ -22,6 +22,7 @@ def index():
 @login_required
 def dashboard():
     from datetime import datetime, date
+    from sqlalchemy.orm import joinedload
 
     # Redirect user role to their specific dashboard
     if current_user.is_user():
@@ -40,7 +41,7 @@ def dashboard():
         # Get today's schedules for admin
         today = datetime.now()
         day_of_week = today.weekday() + 1  # Monday = 1
-        today_schedules = Schedule.query.filter_by(
+        today_schedules = Schedule.query.options(joinedload(Schedule.class_obj)).filter_by(
             day_of_week=day_of_week,
             is_active=True
         ).order_by(Schedule.session, Schedule.start_time).all()
@@ -56,7 +57,7 @@ def dashboard():
         today = datetime.now()
         day_of_week = today.weekday() + 1  # Monday = 1
         managed_class_ids = [c.id for c in managed_classes]
-        today_schedules = Schedule.query.filter(
+        today_schedules = Schedule.query.options(joinedload(Schedule.class_obj)).filter(
             Schedule.class_id.in_(managed_class_ids),
             Schedule.day_of_week == day_of_week,
             Schedule.is_active == True
@@ -74,7 +75,7 @@ def dashboard():
         # Get today's schedules for teacher
         today = datetime.now()
         day_of_week = today.weekday() + 1  # Monday = 1
-        today_schedules = Schedule.query.filter_by(
+        today_schedules = Schedule.query.options(joinedload(Schedule.class_obj)).filter_by(
             teacher_id=current_user.id,
             day_of_week=day_of_week,
             is_active=True
@@ -105,3 +106,22 @@ def health_check():
             'message': 'Database connection failed',
             'error': str(e)
         }), 500
+
+@bp.route('/metrics')
+def metrics():
+    """Prometheus metrics; requires METRICS_TOKEN as a bearer token or an admin login"""
+    import hmac
+    from app.utils.metrics import render_prometheus, queue_depths
+
+    token = current_app.config.get('METRICS_TOKEN')
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    authorized = bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+    if not authorized and not (current_user.is_authenticated and current_user.is_admin()):
+        abort(403)
+
+    try:
+        depths = queue_depths()
+    except Exception:
+        db.session.rollback()
+        depths = None
+    return Response(render_prometheus(depths), mimetype='text/plain; version=0.0.4')
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, abort, current_app
 from flask_login import login_required, current_user
 import random
 import string
@@ -11,13 +11,14 @@ from app.models.attendance import Attendance
 from app.models.event import Event
 from app.models.finance import Finance
 from app.models.time_slot import TimeSlot
-from datetime import time, datetime
+from datetime import time, datetime, timedelta
 import json
 from app.forms.class_forms import ClassForm, StudentForm
 from app.forms.schedule_forms import ScheduleForm
 from app.forms.event_forms import EventForm
 from app.forms.finance_forms import FinanceForm
 from app.forms.time_slot_forms import TimeSlotForm
+from app.utils import reference_data
 
 bp = Blueprint('manager', __name__)
 
@@ -101,15 +102,13 @@ def class_details(class_id):
 @login_required
 @manager_required
 def students():
-    page = request.args.get('page', 1, type=int)
-    if current_user.is_admin():
-        students = Student.query.filter_by(is_active=True).paginate(
-            page=page, per_page=20, error_out=False)
-    else:
-        # Show all active students for manager (including those without class)
-        # Manager can assign students to their classes later
-        students = Student.query.filter_by(is_active=True).paginate(
-            page=page, per_page=20, error_out=False)
+    from app.utils.keyset import paginate_view
+    from app.utils.list_queries import students_query
+
+    # Show all active students for manager too (including those without class)
+    # Manager can assign students to their classes later
+    query, sort_column = students_query(request.args)
+    students = paginate_view(query, sort_column, request.args, descending=False)
 
     # Get unique class names for filter
     class_names = []
@@ -170,12 +169,8 @@ def edit_student(student_id):
     form = EditStudentForm()
 
     # Filter classes based on user role
-    if current_user.is_admin():
-        classes = Class.query.filter_by(is_active=True).all()
-        form.class_id.choices = [(0, 'Chọn lớp học')] + [(c.id, c.name) for c in classes]
-    else:
-        managed_classes = Class.query.filter_by(manager_id=current_user.id, is_active=True).all()
-        form.class_id.choices = [(0, 'Chọn lớp học')] + [(c.id, c.name) for c in managed_classes]
+    manager_id = None if current_user.is_admin() else current_user.id
+    form.class_id.choices = [(0, 'Chọn lớp học')] + reference_data.class_choices(manager_id)
 
     if form.validate_on_submit():
         # Check for duplicate student code (excluding current student)
@@ -271,31 +266,36 @@ def delete_student(student_id):
 @login_required
 @manager_required
 def schedule():
+    from sqlalchemy.orm import joinedload
+    from app.utils import calendar_dim
+
+    week = request.args.get('week') or calendar_dim.current_week_key()
+    try:
+        calendar_dim.parse_week_key(week)
+    except ValueError:
+        week = calendar_dim.current_week_key()
+
+    # Schedules of the selected week only, for the classes the user manages
+    query = Schedule.query.options(
+        joinedload(Schedule.class_obj),
+        joinedload(Schedule.teacher)
+    ).filter(Schedule.week_number == week, Schedule.is_active == True)
     if current_user.is_admin():
-        schedules = Schedule.query.filter_by(is_active=True).all()
-        classes = Class.query.filter_by(is_active=True).all()
+        classes = reference_data.classes()
     else:
-        managed_class_ids = [c.id for c in Class.query.filter_by(manager_id=current_user.id, is_active=True)]
-        schedules = Schedule.query.filter(Schedule.class_id.in_(managed_class_ids),
-                                        Schedule.is_active==True).all()
-        classes = Class.query.filter_by(manager_id=current_user.id, is_active=True).all()
+        classes = reference_data.classes(current_user.id)
+        query = query.filter(Schedule.class_id.in_([c.id for c in classes]))
+    schedules = query.order_by(Schedule.day_of_week, Schedule.start_time).all()
 
-    # Group schedules by day and session for table display
-    schedule_table = {}
-    for schedule in schedules:
-        if schedule.day_of_week not in schedule_table:
-            schedule_table[schedule.day_of_week] = {}
-        if schedule.session not in schedule_table[schedule.day_of_week]:
-            schedule_table[schedule.day_of_week][schedule.session] = []
-        schedule_table[schedule.day_of_week][schedule.session].append(schedule)
-
-    # Get additional data for the new template
-    schedules = Schedule.query.filter_by(is_active=True).all()
-    teachers = User.query.filter_by(role='teacher', is_active=True).all()
-    time_slots = TimeSlot.query.filter_by(is_active=True).all()
+    teachers = reference_data.teachers()
+    time_slots = reference_data.time_slots()
 
     return render_template('manager/schedule_tailwind.html', title='Lịch dạy',
-                         schedules=schedules, classes=classes, teachers=teachers, time_slots=time_slots)
+                         schedules=schedules, classes=classes, teachers=teachers, time_slots=time_slots,
+                         week=week,
+                         week_label=calendar_dim.week_label(week, week == calendar_dim.current_week_key()),
+                         prev_week=calendar_dim.shift_week(week, -1),
+                         next_week=calendar_dim.shift_week(week, 1))
 
 @bp.route('/schedule/create', methods=['GET', 'POST'])
 @login_required
@@ -308,8 +308,7 @@ def create_schedule():
 
     # Filter classes based on user role
     if not current_user.is_admin():
-        managed_classes = Class.query.filter_by(manager_id=current_user.id, is_active=True).all()
-        form.class_id.choices = [(c.id, c.name) for c in managed_classes]
+        form.class_id.choices = reference_data.class_choices(current_user.id)
 
     if form.validate_on_submit():
         try:
@@ -355,6 +354,13 @@ def create_schedule():
                 flash('Lớp học đã có lịch dạy trùng thời gian này trong tuần được chọn', 'error')
                 return render_template('manager/schedule_form_tailwind.html', form=form, title='Tạo lịch dạy')
 
+            # Check for room conflicts in the same week
+            from app.utils.rooms import room_conflict
+            if room_conflict(form.room.data, form.week_number.data, form.day_of_week.data,
+                             form.start_time.data, form.end_time.data):
+                flash('Phòng học đã có lớp khác sử dụng trùng thời gian này trong tuần được chọn', 'error')
+                return render_template('manager/schedule_form_tailwind.html', form=form, title='Tạo lịch dạy')
+
             # Create new schedule
             current_week = Schedule.get_current_week()
             schedule = Schedule(
@@ -472,9 +478,17 @@ def copy_schedule():
             if existing_count > 0:
                 flash(f'Tuần đích đã có {existing_count} lịch dạy. Bạn có muốn tiếp tục sao chép không?', 'warning')
 
-            # Copy schedules
+            # Copy schedules, tagged with a batch so the copy can be reverted at once
+            from app.models.schedule_batch import ScheduleBatch
+            from app.utils import calendar_exceptions
+            calendars = calendar_exceptions.load([source_week, target_week])
             copied_count = 0
+            closed_count = 0
             current_week = Schedule.get_current_week()
+            batch = ScheduleBatch(kind='copy', week_number=source_week, status='published',
+                                  created_by=current_user.id, published_at=datetime.utcnow())
+            db.session.add(batch)
+            db.session.flush()
 
             for source_schedule in source_schedules:
                 # Check permissions for each schedule
@@ -482,6 +496,13 @@ def copy_schedule():
                     if source_schedule.class_obj.manager_id != current_user.id:
                         continue  # Skip schedules user doesn't manage
 
+                # Make-up sessions are one-offs; closed target days get no session
+                if source_schedule.id in calendars[source_week].makeups:
+                    continue
+                if calendars[target_week].closed_on(source_schedule.day_of_week, source_schedule.class_id):
+                    closed_count += 1
+                    continue
+
                 # Create new schedule
                 new_schedule = Schedule(
                     class_id=source_schedule.class_id,
@@ -492,8 +513,10 @@ def copy_schedule():
                     end_time=source_schedule.end_time,
                     subject=source_schedule.subject,
                     room=source_schedule.room,
+                    room_id=source_schedule.room_id,
                     week_number=target_week,
                     week_created=current_week,
+                    batch_id=batch.id,
                     is_active=True,
                     created_at=datetime.utcnow()
                 )
@@ -517,10 +540,15 @@ def copy_schedule():
 
                 copied_count += 1
 
+            batch.summary = json.dumps({'source_week': source_week, 'target_weeks': [target_week],
+                                        'created': copied_count, 'skipped': closed_count}, ensure_ascii=False)
             db.session.commit()
 
             if copied_count > 0:
-                flash(f'Đã sao chép {copied_count} lịch dạy từ {source_week} sang {target_week}', 'success')
+                message = f'Đã sao chép {copied_count} lịch dạy từ {source_week} sang {target_week}'
+                if closed_count:
+                    message += f' (bỏ qua {closed_count} buổi rơi vào ngày nghỉ)'
+                flash(message, 'success')
             else:
                 flash('Không có lịch dạy nào được sao chép (có thể do quyền hạn)', 'warning')
 
@@ -532,6 +560,78 @@ def copy_schedule():
 
     return render_template('manager/copy_schedule_new_tailwind.html', form=form, title='Sao chép lịch dạy')
 
+@bp.route('/schedule/rollout', methods=['GET', 'POST'])
+@login_required
+@manager_required
+def rollout_schedule():
+    """Copy a week to a range or list of weeks in one transaction; list batches to revert"""
+    from app.forms.schedule_forms import RolloutScheduleForm
+    from app.models.schedule_batch import ScheduleBatch
+    from app.utils import rollout
+
+    form = RolloutScheduleForm()
+    if not current_user.is_admin():
+        form.class_id.choices = [(0, 'Tất cả lớp của tôi')] + reference_data.class_choices(current_user.id)
+
+    if form.validate_on_submit():
+        try:
+            if form.target_weeks.data:
+                weeks = rollout.parse_week_list(form.target_weeks.data)
+            else:
+                weeks = rollout.target_weeks(form.first_week.data, form.week_count.data, form.every.data)
+
+            if form.class_id.data:
+                class_ids = [form.class_id.data]
+            elif current_user.is_admin():
+                class_ids = None
+            else:
+                class_ids = [row.id for row in reference_data.classes(current_user.id)]
+            if class_ids is not None and not current_user.is_admin():
+                managed = {row.id for row in reference_data.classes(current_user.id)}
+                if not set(class_ids) <= managed:
+                    flash('Bạn không có quyền áp dụng lịch của lớp này', 'error')
+                    return redirect(url_for('manager.rollout_schedule'))
+
+            batch = rollout.rollout(form.source_week.data, weeks, current_user.id,
+                                    class_ids=class_ids, skip_holidays=form.skip_holidays.data)
+            stats = batch.summary_data
+            message = f"Đã tạo {stats['created']} lịch dạy cho {len(stats['target_weeks'])} tuần"
+            if stats['skipped']:
+                message += f" (bỏ qua {stats['skipped']} buổi trùng lịch hoặc ngày lễ)"
+            flash(message, 'success')
+            return redirect(url_for('manager.rollout_schedule'))
+        except ValueError as e:  # RolloutError or a bad week key
+            db.session.rollback()
+            flash(str(e), 'error')
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Có lỗi xảy ra: {str(e)}', 'error')
+
+    batches = ScheduleBatch.query.filter(ScheduleBatch.status.in_(['published', 'reverted']))
+    if not current_user.is_admin():
+        batches = batches.filter_by(created_by=current_user.id)
+    batches = batches.order_by(ScheduleBatch.created_at.desc()).limit(30).all()
+    return render_template('manager/rollout_schedule_tailwind.html', form=form, batches=batches,
+                         title='Áp dụng lịch nhiều tuần')
+
+@bp.route('/schedule/batch/<int:batch_id>/revert', methods=['POST'])
+@login_required
+@manager_required
+def revert_schedule_batch(batch_id):
+    """Remove every schedule (and enrollment) created by a rollout, copy or published timetable"""
+    from app.utils.rollout import RolloutError, revert
+
+    batch = _own_batch_or_403(batch_id)
+    try:
+        deleted, unenrolled = revert(batch)
+        return jsonify({'success': True, 'message': f'Đã hoàn tác {deleted} lịch dạy ({unenrolled} lượt đăng ký)'})
+    except RolloutError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'Có lỗi xảy ra: {str(e)}'})
+
 @bp.route('/schedule/<int:schedule_id>/add_students', methods=['GET', 'POST'])
 @login_required
 @manager_required
@@ -766,8 +866,7 @@ def edit_class(class_id):
 
     # Filter managers based on user role
     if current_user.is_admin():
-        managers = User.query.filter_by(role='manager', is_active=True).all()
-        form.manager_id.choices = [(0, 'Chọn quản sinh')] + [(m.id, m.full_name) for m in managers]
+        form.manager_id.choices = [(0, 'Chọn quản sinh')] + reference_data.person_choices(reference_data.managers())
     else:
         # Manager can only assign themselves
         form.manager_id.choices = [(current_user.id, current_user.full_name)]
@@ -833,8 +932,12 @@ def delete_class(class_id):
         # Remove students from this class
         Student.query.filter_by(class_id=class_id, is_active=True).update({'class_id': None})
 
-        # Deactivate all schedules for this class
+        # Deactivate all schedules for this class (a bulk update: refresh availability by hand)
+        from app.utils.availability import rebuild
+        freed = db.session.query(Schedule.teacher_id, Schedule.week_number).filter_by(
+            class_id=class_id, is_active=True).distinct().all()
         Schedule.query.filter_by(class_id=class_id, is_active=True).update({'is_active': False})
+        rebuild(db.session.connection(), freed)
 
         # Deactivate all student enrollments for schedules in this class
         from app.models.student_schedule import StudentSchedule
@@ -963,8 +1066,12 @@ def attendance():
 
     managed_class_ids = [c.id for c in managed_classes]
 
-    # Build attendance query
-    attendance_query = Attendance.query.join(Schedule).join(Student).filter(
+    # Build attendance query; the joined schedule and student fill the relationships the report reads
+    from sqlalchemy.orm import contains_eager, joinedload
+    attendance_query = Attendance.query.join(Schedule).join(Student).options(
+        contains_eager(Attendance.schedule).joinedload(Schedule.class_obj),
+        contains_eager(Attendance.student)
+    ).filter(
         Attendance.date == filter_date,
         Schedule.class_id.in_(managed_class_ids),
         Student.is_active == True
@@ -1068,29 +1175,420 @@ def time_slots():
 @login_required
 @manager_required
 def schedule_assignments():
-    # Get all schedule assignments
-    assignments = Schedule.query.filter_by(is_active=True).all()
+    from sqlalchemy.orm import joinedload
+    from app.utils import calendar_dim, schedule_stats
 
-    # Get statistics
-    active_teachers = User.query.filter_by(role='teacher', is_active=True).count()
-    assigned_classes = len(set(assignment.class_id for assignment in assignments))
-    used_time_slots = len(set((assignment.start_time, assignment.end_time) for assignment in assignments))
+    week = request.args.get('week') or calendar_dim.current_week_key()
+    try:
+        calendar_dim.parse_week_key(week)
+    except ValueError:
+        week = calendar_dim.current_week_key()
+
+    # Assignments of the selected week only
+    assignments = Schedule.query.options(
+        joinedload(Schedule.class_obj),
+        joinedload(Schedule.teacher)
+    ).filter_by(week_number=week, is_active=True).order_by(Schedule.day_of_week, Schedule.start_time).all()
 
     # Get data for dropdowns
-    teachers = User.query.filter_by(role='teacher', is_active=True).all()
-    classes = Class.query.filter_by(is_active=True).all()
-    time_slots = TimeSlot.query.filter_by(is_active=True).all()
+    teachers = reference_data.teachers()
+    classes = reference_data.classes()
+    time_slots = reference_data.time_slots()
+
+    # Get statistics
+    stats = schedule_stats.totals([week])
 
     return render_template('manager/schedule_assignment_tailwind.html',
                          title='Phân công lịch dạy',
                          assignments=assignments,
-                         active_teachers=active_teachers,
-                         assigned_classes=assigned_classes,
-                         used_time_slots=used_time_slots,
+                         total_assignments=stats['sessions'],
+                         active_teachers=len(teachers),
+                         assigned_classes=stats['classes'],
+                         used_time_slots=stats['slots'],
+                         week=week,
+                         week_label=calendar_dim.week_label(week, week == calendar_dim.current_week_key()),
+                         prev_week=calendar_dim.shift_week(week, -1),
+                         next_week=calendar_dim.shift_week(week, 1),
                          teachers=teachers,
                          classes=classes,
                          time_slots=time_slots)
 
+@bp.route('/schedule/stats')
+@login_required
+@manager_required
+def schedule_stats():
+    """Schedule aggregates for ?week=YYYY-Www (default: current) or ?term=2025-2026-hk1, optional class_id"""
+    from app.utils import schedule_stats as stats
+    from app.utils.archive import ArchiveError
+
+    try:
+        weeks = stats.weeks_for(request.args.get('week'), request.args.get('term'))
+    except (ArchiveError, ValueError) as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    class_ids = None
+    class_id = request.args.get('class_id', type=int)
+    if not current_user.is_admin():
+        class_ids = [row.id for row in reference_data.classes(current_user.id)]
+        if class_id and class_id not in class_ids:
+            return jsonify({'success': False, 'message': 'Bạn không có quyền xem lớp này'}), 403
+    if class_id:
+        class_ids = [class_id]
+
+    return jsonify({'success': True, **stats.overview(weeks, class_ids)})
+
+@bp.route('/schedule/substitutes')
+@login_required
+@manager_required
+def find_substitutes():
+    """Free teachers for a schedule (?schedule_id=) or a slot (?date= or ?week=&day_of_week=, start_time, end_time)"""
+    from app.utils import availability, calendar_dim
+
+    schedule_id = request.args.get('schedule_id', type=int)
+    try:
+        if schedule_id:
+            schedule = Schedule.query.get_or_404(schedule_id)
+            if not current_user.is_admin() and schedule.class_obj.manager_id != current_user.id:
+                return jsonify({'success': False, 'message': 'Bạn không có quyền xem lịch này'}), 403
+            week, day_of_week = schedule.week_number, schedule.day_of_week
+            start_time, end_time = schedule.start_time, schedule.end_time
+            class_id, exclude = schedule.class_id, [schedule.teacher_id]
+        else:
+            if request.args.get('date'):
+                day = datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+                week, day_of_week = calendar_dim.week_key(day), day.isoweekday()
+            else:
+                week = request.args.get('week', '')
+                day_of_week = request.args.get('day_of_week', type=int)
+                calendar_dim.parse_week_key(week)
+                if day_of_week not in range(1, 8):
+                    raise ValueError('Ngày trong tuần không hợp lệ')
+            start_time = datetime.strptime(request.args.get('start_time', ''), '%H:%M').time()
+            end_time = datetime.strptime(request.args.get('end_time', ''), '%H:%M').time()
+            class_id = request.args.get('class_id', type=int)
+            exclude = request.args.getlist('exclude', type=int)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Thời gian không hợp lệ (date=YYYY-MM-DD hoặc week=YYYY-Www, start_time/end_time=HH:MM)'}), 400
+
+    teachers = availability.free_teachers(week, day_of_week, start_time, end_time,
+                                          class_id=class_id, exclude=exclude)
+    return jsonify({
+        'success': True,
+        'week_number': week,
+        'day_of_week': day_of_week,
+        'start_time': start_time.strftime('%H:%M'),
+        'end_time': end_time.strftime('%H:%M'),
+        'teachers': teachers,
+    })
+
+@bp.route('/rooms')
+@login_required
+@manager_required
+def rooms():
+    """Room utilization report (booked hours over opening hours), current term by default"""
+    from app.utils import calendar_dim
+    from app.utils.rooms import utilization
+
+    start, end = calendar_dim.term_bounds(datetime.now().date())
+    try:
+        if request.args.get('start'):
+            start = datetime.strptime(request.args['start'], '%Y-%m-%d').date()
+        if request.args.get('end'):
+            end = datetime.strptime(request.args['end'], '%Y-%m-%d').date()
+    except ValueError:
+        flash('Ngày không hợp lệ', 'error')
+
+    report = utilization(start, end)
+    return render_template('manager/rooms_tailwind.html',
+                         title='Phòng học',
+                         report=report,
+                         start=start,
+                         end=end)
+
+@bp.route('/rooms/free')
+@login_required
+@manager_required
+def free_rooms():
+    """Free rooms for a slot: ?date= or ?week=&day_of_week=, start_time, end_time, optional min_capacity"""
+    from app.utils import calendar_dim
+    from app.utils.rooms import free_rooms as find_free_rooms
+
+    try:
+        if request.args.get('date'):
+            day = datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+            week, day_of_week = calendar_dim.week_key(day), day.isoweekday()
+        else:
+            week = request.args.get('week', '')
+            day_of_week = request.args.get('day_of_week', type=int)
+            calendar_dim.parse_week_key(week)
+            if day_of_week not in range(1, 8):
+                raise ValueError('Ngày trong tuần không hợp lệ')
+        start_time = datetime.strptime(request.args.get('start_time', ''), '%H:%M').time()
+        end_time = datetime.strptime(request.args.get('end_time', ''), '%H:%M').time()
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Thời gian không hợp lệ (date=YYYY-MM-DD hoặc week=YYYY-Www, start_time/end_time=HH:MM)'}), 400
+
+    rooms = find_free_rooms(week, day_of_week, start_time, end_time,
+                            min_capacity=request.args.get('min_capacity', type=int))
+    return jsonify({
+        'success': True,
+        'week_number': week,
+        'day_of_week': day_of_week,
+        'rooms': [{'id': room.id, 'name': room.name, 'capacity': room.capacity} for room in rooms],
+    })
+
+@bp.route('/calendar-exceptions', methods=['GET', 'POST'])
+@login_required
+@manager_required
+def calendar_exceptions():
+    """Closures and holiday openings (center-wide for admins, per class), make-up sessions"""
+    from app.forms.schedule_forms import CalendarExceptionForm, MakeupSessionForm
+    from app.models.calendar_exception import CalendarException
+    from app.utils import calendar_dim
+
+    form = CalendarExceptionForm()
+    makeup_form = MakeupSessionForm(prefix='makeup')
+    if not current_user.is_admin():
+        form.class_id.choices = reference_data.class_choices(current_user.id)
+        makeup_form.class_id.choices = reference_data.class_choices(current_user.id)
+
+    if form.validate_on_submit():
+        try:
+            if form.end_date.data < form.start_date.data:
+                flash('Ngày kết thúc phải sau ngày bắt đầu', 'error')
+                return redirect(url_for('manager.calendar_exceptions'))
+            class_id = form.class_id.data or None
+            if not current_user.is_admin():
+                class_obj = Class.query.get(class_id) if class_id else None
+                if not class_obj or class_obj.manager_id != current_user.id:
+                    flash('Bạn không có quyền thay đổi lịch nghỉ của lớp này', 'error')
+                    return redirect(url_for('manager.calendar_exceptions'))
+
+            exception = CalendarException(kind=form.kind.data, start_date=form.start_date.data,
+                                          end_date=form.end_date.data, class_id=class_id,
+                                          reason=form.reason.data or None, created_by=current_user.id)
+            db.session.add(exception)
+            db.session.commit()
+            flash('Đã cập nhật lịch nghỉ', 'success')
+            return redirect(url_for('manager.calendar_exceptions'))
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Có lỗi xảy ra: {str(e)}', 'error')
+
+    today = datetime.now().date()
+    query = CalendarException.query.filter(CalendarException.end_date >= today - timedelta(days=30))
+    if not current_user.is_admin():
+        managed_class_ids = [row.id for row in reference_data.classes(current_user.id)]
+        query = query.filter(db.or_(CalendarException.class_id.is_(None),
+                                    CalendarException.class_id.in_(managed_class_ids)))
+    exceptions = query.order_by(CalendarException.start_date, CalendarException.id).all()
+
+    return render_template('manager/calendar_exceptions_tailwind.html',
+                         title='Lịch nghỉ và học bù',
+                         form=form,
+                         makeup_form=makeup_form,
+                         exceptions=exceptions,
+                         holidays=calendar_dim.holidays_between(today, today + timedelta(days=365)))
+
+@bp.route('/calendar-exceptions/makeup', methods=['POST'])
+@login_required
+@manager_required
+def create_makeup_session():
+    """Extra session for a class (on any day, closures included), with the class enrolled"""
+    from app.forms.schedule_forms import MakeupSessionForm
+    from app.utils import calendar_exceptions as exception_calendar
+    from app.utils.rooms import room_conflict
+
+    form = MakeupSessionForm(prefix='makeup')
+    if not current_user.is_admin():
+        form.class_id.choices = reference_data.class_choices(current_user.id)
+
+    if not form.validate_on_submit():
+        flash('Thông tin buổi học bù không hợp lệ', 'error')
+        return redirect(url_for('manager.calendar_exceptions'))
+
+    try:
+        if form.start_time.data >= form.end_time.data:
+            flash('Thời gian bắt đầu phải nhỏ hơn thời gian kết thúc', 'error')
+            return redirect(url_for('manager.calendar_exceptions'))
+
+        day = form.date.data
+        week_number = Schedule.get_week_from_date(day)
+        conflict = Schedule.query.filter(
+            Schedule.week_number == week_number,
+            Schedule.day_of_week == day.isoweekday(),
+            Schedule.is_active == True,
+            Schedule.start_time < form.end_time.data,
+            Schedule.end_time > form.start_time.data,
+            db.or_(Schedule.teacher_id == form.teacher_id.data, Schedule.class_id == form.class_id.data)
+        ).first()
+        if conflict:
+            flash('Giáo viên hoặc lớp học đã có lịch dạy trùng thời gian này', 'error')
+            return redirect(url_for('manager.calendar_exceptions'))
+        if room_conflict(form.room.data, week_number, day.isoweekday(), form.start_time.data, form.end_time.data):
+            flash('Phòng học đã có lớp khác sử dụng trùng thời gian này', 'error')
+            return redirect(url_for('manager.calendar_exceptions'))
+
+        exception_calendar.add_makeup(form.class_id.data, form.teacher_id.data, day, form.start_time.data,
+                                      form.end_time.data, current_user.id, room=form.room.data,
+                                      replaces_date=form.replaces_date.data, reason=form.reason.data or None)
+        db.session.commit()
+        flash(f'Đã tạo buổi học bù ngày {day.strftime("%d/%m/%Y")}', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Có lỗi xảy ra: {str(e)}', 'error')
+    return redirect(url_for('manager.calendar_exceptions'))
+
+@bp.route('/calendar-exceptions/<int:exception_id>/delete', methods=['POST'])
+@login_required
+@manager_required
+def delete_calendar_exception(exception_id):
+    """Remove a closure/opening; removing a make-up also cancels its session"""
+    from app.models.calendar_exception import CalendarException
+    from app.models.student_schedule import StudentSchedule
+
+    exception = CalendarException.query.get_or_404(exception_id)
+    if not current_user.is_admin():
+        if exception.class_id is None or exception.class_obj.manager_id != current_user.id:
+            return jsonify({'success': False, 'message': 'Bạn không có quyền xóa mục này'}), 403
+
+    try:
+        if exception.kind == 'makeup' and exception.schedule:
+            StudentSchedule.query.filter_by(schedule_id=exception.schedule_id, is_active=True).update({'is_active': False})
+            exception.schedule.is_active = False
+        db.session.delete(exception)
+        db.session.commit()
+        return jsonify({'success': True, 'message': 'Đã xóa'})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'Có lỗi xảy ra: {str(e)}'}), 500
+
+def _own_batch_or_403(batch_id):
+    from app.models.schedule_batch import ScheduleBatch
+
+    batch = ScheduleBatch.query.get_or_404(batch_id)
+    if not current_user.is_admin() and batch.created_by != current_user.id:
+        abort(403)
+    return batch
+
+@bp.route('/timetable')
+@login_required
+@manager_required
+def timetable():
+    """Timetable generator form and recent generated batches"""
+    from app.models.schedule_batch import ScheduleBatch
+    from app.utils import calendar_dim, timetable as generator
+
+    classes = reference_data.classes(None if current_user.is_admin() else current_user.id)
+    batches = ScheduleBatch.query.filter_by(kind='generated')
+    if not current_user.is_admin():
+        batches = batches.filter_by(created_by=current_user.id)
+    batches = batches.order_by(ScheduleBatch.created_at.desc()).limit(20).all()
+
+    return render_template('manager/timetable_tailwind.html',
+                         title='Xếp lịch tự động',
+                         classes=classes,
+                         weeks=calendar_dim.week_choices(0, 8),
+                         day_names=calendar_dim.WEEKDAY_NAMES,
+                         default_days=generator.DEFAULT_DAYS,
+                         default_sessions=generator.DEFAULT_SESSIONS_PER_WEEK,
+                         default_time_limit=generator.DEFAULT_TIME_LIMIT,
+                         weights=generator.weights_from_config(current_app.config),
+                         batches=batches)
+
+@bp.route('/timetable/generate', methods=['POST'])
+@login_required
+@manager_required
+def generate_timetable():
+    """Solve a week for the selected classes and save it as a draft batch"""
+    from app.utils import timetable as generator
+
+    allowed = {row.id for row in reference_data.classes(None if current_user.is_admin() else current_user.id)}
+    try:
+        class_ids = [class_id for class_id in request.form.getlist('class_ids', type=int) if class_id in allowed]
+        default_sessions = request.form.get('sessions_per_week', generator.DEFAULT_SESSIONS_PER_WEEK, type=int)
+        sessions = {class_id: request.form.get(f'sessions_{class_id}', default_sessions, type=int)
+                    for class_id in class_ids}
+        days = [day for day in request.form.getlist('days', type=int) if 1 <= day <= 7] or generator.DEFAULT_DAYS
+        time_limit = min(max(request.form.get('time_limit', generator.DEFAULT_TIME_LIMIT, type=float), 0.5), 30)
+        weights = generator.weights_from_config(current_app.config, {
+            name: request.form.get(f'weight_{name}', type=float) for name in generator.DEFAULT_WEIGHTS})
+
+        batch = generator.generate(request.form.get('week_number', ''), class_ids, sessions, current_user.id,
+                                   days=days, weights=weights, time_limit=time_limit)
+        stats = batch.summary_data
+        flash(f"Đã xếp {stats['placed']}/{stats['sessions']} buổi học trong {stats['total_ms']} ms. "
+              f"Kiểm tra bản nháp trước khi áp dụng.", 'success' if stats['placed'] == stats['sessions'] else 'warning')
+        return redirect(url_for('manager.timetable_batch', batch_id=batch.id))
+    except ValueError as e:  # TimetableError or a bad week key
+        db.session.rollback()
+        flash(str(e), 'error')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Có lỗi xảy ra: {str(e)}', 'error')
+    return redirect(url_for('manager.timetable'))
+
+@bp.route('/timetable/<int:batch_id>')
+@login_required
+@manager_required
+def timetable_batch(batch_id):
+    """Review a generated week before publishing it"""
+    from sqlalchemy.orm import joinedload
+    from app.utils import calendar_dim, timetable as generator
+
+    batch = _own_batch_or_403(batch_id)
+    schedules = batch.schedules.options(joinedload(Schedule.class_obj), joinedload(Schedule.teacher)).order_by(
+        Schedule.day_of_week, Schedule.start_time, Schedule.class_id).all()
+    by_day = {}
+    for schedule in schedules:
+        by_day.setdefault(schedule.day_of_week, []).append(schedule)
+    clashes = generator.conflicts(batch) if batch.status == 'draft' else []
+
+    return render_template('manager/timetable_batch_tailwind.html',
+                         title=f'Lịch tự động tuần {batch.week_number}',
+                         batch=batch,
+                         stats=batch.summary_data,
+                         by_day=by_day,
+                         day_names=calendar_dim.WEEKDAY_NAMES,
+                         week_label=calendar_dim.week_label(batch.week_number),
+                         clashes=clashes)
+
+@bp.route('/timetable/<int:batch_id>/publish', methods=['POST'])
+@login_required
+@manager_required
+def publish_timetable(batch_id):
+    from app.utils.timetable import TimetableError, publish
+
+    batch = _own_batch_or_403(batch_id)
+    try:
+        activated = publish(batch)
+        flash(f'Đã áp dụng {activated} lịch dạy cho tuần {batch.week_number}', 'success')
+    except TimetableError as e:
+        db.session.rollback()
+        flash(str(e), 'error')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Có lỗi xảy ra: {str(e)}', 'error')
+    return redirect(url_for('manager.timetable_batch', batch_id=batch_id))
+
+@bp.route('/timetable/<int:batch_id>/discard', methods=['POST'])
+@login_required
+@manager_required
+def discard_timetable(batch_id):
+    from app.utils.timetable import TimetableError, discard
+
+    batch = _own_batch_or_403(batch_id)
+    try:
+        deleted = discard(batch)
+        flash(f'Đã hủy bản nháp ({deleted} lịch dạy)', 'success')
+    except TimetableError as e:
+        db.session.rollback()
+        flash(str(e), 'error')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Có lỗi xảy ra: {str(e)}', 'error')
+    return redirect(url_for('manager.timetable'))
+
 @bp.route('/schedule/assign', methods=['POST'])
 @login_required
 @manager_required
@@ -1190,12 +1688,7 @@ def edit_assignment(id):
     form = ScheduleForm()
 
     # Filter classes based on user role
-    if current_user.is_admin():
-        classes = Class.query.filter_by(is_active=True).all()
-        form.class_id.choices = [(c.id, c.name) for c in classes]
-    else:
-        managed_classes = Class.query.filter_by(manager_id=current_user.id, is_active=True).all()
-        form.class_id.choices = [(c.id, c.name) for c in managed_classes]
+    form.class_id.choices = reference_data.class_choices(None if current_user.is_admin() else current_user.id)
 
     if request.method == 'GET':
         # Populate form with assignment data
@@ -1241,6 +1734,15 @@ def edit_assignment(id):
                                      form=form,
                                      assignment=assignment)
 
+            from app.utils.rooms import room_conflict
+            if room_conflict(form.room.data, assignment.week_number, form.day_of_week.data,
+                             form.start_time.data, form.end_time.data, exclude_id=assignment.id):
+                flash('Phòng học đã có lớp khác sử dụng trùng thời gian này', 'error')
+                return render_template('manager/edit_assignment_tailwind.html',
+                                     title='Chỉnh sửa phân công',
+                                     form=form,
+                                     assignment=assignment)
+
             # Update assignment data
             assignment.class_id = form.class_id.data
             assignment.teacher_id = form.teacher_id.data
@@ -1517,10 +2019,9 @@ def delete_time_slot(slot_id):
     time_slot = TimeSlot.query.get_or_404(slot_id)
 
     # Check if time slot is being used in schedules
-    schedules_using = Schedule.query.filter_by(is_active=True).all()
-    in_use = any(s.start_time == time_slot.start_time and s.end_time == time_slot.end_time for s in schedules_using)
+    from app.utils.schedule_stats import slot_in_use
 
-    if in_use:
+    if slot_in_use(time_slot.start_time, time_slot.end_time):
         flash('Không thể xóa khung giờ đang được sử dụng trong lịch dạy', 'error')
     else:
         time_slot.is_active = False
@@ -1546,12 +2047,7 @@ def edit_schedule_form(schedule_id):
     form = ScheduleForm()
 
     # Filter classes based on user role
-    if current_user.is_admin():
-        classes = Class.query.filter_by(is_active=True).all()
-        form.class_id.choices = [(c.id, c.name) for c in classes]
-    else:
-        managed_classes = Class.query.filter_by(manager_id=current_user.id, is_active=True).all()
-        form.class_id.choices = [(c.id, c.name) for c in managed_classes]
+    form.class_id.choices = reference_data.class_choices(None if current_user.is_admin() else current_user.id)
 
     # Populate form with schedule data
     form.class_id.data = schedule.class_id
@@ -1691,101 +2187,236 @@ def export_events():
 @login_required
 @manager_required
 def generate_notification():
+    from app.utils.notifications import load_sessions, render_notification
     try:
         notification_date = request.form.get('notification_date')
         class_id = request.form.get('class_id')
         template_type = request.form.get('template_type')
         custom_message = request.form.get('custom_message')
-        include_teacher = request.form.get('include_teacher') == 'on'
-        include_time = request.form.get('include_time') == 'on'
-        include_contact = request.form.get('include_contact') == 'on'
+        options = {
+            'include_teacher': request.form.get('include_teacher') == 'on',
+            'include_time': request.form.get('include_time') == 'on',
+            'include_contact': request.form.get('include_contact') == 'on'
+        }
 
         if not notification_date or not template_type:
             return jsonify({'success': False, 'message': 'Thiếu thông tin bắt buộc'})
 
         # Parse date
-        from datetime import datetime
         try:
-            date_obj = datetime.strptime(notification_date, '%Y-%m-%d')
-            day_of_week = date_obj.weekday() + 1  # Monday = 1, Sunday = 0 -> 7
-            if day_of_week == 7:  # Sunday
-                day_of_week = 0
-            date_str = date_obj.strftime('%d/%m/%Y')
-            day_name = {
-                1: 'Thứ Hai', 2: 'Thứ Ba', 3: 'Thứ Tư', 4: 'Thứ Năm',
-                5: 'Thứ Sáu', 6: 'Thứ Bảy', 0: 'Chủ Nhật'
-            }.get(day_of_week, f'Thứ {day_of_week}')
-
-            # Calculate week number for the selected date
-            year, week_num, _ = date_obj.isocalendar()
-            week_number = f"{year}-W{week_num:02d}"
-
+            date_obj = datetime.strptime(notification_date, '%Y-%m-%d').date()
         except ValueError:
             return jsonify({'success': False, 'message': 'Định dạng ngày không hợp lệ'})
 
         # Get schedules for the specific date and week
-        query = Schedule.query.filter_by(
-            day_of_week=day_of_week,
-            week_number=week_number,
-            is_active=True
-        )
+        class_ids = None
         if class_id:
-            query = query.filter_by(class_id=int(class_id))
-
-        schedules = query.order_by(Schedule.session, Schedule.start_time).all()
-
-        # Generate notification based on template type
-        if template_type == 'custom':
-            notification = custom_message or 'Nội dung thông báo tùy chỉnh'
-
-        elif template_type == 'daily':
-            notification = f"📚 THÔNG BÁO LỊCH HỌC\n"
-            notification += f"📅 Ngày: {day_name}, {date_str}\n\n"
-
-            if schedules:
-                notification += "📋 LỊCH HỌC HÔM NAY:\n"
-                for i, schedule in enumerate(schedules, 1):
-                    notification += f"\n{i}. Lớp: {schedule.class_obj.name}\n"
-                    if include_time:
-                        notification += f"   ⏰ Thời gian: {schedule.start_time.strftime('%H:%M')} - {schedule.end_time.strftime('%H:%M')}\n"
-                    if include_teacher:
-                        notification += f"   👨‍🏫 Giáo viên: {schedule.teacher.full_name}\n"
-                    if schedule.room:
-                        notification += f"   📍 Phòng: {schedule.room}\n"
-                    else:
-                        notification += f"   📍 Buổi: {schedule.session_name}\n"
-            else:
-                notification += "ℹ️ Hôm nay không có lịch học.\n"
+            class_id = request.form.get('class_id', type=int)
+            if class_id is None:
+                return jsonify({'success': False, 'message': 'Lớp học không hợp lệ'}), 400
+            class_ids = [class_id]
+        sessions = load_sessions(date_obj, date_obj, class_ids, per_class=False)
+
+        _, notification = render_notification(template_type, date_obj, sessions.get((date_obj, None), []),
+                                              options, custom_message)
 
-            notification += "\n📞 Mọi thắc mắc xin liên hệ văn phòng."
+        return jsonify({'success': True, 'notification': notification})
 
-        elif template_type == 'reminder':
-            notification = f"💰 THÔNG BÁO HỌC PHÍ\n\n"
-            notification += f"Kính gửi Quý Phụ huynh,\n\n"
-            notification += f"Trung tâm xin thông báo về việc đóng học phí tháng {date_obj.strftime('%m/%Y')}:\n\n"
-            notification += f"📅 Hạn đóng: {date_str}\n"
-            notification += f"💵 Học phí: [Số tiền]\n"
-            notification += f"🏦 Tài khoản: [Số tài khoản]\n"
-            notification += f"📝 Nội dung CK: [Tên học sinh] - Học phí tháng {date_obj.strftime('%m/%Y')}\n\n"
-            notification += f"Quý phụ huynh vui lòng đóng học phí đúng hạn.\n"
-            notification += f"📞 Liên hệ: [Số điện thoại] để được hỗ trợ."
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Có lỗi xảy ra: {str(e)}'})
 
-        else:
-            notification = f"📚 THÔNG BÁO\n\n"
-            notification += f"Nội dung thông báo sẽ được cập nhật.\n"
-            notification += f"📞 Mọi thắc mắc xin liên hệ văn phòng."
-
-        # Add contact info if requested
-        if include_contact:
-            notification += f"\n\n📞 THÔNG TIN LIÊN HỆ:\n"
-            notification += f"📱 Hotline: [Số điện thoại]\n"
-            notification += f"📧 Email: [Email liên hệ]\n"
-            notification += f"🌐 Website: [Website]\n"
-            notification += f"📍 Địa chỉ: [Địa chỉ trung tâm]"
+@bp.route('/notification/bundle', methods=['POST'])
+@login_required
+@manager_required
+def generate_notification_bundle():
+    """Generate notifications for a date range and a set of classes"""
+    from flask import send_file
+    from app.utils.notifications import generate_bundle, bundle_to_zip, MAX_BUNDLE_DAYS
 
-        return jsonify({'success': True, 'notification': notification})
+    try:
+        start_date = datetime.strptime(request.form.get('start_date', ''), '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.form.get('end_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Định dạng ngày không hợp lệ'})
+
+    if end_date < start_date:
+        return jsonify({'success': False, 'message': 'Ngày kết thúc phải sau ngày bắt đầu'})
+    if (end_date - start_date).days >= MAX_BUNDLE_DAYS:
+        return jsonify({'success': False, 'message': f'Chỉ tạo tối đa {MAX_BUNDLE_DAYS} ngày mỗi lần'})
+
+    template_type = request.form.get('template_type', 'daily')
+    output_format = request.form.get('format', 'json')
+    options = {
+        'include_teacher': request.form.get('include_teacher') == 'on',
+        'include_time': request.form.get('include_time') == 'on',
+        'include_contact': request.form.get('include_contact') == 'on'
+    }
+    class_ids = request.form.getlist('class_ids', type=int)
+    if len(class_ids) != len([c for c in request.form.getlist('class_ids') if c]):
+        return jsonify({'success': False, 'message': 'Lớp học không hợp lệ'}), 400
+
+    # Managers only generate notifications for their own classes
+    if not current_user.is_admin():
+        managed_class_ids = [c.id for c in Class.query.filter_by(manager_id=current_user.id, is_active=True)]
+        class_ids = [c for c in class_ids if c in managed_class_ids] if class_ids else managed_class_ids
+        if not class_ids:
+            return jsonify({'success': False, 'message': 'Bạn chưa quản lý lớp học nào'})
+
+    try:
+        messages = generate_bundle(start_date, end_date, class_ids, template_type, options,
+                                   request.form.get('custom_message'))
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Có lỗi xảy ra: {str(e)}'})
+
+    if output_format == 'zip':
+        filename = f'thong_bao_{start_date.strftime("%Y%m%d")}_{end_date.strftime("%Y%m%d")}.zip'
+        return send_file(bundle_to_zip(messages), mimetype='application/zip',
+                         as_attachment=True, download_name=filename)
+
+    return jsonify({'success': True, 'count': len(messages), 'messages': messages})
+
+@bp.route('/notification/send', methods=['POST'])
+@login_required
+@manager_required
+def send_notification():
+    """Queue a notification for the parents of the selected classes"""
+    from app.utils.messaging import build_class_broadcast, enqueue_messages
+
+    body = (request.form.get('notification') or '').strip()
+    if not body:
+        return jsonify({'success': False, 'message': 'Chưa có nội dung thông báo'})
+
+    class_ids = request.form.getlist('class_ids', type=int)
+    if len(class_ids) != len([c for c in request.form.getlist('class_ids') if c]):
+        return jsonify({'success': False, 'message': 'Lớp học không hợp lệ'}), 400
+    if not class_ids and request.form.get('class_id'):
+        class_id = request.form.get('class_id', type=int)
+        if class_id is None:
+            return jsonify({'success': False, 'message': 'Lớp học không hợp lệ'}), 400
+        class_ids = [class_id]
+
+    if current_user.is_admin():
+        if not class_ids:
+            class_ids = [c.id for c in Class.query.filter_by(is_active=True)]
+    else:
+        managed_class_ids = [c.id for c in Class.query.filter_by(manager_id=current_user.id, is_active=True)]
+        class_ids = [c for c in class_ids if c in managed_class_ids] if class_ids else managed_class_ids
+
+    try:
+        queued = enqueue_messages(build_class_broadcast(class_ids, body, request.form.get('category', 'broadcast')),
+                                  created_by=current_user.id)
+        return jsonify({'success': True, 'queued': queued,
+                        'message': f'Đã xếp hàng {queued} tin nhắn gửi phụ huynh'})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'Có lỗi xảy ra: {str(e)}'})
+
+@bp.route('/notification/absence-alerts', methods=['POST'])
+@login_required
+@manager_required
+def queue_absence_alerts():
+    """Queue absence alerts for the parents of absent students"""
+    from app.utils.messaging import build_absence_alerts, enqueue_messages
+
+    try:
+        alert_date = datetime.strptime(request.form.get('date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Định dạng ngày không hợp lệ'})
+
+    class_ids = None
+    if not current_user.is_admin():
+        class_ids = [c.id for c in Class.query.filter_by(manager_id=current_user.id, is_active=True)]
 
+    try:
+        queued = enqueue_messages(build_absence_alerts(alert_date, class_ids), created_by=current_user.id)
+        return jsonify({'success': True, 'queued': queued,
+                        'message': f'Đã xếp hàng {queued} thông báo vắng học'})
     except Exception as e:
+        db.session.rollback()
         return jsonify({'success': False, 'message': f'Có lỗi xảy ra: {str(e)}'})
 
+@bp.route('/notification/outbox')
+@login_required
+@manager_required
+def notification_outbox():
+    """Outbox status counts"""
+    from app.utils.messaging import outbox_stats
+    return jsonify({'success': True, 'stats': outbox_stats()})
+
+@bp.route('/attendance/at-risk')
+@login_required
+@manager_required
+def at_risk_students():
+    """Students with long absence streaks or a low recent attendance rate"""
+    from app.utils.attendance_analytics import at_risk_students as find_at_risk, RISK_THRESHOLD
+
+    class_ids = None
+    if not current_user.is_admin():
+        class_ids = [c.id for c in Class.query.filter_by(manager_id=current_user.id, is_active=True)]
+
+    class_id = request.args.get('class_id', type=int)
+    if class_id:
+        if class_ids is not None and class_id not in class_ids:
+            return jsonify({'success': False, 'message': 'Bạn không có quyền xem lớp này'}), 403
+        class_ids = [class_id]
+
+    min_score = request.args.get('min_score', RISK_THRESHOLD, type=int)
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    students = find_at_risk(class_ids, min_score=min_score, limit=limit)
+    return jsonify({'success': True, 'count': len(students), 'students': students})
+
+@bp.route('/attendance/matrix')
+@login_required
+@manager_required
+def attendance_matrix():
+    """Monthly (or yearly) students x sessions attendance sheet for a class"""
+    from datetime import date
+    import calendar
+    from app.utils.attendance_matrix import build_attendance_matrix, matrix_excel_rows
+
+    if current_user.is_admin():
+        managed_classes = Class.query.filter_by(is_active=True).order_by(Class.name).all()
+    else:
+        managed_classes = Class.query.filter_by(manager_id=current_user.id, is_active=True).order_by(Class.name).all()
+
+    class_id = request.args.get('class_id', type=int) or (managed_classes[0].id if managed_classes else None)
+    class_obj = next((c for c in managed_classes if c.id == class_id), None)
+    if class_id and class_obj is None:
+        flash('Bạn không có quyền xem lớp này', 'error')
+        return redirect(url_for('manager.attendance'))
 
+    period = request.args.get('period', 'month')
+    month_value = request.args.get('month', date.today().strftime('%Y-%m'))
+    try:
+        year, month = (int(part) for part in month_value.split('-'))
+        if period == 'year':
+            start_date, end_date = date(year, 1, 1), date(year, 12, 31)
+        else:
+            start_date = date(year, month, 1)
+            end_date = date(year, month, calendar.monthrange(year, month)[1])
+    except ValueError:
+        flash('Tháng không hợp lệ', 'error')
+        return redirect(url_for('manager.attendance_matrix'))
+
+    include_history = request.args.get('history') == '1'
+    matrix = build_attendance_matrix(class_obj.id, start_date, end_date, include_history) if class_obj else None
+
+    if matrix is not None and request.args.get('format') == 'excel':
+        from app.utils.excel_export import create_streaming_excel_response
+        headers = ['Mã HS', 'Họ và tên'] + matrix.session_labels() + ['Có mặt', 'Vắng', 'Tỷ lệ (%)']
+        widths = [12, 28] + [7] * matrix.width + [9, 9, 10]
+        label = str(year) if period == 'year' else f'{year}_{month:02d}'
+        filename = f'diem_danh_{class_obj.name.replace(" ", "_")}_{label}.xlsx'
+        return create_streaming_excel_response(headers, matrix_excel_rows(matrix), filename,
+                                               'Bảng điểm danh', column_widths=widths)
+
+    return render_template('manager/attendance_matrix_tailwind.html',
+                         title='Bảng điểm danh theo lớp',
+                         managed_classes=managed_classes,
+                         class_obj=class_obj,
+                         matrix=matrix,
+                         period=period,
+                         month_value=month_value,
+                         include_history=include_history,
+                         start_date=start_date,
+                         end_date=end_date)
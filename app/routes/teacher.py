@@ -1,7 +1,7 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app
 from flask_login import login_required, current_user
 from datetime import datetime, date
-from app import db
+from app import db, csrf
 from app.models.schedule import Schedule
 from app.models.attendance import Attendance
 from app.models.student import Student
@@ -80,7 +80,20 @@ def attendance(schedule_id):
                     )
                     db.session.add(attendance)
 
+            student_ids = [student.id for student in students]  # Read before commit expires them
             db.session.commit()
+
+            # Only the students of this form (saved or cleared); other rows are
+            # caught up by `flask attendance-stats`
+            try:
+                from app.utils.attendance_analytics import refresh_students
+                refresh_students(student_ids)
+                db.session.commit()
+            except Exception as e:
+                # Stats are caught up by `flask attendance-stats` later
+                db.session.rollback()
+                current_app.logger.warning('Attendance stats refresh failed: %s', e)
+
             flash('Điểm danh đã được lưu thành công', 'success')
             return redirect(url_for('teacher.attendance', schedule_id=schedule_id))
 
@@ -106,3 +119,57 @@ def attendance(schedule_id):
                          form=form)
 
 
+
+@bp.route('/attendance/sync', methods=['GET', 'POST'])
+@csrf.exempt
+@login_required
+def attendance_sync():
+    """
+    Offline attendance sync. POST a JSON batch of records (and the last
+    cursor the client has seen); the response carries per-record results,
+    changes made by other devices since that cursor and the new cursor.
+    GET pulls further changes when has_more is set.
+    """
+    from app.utils.attendance_sync import apply_sync_batch, changes_since, MAX_BATCH_SIZE
+
+    if not current_user.is_teacher():
+        return jsonify({'success': False, 'message': 'Bạn không có quyền truy cập'}), 403
+
+    if request.method == 'GET':
+        cursor = request.args.get('cursor', 0, type=int)
+        changes, cursor, has_more = changes_since(current_user, cursor)
+        return jsonify({'success': True, 'changes': changes, 'cursor': cursor, 'has_more': has_more})
+
+    # JSON only: browsers cannot send it cross-site without a CORS preflight
+    payload = request.get_json(silent=True)
+    if not request.is_json or not isinstance(payload, dict) or not isinstance(payload.get('records'), list):
+        return jsonify({'success': False, 'message': 'Dữ liệu đồng bộ không hợp lệ'}), 400
+
+    records = payload['records']
+    if len(records) > MAX_BATCH_SIZE:
+        return jsonify({'success': False,
+                        'message': f'Mỗi lần đồng bộ tối đa {MAX_BATCH_SIZE} bản ghi'}), 413
+
+    try:
+        results, affected = apply_sync_batch(current_user, records, device_id=payload.get('device_id'))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'Có lỗi xảy ra: {str(e)}'}), 500
+
+    if affected:
+        try:
+            from app.utils.attendance_analytics import refresh_students
+            refresh_students(affected)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.warning('Attendance stats refresh failed: %s', e)
+
+    try:
+        cursor = int(payload.get('cursor') or 0)
+    except (TypeError, ValueError):
+        cursor = 0
+    changes, cursor, has_more = changes_since(current_user, cursor)
+    return jsonify({'success': True, 'results': results, 'changes': changes,
+                    'cursor': cursor, 'has_more': has_more})
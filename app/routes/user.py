@@ -68,30 +68,25 @@ def dashboard():
 @user_required
 def weekly_schedule():
     """View weekly schedule - read only"""
-    from datetime import datetime, timedelta
-    
-    # Get week parameter
+    from app.utils import calendar_dim
+
+    # Get week parameter (YYYY-Www), defaulting to the current week
     week_str = request.args.get('week')
-    if week_str:
-        try:
-            year, week = map(int, week_str.split('-W'))
-            # Calculate first day of week
-            jan1 = datetime(year, 1, 1)
-            week_start = jan1 + timedelta(weeks=week-1, days=-jan1.weekday())
-        except:
-            week_start = datetime.now() - timedelta(days=datetime.now().weekday())
-    else:
-        week_start = datetime.now() - timedelta(days=datetime.now().weekday())
+    try:
+        week_start = calendar_dim.week_start(week_str)
+    except ValueError:
+        week_str = calendar_dim.current_week_key()
+        week_start = calendar_dim.week_start(week_str)
     
     # Get schedules for the week
-    schedules = Schedule.query.filter_by(is_active=True).order_by(
+    schedules = Schedule.query.filter_by(is_active=True, week_number=week_str).order_by(
         Schedule.day_of_week, Schedule.session, Schedule.start_time
     ).all()
     
     # Group schedules by day
     week_schedules = {}
     for i in range(7):
-        day_num = (i + 1) % 7  # Monday=1, Sunday=0
+        day_num = i + 1  # Monday=1, Sunday=7
         week_schedules[i] = [s for s in schedules if s.day_of_week == day_num]
     
     return render_template('user/weekly_schedule_tailwind.html',
@@ -0,0 +1,150 @@
+"""
+Bulk approve/reject of pending expenses, financial transactions and
+donation records, by id list or by the same filters as the list views.
+
+Rows are reviewed with set-based UPDATEs in chunks; the side effects the
+ORM hooks would otherwise apply (ledger entries, budget running totals,
+cached dashboard KPIs) are applied explicitly in the same transaction.
+"""
+
+from datetime import datetime
+from werkzeug.datastructures import MultiDict
+from app import db
+
+CHUNK_SIZE = 500
+MAX_ITEMS = 5000
+DECISIONS = ('approved', 'rejected')
+
+
+class ApprovalError(ValueError):
+    pass
+
+
+def _kinds():
+    """kind: (model, {decision: new status}, list query builder, KPI dashboard)"""
+    from app.models.expense import Expense
+    from app.models.financial_transaction import FinancialTransaction, DonationRecord
+    from app.utils.list_queries import donation_records_query, expenses_query, transactions_query
+
+    return {
+        'expense': (Expense, {'approved': 'approved', 'rejected': 'rejected'}, expenses_query, 'expense'),
+        'transaction': (FinancialTransaction, {'approved': 'approved', 'rejected': 'rejected'},
+                        transactions_query, 'financial'),
+        'donation_record': (DonationRecord, {'approved': 'completed', 'rejected': 'cancelled'},
+                            donation_records_query, None),
+    }
+
+
+def _chunks(ids):
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start:start + CHUNK_SIZE]
+
+
+def pending_ids(kind, ids=None, filters=None):
+    """Ids of the pending rows among `ids` (ints) or matching the list filters"""
+    model, _, build_query, _ = _kinds()[kind]
+    if ids is not None:
+        found = []
+        for chunk in _chunks(ids):
+            found.extend(row_id for (row_id,) in db.session.query(model.id).filter(
+                model.id.in_(chunk), model.status == 'pending'))
+        return found
+
+    if filters is None:
+        raise ApprovalError('Chưa chọn mục nào')
+    if not isinstance(filters, MultiDict):
+        filters = MultiDict(filters)
+    try:
+        query, _ = build_query(filters)
+    except ValueError:
+        raise ApprovalError('Bộ lọc không hợp lệ')
+    query = query.filter(model.status == 'pending').with_entities(model.id).order_by(model.id)
+    found = [row_id for (row_id,) in query.limit(MAX_ITEMS + 1)]
+    if len(found) > MAX_ITEMS:
+        raise ApprovalError(f'Bộ lọc khớp quá {MAX_ITEMS} mục, vui lòng thu hẹp bộ lọc')
+    return found
+
+
+def bulk_review(kind, decision, reviewer_id, ids=None, filters=None, notes=None):
+    """
+    Approve or reject pending rows and commit. Rows that are no longer
+    pending are skipped. Returns a summary dict.
+    """
+    from app.utils import budgets, ledger
+
+    if kind not in _kinds():
+        raise ApprovalError('Loại dữ liệu không hợp lệ')
+    if decision not in DECISIONS:
+        raise ApprovalError('Quyết định không hợp lệ')
+    model, statuses, _, dashboard = _kinds()[kind]
+    if ids is not None:
+        try:
+            ids = sorted({int(row_id) for row_id in ids})
+        except (TypeError, ValueError):
+            raise ApprovalError('Danh sách mục không hợp lệ')
+        if len(ids) > MAX_ITEMS:
+            raise ApprovalError(f'Tối đa {MAX_ITEMS} mục mỗi lần')
+    target_ids = pending_ids(kind, ids=ids, filters=filters)
+    requested = len(ids) if ids is not None else len(target_ids)
+
+    now = datetime.utcnow()
+    values = {model.status: statuses[decision], model.approved_by: reviewer_id,
+              model.approved_at: now, model.updated_at: now}
+    if notes:
+        label = 'Duyệt' if decision == 'approved' else 'Từ chối'
+        values[model.notes] = db.func.coalesce(model.notes, '') + f'\n[{label}] {notes}'
+
+    connection = db.session.connection()
+    updated_ids = []
+    total_amount = 0
+    budgets_updated = 0
+    for chunk in _chunks(target_ids):
+        # Rows reviewed by someone else meanwhile are skipped; the lock keeps
+        # the eligible set valid until the UPDATE below (ignored by SQLite)
+        eligible = [row_id for (row_id,) in db.session.query(model.id).filter(
+            model.id.in_(chunk), model.status == 'pending').with_for_update()]
+        if not eligible:
+            continue
+        db.session.query(model).filter(model.id.in_(eligible)).update(values, synchronize_session=False)
+        rows = model.query.filter(model.id.in_(eligible)).populate_existing().all()
+        updated_ids.extend(row.id for row in rows)
+        total_amount += sum(row.amount or 0 for row in rows)
+
+        ledger.sync_rows(connection, model, {row.id: row for row in rows})
+        if kind == 'expense' and decision == 'approved':
+            budgets_updated += budgets.add_approved_expenses(connection, [row.id for row in rows])
+
+    if dashboard and updated_ids:
+        db.session.info.setdefault('stale_kpis', set()).add((dashboard, None))
+    db.session.commit()
+
+    return {
+        'decision': decision,
+        'status': statuses[decision],
+        'requested': requested,
+        'updated': len(updated_ids),
+        'skipped': requested - len(updated_ids),
+        'updated_ids': updated_ids,
+        'total_amount': float(total_amount),
+        'budgets_updated': budgets_updated,
+    }
+
+
+def review_request(payload):
+    """
+    (decision, ids, filters, notes) from a JSON body: {"decision", "ids"}
+    or {"decision", "all_matching": true, "filters": {...}}
+    """
+    if not isinstance(payload, dict):
+        raise ApprovalError('Dữ liệu không hợp lệ')
+    decision = payload.get('decision')
+    notes = (payload.get('notes') or '').strip() or None
+    if payload.get('all_matching'):
+        filters = payload.get('filters') or {}
+        if not isinstance(filters, dict):
+            raise ApprovalError('Bộ lọc không hợp lệ')
+        return decision, None, filters, notes
+    ids = payload.get('ids')
+    if not isinstance(ids, list) or not ids:
+        raise ApprovalError('Chưa chọn mục nào')
+    return decision, ids, None, notes
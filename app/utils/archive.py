@@ -0,0 +1,187 @@
+"""
+Archival of finished terms.
+
+A term's schedules are those of the ISO weeks whose Monday falls in the
+term (see calendar_dim.term_bounds). archive_term() moves them, with their
+enrollments, attendance and offline-sync records, from the live tables to
+the *_archive tables of app/models/archive.py: one chunk of schedules per
+transaction, each an INSERT ... SELECT and a DELETE per table, so an
+interrupted run resumes where it stopped and the live tables only keep the
+terms in progress. export_term() writes a term's archived rows to a
+gzip-compressed JSON-lines file. with_history() gives the rare query that
+needs old rows a live + archive union.
+"""
+
+import gzip
+import json
+import os
+from datetime import date, datetime
+from sqlalchemy import select
+from app import db
+from app.utils import availability, calendar_dim
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+class ArchiveError(ValueError):
+    """A term that does not exist or is not finished"""
+
+
+def term_key(day):
+    """Key of the term containing a date: 2024-2025-hk1"""
+    item = calendar_dim.info(day)
+    return f'{item.school_year}-{item.term}'
+
+
+def term_bounds(key):
+    """(first, last) date of a term key"""
+    try:
+        first_year, _, term = key.split('-')
+        start_year = int(first_year)
+        first_day = {'hk1': date(start_year, 9, 1), 'hk2': date(start_year + 1, 2, 1),
+                     'summer': date(start_year + 1, 6, 1)}[term]
+    except (KeyError, ValueError):
+        raise ArchiveError(f'Học kỳ không hợp lệ: {key}')
+    return calendar_dim.term_bounds(first_day)
+
+
+def term_weeks(key):
+    """Week keys whose Monday falls in the term"""
+    start, end = term_bounds(key)
+    return [week for week in calendar_dim.weeks_between(start, end)
+            if start <= calendar_dim.week_start(week) <= end]
+
+
+def finished_terms():
+    """[(term_key, live schedules)] of the terms that ended before today, oldest first"""
+    from app.models.schedule import Schedule
+
+    today = date.today()
+    counts = {}
+    for week, count in db.session.query(Schedule.week_number, db.func.count(Schedule.id)).group_by(Schedule.week_number):
+        try:
+            key = term_key(calendar_dim.week_start(week))
+        except ValueError:
+            continue  # Malformed week_number, left alone
+        if term_bounds(key)[1] < today:
+            counts[key] = counts.get(key, 0) + count
+    return sorted(counts.items(), key=lambda item: term_bounds(item[0])[0])
+
+
+def _move(connection, live, archive, where, key, now):
+    """INSERT ... SELECT the matching live rows into the archive, then DELETE them; returns the count"""
+    columns = [column.name for column in live.columns]
+    moved = connection.execute(archive.insert().from_select(
+        columns + ['term_key', 'archived_at'],
+        select(*live.columns, db.literal(key), db.literal(now)).where(where),
+    )).rowcount
+    connection.execute(live.delete().where(where))
+    return moved
+
+
+def archive_term(key, chunk_size=DEFAULT_CHUNK_SIZE, echo=None):
+    """Move a finished term to the archive tables; returns the ArchivedTerm"""
+    from app.models.archive import ARCHIVE_TABLES, ArchivedTerm
+    from app.models.calendar_exception import CalendarException
+    from app.models.schedule import Schedule
+    from app.utils import payroll
+    from app.utils.attendance_analytics import process_new_attendance
+
+    start, end = term_bounds(key)
+    if end >= date.today():
+        raise ArchiveError(f'Học kỳ {key} chưa kết thúc')
+    weeks = term_weeks(key)
+
+    # Stats read Attendance by id watermark: catch up before rows leave the table
+    process_new_attendance()
+    if weeks:
+        # Payroll of the term's closed months, from the rows about to move
+        payroll.snapshot(payroll.months_between(payroll.month_key(calendar_dim.week_bounds(weeks[0])[0]),
+                                                payroll.month_key(calendar_dim.week_bounds(weeks[-1])[1])))
+
+    record = db.session.get(ArchivedTerm, key)
+    if record is None:
+        record = ArchivedTerm(term_key=key, status='archiving', started_at=datetime.utcnow())
+        db.session.add(record)
+    record.status = 'archiving'
+    db.session.commit()
+
+    schedules = Schedule.__table__
+    exceptions = CalendarException.__table__
+    counts_by_table = {
+        'attendance': 'attendance', 'student_schedule': 'enrollments',
+        'attendance_sync_records': 'sync_records', 'schedule': 'schedules',
+    }
+    pairs = set()
+    last_id = 0
+    while True:
+        connection = db.session.connection()
+        rows = connection.execute(
+            select(schedules.c.id, schedules.c.teacher_id, schedules.c.week_number)
+            .where(schedules.c.week_number.in_(weeks), schedules.c.id > last_id)
+            .order_by(schedules.c.id).limit(chunk_size)).all()
+        if not rows:
+            break
+        ids = [row.id for row in rows]
+        pairs.update((row.teacher_id, row.week_number) for row in rows)
+        now = datetime.utcnow()
+
+        connection.execute(exceptions.update().where(exceptions.c.schedule_id.in_(ids)).values(schedule_id=None))
+        for live, archive in ARCHIVE_TABLES.items():
+            where = live.c.id.in_(ids) if live is schedules else live.c.schedule_id.in_(ids)
+            moved = _move(connection, live, archive, where, key, now)
+            attribute = counts_by_table[live.name]
+            setattr(record, attribute, (getattr(record, attribute) or 0) + moved)
+        db.session.commit()
+        last_id = ids[-1]
+        if echo:
+            echo(f'{key}: {record.schedules} schedules archived')
+
+    availability.rebuild(db.session.connection(), pairs)
+    record.status = 'archived'
+    record.archived_at = datetime.utcnow()
+    db.session.commit()
+    return record
+
+
+def export_term(key, directory, chunk_size=5000):
+    """Write a term's archived rows to <directory>/<term>.jsonl.gz, one {"table", "row"} object per line"""
+    from app.models.archive import ARCHIVE_TABLES, ArchivedTerm
+
+    record = db.session.get(ArchivedTerm, key)
+    if record is None or record.status != 'archived':
+        raise ArchiveError(f'Học kỳ {key} chưa được lưu trữ')
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{key}.jsonl.gz')
+    connection = db.session.connection()
+    with gzip.open(path, 'wt', encoding='utf-8') as output:
+        for live, archive in reversed(list(ARCHIVE_TABLES.items())):
+            last_id = None
+            while True:
+                query = select(archive).where(archive.c.term_key == key).order_by(archive.c.id).limit(chunk_size)
+                if last_id is not None:
+                    query = query.where(archive.c.id > last_id)
+                rows = connection.execute(query).mappings().all()
+                if not rows:
+                    break
+                for row in rows:
+                    output.write(json.dumps({'table': live.name, 'row': dict(row)},
+                                            ensure_ascii=False, default=str) + '\n')
+                last_id = rows[-1]['id']
+
+    record.export_path = path
+    record.exported_at = datetime.utcnow()
+    db.session.commit()
+    return path
+
+
+def with_history(model):
+    """Subquery of a live table's rows followed by its archived rows, with the live columns"""
+    from app.models.archive import ARCHIVE_TABLES
+
+    live = model.__table__
+    archive = ARCHIVE_TABLES[live]
+    return select(*live.columns).union_all(
+        select(*[archive.c[column.name] for column in live.columns])
+    ).subquery(f'{live.name}_history')
@@ -0,0 +1,193 @@
+"""
+Incremental attendance analytics: absence streaks, rolling attendance
+rate and a risk score per student, kept in student_attendance_stats
+"""
+
+from datetime import datetime, timedelta
+from app import db
+from app.models.attendance import Attendance
+from app.models.attendance_stat import StudentAttendanceStat, AnalyticsCursor
+from app.models.schedule import Schedule
+
+CURSOR_NAME = 'attendance_stats'
+
+# Number of most recent sessions used for the rolling attendance rate
+ROLLING_WINDOW = 20
+
+# Students whose risk score reaches this value are reported as at risk
+RISK_THRESHOLD = 30
+
+ABSENT_STATUSES = ('absent_with_reason', 'absent_without_reason')
+
+# Rows younger than this may still have lower-id neighbours in uncommitted
+# transactions, so the watermark does not move past them yet
+SETTLE_SECONDS = 300
+
+
+def risk_score(absence_streak, recent_rate):
+    """
+    0-150 score: 10 points per consecutive absence (capped at 10
+    absences) plus half the missing percentage of the rolling rate
+    """
+    return min(absence_streak, 10) * 10 + int(round((100 - recent_rate) / 2))
+
+
+def refresh_students(student_ids):
+    """Recompute the stats rows of the given students"""
+    student_ids = list(set(student_ids))
+    for i in range(0, len(student_ids), 500):
+        _refresh_chunk(student_ids[i:i + 500])
+
+
+def _refresh_chunk(student_ids):
+    present = db.case((Attendance.status == 'present', 1), else_=0)
+    totals = {
+        student_id: (total, present_count)
+        for student_id, total, present_count in db.session.query(
+            Attendance.student_id, db.func.count(Attendance.id), db.func.sum(present)
+        ).filter(Attendance.student_id.in_(student_ids)).group_by(Attendance.student_id)
+    }
+
+    # Latest ROLLING_WINDOW sessions per student, newest first
+    row_number = db.func.row_number().over(
+        partition_by=Attendance.student_id,
+        order_by=(Attendance.date.desc(), Attendance.id.desc())
+    ).label('rn')
+    ranked = db.session.query(
+        Attendance.student_id, Attendance.status, Attendance.date,
+        Schedule.class_id, row_number
+    ).join(Schedule, Schedule.id == Attendance.schedule_id).filter(
+        Attendance.student_id.in_(student_ids)
+    ).subquery()
+    recent = db.session.query(
+        ranked.c.student_id, ranked.c.status, ranked.c.date, ranked.c.class_id
+    ).filter(ranked.c.rn <= ROLLING_WINDOW).order_by(ranked.c.student_id, ranked.c.rn)
+
+    windows = {}
+    for student_id, status, day, class_id in recent:
+        windows.setdefault(student_id, []).append((status, day, class_id))
+
+    existing = {stat.student_id: stat for stat in StudentAttendanceStat.query.filter(
+        StudentAttendanceStat.student_id.in_(student_ids))}
+
+    for student_id in student_ids:
+        window = windows.get(student_id)
+        if not window:
+            if student_id in existing:
+                db.session.delete(existing[student_id])
+            continue
+
+        streak = 0
+        for status, _, _ in window:
+            if status not in ABSENT_STATUSES:
+                break
+            streak += 1
+        recent_present = sum(1 for status, _, _ in window if status == 'present')
+        recent_rate = round(recent_present / len(window) * 100, 2)
+        total, present_count = totals.get(student_id, (0, 0))
+
+        stat = existing.get(student_id)
+        if stat is None:
+            stat = StudentAttendanceStat(student_id=student_id)
+            db.session.add(stat)
+        stat.class_id = window[0][2]
+        stat.absence_streak = streak
+        stat.recent_total = len(window)
+        stat.recent_present = recent_present
+        stat.recent_rate = recent_rate
+        stat.total_sessions = total
+        stat.present_sessions = present_count or 0
+        stat.risk_score = risk_score(streak, recent_rate)
+        stat.last_attendance_date = window[0][1]
+        stat.updated_at = datetime.utcnow()
+
+
+def process_new_attendance(batch_size=5000):
+    """
+    Refresh stats for students with Attendance rows newer than the saved
+    watermark. Re-submitted attendance is deleted and re-inserted, so it
+    always shows up as new rows. Ids are assigned at insert but become
+    visible at commit, possibly out of order, so the watermark only moves
+    past rows older than SETTLE_SECONDS; newer rows are refreshed again on
+    the next run. Returns the number of rows processed.
+    """
+    cursor = db.session.get(AnalyticsCursor, CURSOR_NAME)
+    if cursor is None:
+        cursor = AnalyticsCursor(name=CURSOR_NAME, last_id=0)
+        db.session.add(cursor)
+
+    cutoff = datetime.utcnow() - timedelta(seconds=SETTLE_SECONDS)
+    last_seen = cursor.last_id or 0
+    settled = True
+    processed = 0
+    while True:
+        rows = db.session.query(Attendance.id, Attendance.student_id, Attendance.created_at).filter(
+            Attendance.id > last_seen
+        ).order_by(Attendance.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        refresh_students(student_id for _, student_id, _ in rows)
+        for row_id, _, created_at in rows:
+            if created_at is not None and created_at > cutoff:
+                settled = False
+            if settled:
+                cursor.last_id = row_id
+        last_seen = rows[-1][0]
+        db.session.commit()
+        processed += len(rows)
+
+    db.session.commit()
+    return processed
+
+
+def rebuild_all():
+    """Recompute every student's stats and reset the watermark"""
+    from app.models.student import Student
+
+    student_ids = [student_id for (student_id,) in db.session.query(Student.id)]
+    refresh_students(student_ids)
+
+    # Recent rows are left above the watermark, see process_new_attendance
+    cutoff = datetime.utcnow() - timedelta(seconds=SETTLE_SECONDS)
+    cursor = db.session.get(AnalyticsCursor, CURSOR_NAME) or AnalyticsCursor(name=CURSOR_NAME)
+    cursor.last_id = db.session.query(db.func.coalesce(db.func.max(Attendance.id), 0)).filter(
+        db.or_(Attendance.created_at.is_(None), Attendance.created_at <= cutoff)).scalar()
+    db.session.add(cursor)
+    db.session.commit()
+    return len(student_ids)
+
+
+def at_risk_students(class_ids=None, min_score=RISK_THRESHOLD, limit=50):
+    """Highest-risk students, served by the (class_id, risk_score) index"""
+    from app.models.class_model import Class
+    from app.models.student import Student
+
+    query = db.session.query(
+        StudentAttendanceStat, Student.full_name, Student.student_code, Student.parent_phone, Class.name
+    ).join(Student, Student.id == StudentAttendanceStat.student_id
+    ).outerjoin(Class, Class.id == StudentAttendanceStat.class_id).filter(
+        StudentAttendanceStat.risk_score >= min_score,
+        Student.is_active == True
+    )
+    if class_ids is not None:
+        query = query.filter(StudentAttendanceStat.class_id.in_(class_ids))
+
+    results = []
+    for stat, full_name, student_code, parent_phone, class_name in query.order_by(
+            StudentAttendanceStat.risk_score.desc()).limit(limit):
+        results.append({
+            'student_id': stat.student_id,
+            'full_name': full_name,
+            'student_code': student_code,
+            'parent_phone': parent_phone,
+            'class_id': stat.class_id,
+            'class_name': class_name,
+            'absence_streak': stat.absence_streak,
+            'recent_rate': stat.recent_rate,
+            'recent_total': stat.recent_total,
+            'attendance_rate': stat.attendance_rate,
+            'risk_score': stat.risk_score,
+            'last_attendance_date': stat.last_attendance_date.isoformat() if stat.last_attendance_date else None
+        })
+    return results
@@ -0,0 +1,128 @@
+"""
+Class x session attendance matrix built from one projected query
+"""
+
+from array import array
+from app import db
+from app.models.attendance import Attendance
+from app.models.schedule import Schedule
+from app.models.student import Student
+
+# Cell codes stored in the matrix
+EMPTY, PRESENT, ABSENT_WITH_REASON, ABSENT_WITHOUT_REASON = 0, 1, 2, 3
+
+STATUS_CODES = {
+    'present': PRESENT,
+    'absent_with_reason': ABSENT_WITH_REASON,
+    'absent_without_reason': ABSENT_WITHOUT_REASON,
+}
+
+# Short labels used in the HTML grid and the Excel sheet
+CELL_LABELS = {EMPTY: '', PRESENT: 'C', ABSENT_WITH_REASON: 'P', ABSENT_WITHOUT_REASON: 'K'}
+
+
+class AttendanceMatrix:
+    """
+    Students x sessions grid. Cells live in one flat array of status
+    codes (row-major); totals are kept in parallel integer arrays.
+    """
+
+    def __init__(self, students, sessions):
+        self.students = students  # [(student_id, full_name, student_code)]
+        self.sessions = sessions  # [(date, schedule_id, start_time)]
+        self.width = len(sessions)
+        self.cells = array('b', bytes(len(students) * self.width))
+        self.student_present = array('i', bytes(4 * len(students)))
+        self.student_absent = array('i', bytes(4 * len(students)))
+        self.session_present = array('i', bytes(4 * self.width))
+        self.session_absent = array('i', bytes(4 * self.width))
+
+    def row(self, index):
+        start = index * self.width
+        return self.cells[start:start + self.width]
+
+    def student_rate(self, index):
+        total = self.student_present[index] + self.student_absent[index]
+        return round(self.student_present[index] / total * 100, 1) if total else 0
+
+    def session_labels(self):
+        """dd/mm headers, with the start time when a date has several sessions"""
+        per_day = {}
+        for day, _, _ in self.sessions:
+            per_day[day] = per_day.get(day, 0) + 1
+        return [f"{day.strftime('%d/%m')} {start.strftime('%H:%M')}" if per_day[day] > 1 else day.strftime('%d/%m')
+                for day, _, start in self.sessions]
+
+    def rows(self):
+        """Yield (student, cell labels, present, absent, rate) per student"""
+        for index, student in enumerate(self.students):
+            yield (student, [CELL_LABELS[code] for code in self.row(index)],
+                   self.student_present[index], self.student_absent[index], self.student_rate(index))
+
+    @property
+    def present_total(self):
+        return sum(self.student_present)
+
+    @property
+    def absent_total(self):
+        return sum(self.student_absent)
+
+    @property
+    def attendance_rate(self):
+        total = self.present_total + self.absent_total
+        return round(self.present_total / total * 100, 1) if total else 0
+
+
+def build_attendance_matrix(class_id, start_date, end_date, include_history=False):
+    """
+    Pivot the class's attendance between two dates into a matrix.
+    include_history also reads the terms moved to the archive tables.
+    """
+    if include_history:
+        from app.utils.archive import with_history
+        attendance, schedules = with_history(Attendance), with_history(Schedule)
+    else:
+        attendance, schedules = Attendance.__table__, Schedule.__table__
+    records = db.session.query(
+        attendance.c.student_id, attendance.c.date, attendance.c.status,
+        attendance.c.schedule_id, schedules.c.start_time
+    ).join(schedules, schedules.c.id == attendance.c.schedule_id).filter(
+        schedules.c.class_id == class_id,
+        attendance.c.date >= start_date,
+        attendance.c.date <= end_date
+    ).all()
+
+    sessions = sorted({(day, schedule_id, start_time) for _, day, _, schedule_id, start_time in records})
+    session_index = {(day, schedule_id): i for i, (day, schedule_id, _) in enumerate(sessions)}
+
+    # Current class members plus anyone who attended before moving class
+    student_ids = {student_id for student_id, _, _, _, _ in records}
+    students = db.session.query(Student.id, Student.full_name, Student.student_code).filter(
+        db.or_(db.and_(Student.class_id == class_id, Student.is_active == True),
+               Student.id.in_(student_ids))
+    ).order_by(Student.full_name).all()
+    student_index = {student.id: i for i, student in enumerate(students)}
+
+    matrix = AttendanceMatrix([tuple(s) for s in students], sessions)
+    width = matrix.width
+    for student_id, day, status, schedule_id, _ in records:
+        code = STATUS_CODES.get(status, EMPTY)
+        row = student_index[student_id]
+        col = session_index[(day, schedule_id)]
+        matrix.cells[row * width + col] = code
+        if code == PRESENT:
+            matrix.student_present[row] += 1
+            matrix.session_present[col] += 1
+        elif code != EMPTY:
+            matrix.student_absent[row] += 1
+            matrix.session_absent[col] += 1
+    return matrix
+
+
+def matrix_excel_rows(matrix):
+    """Rows for the streaming Excel export, ending with a totals row"""
+    for (_, full_name, student_code), cells, present, absent, rate in matrix.rows():
+        yield [student_code, full_name] + cells + [present, absent, rate]
+    yield (['', 'Tổng có mặt'] + list(matrix.session_present) +
+           [matrix.present_total, matrix.absent_total, matrix.attendance_rate])
+    yield ['', 'Tổng vắng'] + list(matrix.session_absent) + ['', '', '']
@@ -0,0 +1,214 @@
+"""
+Batched attendance sync for offline clients: idempotent records,
+last-writer-wins on client timestamps and a cursor for pulling changes
+"""
+
+from datetime import datetime, timezone
+from app import db
+from app.models.attendance import Attendance
+from app.models.attendance_sync import AttendanceSyncRecord
+from app.models.schedule import Schedule
+from app.models.student_schedule import StudentSchedule
+
+# Maximum number of records accepted in one sync request
+MAX_BATCH_SIZE = 500
+
+VALID_STATUSES = ('present', 'absent_with_reason', 'absent_without_reason')
+
+
+class SyncError(ValueError):
+    """Raised when a record in a sync batch is invalid"""
+
+
+def parse_client_timestamp(value):
+    """ISO 8601 timestamp from the client, as naive UTC"""
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        raise SyncError('client_updated_at không hợp lệ')
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _parse_record(raw):
+    if not isinstance(raw, dict):
+        raise SyncError('Bản ghi không hợp lệ')
+    key = str(raw.get('idempotency_key') or '').strip()
+    if not key or len(key) > 100:
+        raise SyncError('Thiếu idempotency_key')
+    try:
+        schedule_id = int(raw['schedule_id'])
+        student_id = int(raw['student_id'])
+        day = datetime.strptime(str(raw['date']), '%Y-%m-%d').date()
+    except (KeyError, TypeError, ValueError):
+        raise SyncError('schedule_id, student_id hoặc date không hợp lệ')
+    if raw.get('status') not in VALID_STATUSES:
+        raise SyncError('Trạng thái điểm danh không hợp lệ')
+    return {
+        'idempotency_key': key,
+        'schedule_id': schedule_id,
+        'student_id': student_id,
+        'date': day,
+        'status': raw['status'],
+        'notes': raw.get('notes') or '',
+        'client_updated_at': parse_client_timestamp(raw.get('client_updated_at')),
+    }
+
+
+def _result(key, result, message, attendance=None):
+    return {
+        'idempotency_key': key,
+        'result': result,
+        'message': message,
+        'attendance_id': attendance.id if attendance else None,
+        'status': attendance.status if attendance else None,
+    }
+
+
+def apply_sync_batch(teacher, raw_records, device_id=None):
+    """
+    Apply a batch of attendance records in one transaction.
+
+    Each record is applied only if its client timestamp is newer than the
+    current version of the (schedule, student, date) cell, otherwise the
+    server copy wins and the record is reported as stale. Replayed
+    idempotency keys (scoped to the teacher) return the original outcome
+    without side effects.
+    Returns (results, affected_student_ids); the caller commits.
+    """
+    now = datetime.utcnow()
+    results = [None] * len(raw_records)
+    parsed = []
+    for index, raw in enumerate(raw_records):
+        try:
+            parsed.append((index, _parse_record(raw)))
+        except SyncError as e:
+            key = raw.get('idempotency_key') if isinstance(raw, dict) else None
+            results[index] = _result(key, 'rejected', str(e))
+
+    keys = [record['idempotency_key'] for _, record in parsed]
+    schedule_ids = {record['schedule_id'] for _, record in parsed}
+    student_ids = {record['student_id'] for _, record in parsed}
+    dates = {record['date'] for _, record in parsed}
+
+    seen = {}
+    if keys:
+        # Keys are client-generated, so only the teacher's own records count
+        seen = {r.idempotency_key: r for r in AttendanceSyncRecord.query.filter(
+            AttendanceSyncRecord.teacher_id == teacher.id,
+            AttendanceSyncRecord.idempotency_key.in_(keys))}
+
+    own_schedules = set()
+    enrolled = set()
+    cells = {}
+    versions = {}
+    if parsed:
+        own_schedules = {schedule_id for (schedule_id,) in db.session.query(Schedule.id).filter(
+            Schedule.id.in_(schedule_ids), Schedule.teacher_id == teacher.id)}
+        enrolled = set(db.session.query(StudentSchedule.schedule_id, StudentSchedule.student_id).filter(
+            StudentSchedule.schedule_id.in_(own_schedules),
+            StudentSchedule.student_id.in_(student_ids),
+            StudentSchedule.is_active == True))
+
+        for attendance in Attendance.query.filter(
+                Attendance.schedule_id.in_(own_schedules),
+                Attendance.student_id.in_(student_ids),
+                Attendance.date.in_(dates)):
+            cells[(attendance.schedule_id, attendance.student_id, attendance.date)] = attendance
+
+        # Latest applied client timestamp per cell
+        for schedule_id, student_id, day, client_ts, received_at in db.session.query(
+                AttendanceSyncRecord.schedule_id, AttendanceSyncRecord.student_id, AttendanceSyncRecord.date,
+                db.func.max(AttendanceSyncRecord.client_updated_at), db.func.max(AttendanceSyncRecord.received_at)
+        ).filter(
+                AttendanceSyncRecord.schedule_id.in_(own_schedules),
+                AttendanceSyncRecord.student_id.in_(student_ids),
+                AttendanceSyncRecord.date.in_(dates),
+                AttendanceSyncRecord.result == 'applied'
+        ).group_by(AttendanceSyncRecord.schedule_id, AttendanceSyncRecord.student_id, AttendanceSyncRecord.date):
+            versions[(schedule_id, student_id, day)] = (client_ts, received_at)
+
+    def current_version(cell):
+        """Client timestamp of the last sync, unless the web form edited the cell afterwards"""
+        attendance = cells.get(cell)
+        synced = versions.get(cell)
+        if attendance is None:
+            return synced[0] if synced else None
+        if synced and attendance.updated_at and attendance.updated_at <= synced[1]:
+            return synced[0]
+        return attendance.updated_at or attendance.created_at
+
+    affected = set()
+    # Apply in client-time order so the newest write of a cell wins within the batch
+    for index, record in sorted(parsed, key=lambda item: item[1]['client_updated_at']):
+        key = record['idempotency_key']
+        cell = (record['schedule_id'], record['student_id'], record['date'])
+
+        if key in seen:
+            previous = seen[key]
+            results[index] = _result(key, 'duplicate', f'Đã xử lý trước đó ({previous.result})', cells.get(
+                (previous.schedule_id, previous.student_id, previous.date)))
+            continue
+        if record['schedule_id'] not in own_schedules:
+            results[index] = _result(key, 'rejected', 'Bạn không có quyền điểm danh tiết học này')
+            continue
+        if (record['schedule_id'], record['student_id']) not in enrolled:
+            results[index] = _result(key, 'rejected', 'Học sinh không thuộc tiết học này')
+            continue
+
+        version = current_version(cell)
+        attendance = cells.get(cell)
+        if version is not None and record['client_updated_at'] < version:
+            result, message = 'stale', 'Bản ghi trên máy chủ mới hơn'
+        else:
+            if attendance is None:
+                attendance = Attendance(schedule_id=record['schedule_id'], student_id=record['student_id'],
+                                        date=record['date'], created_at=now)
+                db.session.add(attendance)
+                cells[cell] = attendance
+            attendance.status = record['status']
+            attendance.notes = record['notes']
+            attendance.updated_at = now
+            versions[cell] = (record['client_updated_at'], now)
+            affected.add(record['student_id'])
+            result, message = 'applied', 'Đã lưu'
+
+        sync_record = AttendanceSyncRecord(
+            teacher_id=teacher.id, device_id=device_id, received_at=now, result=result, **record)
+        db.session.add(sync_record)
+        seen[key] = sync_record
+        results[index] = (key, result, message, cell)
+
+    db.session.flush()
+
+    for cell, sync_record in ((r[3], seen[r[0]]) for r in results if isinstance(r, tuple)):
+        attendance = cells.get(cell)
+        sync_record.attendance_id = attendance.id if attendance else None
+    results = [_result(r[0], r[1], r[2], cells.get(r[3])) if isinstance(r, tuple) else r for r in results]
+
+    return results, affected
+
+
+def changes_since(teacher, cursor, limit=MAX_BATCH_SIZE):
+    """Applied sync records on the teacher's schedules after the cursor"""
+    records = AttendanceSyncRecord.query.join(
+        Schedule, Schedule.id == AttendanceSyncRecord.schedule_id
+    ).filter(
+        Schedule.teacher_id == teacher.id,
+        AttendanceSyncRecord.id > cursor,
+        AttendanceSyncRecord.result == 'applied'
+    ).order_by(AttendanceSyncRecord.id).limit(limit).all()
+
+    changes = [{
+        'idempotency_key': r.idempotency_key,
+        'schedule_id': r.schedule_id,
+        'student_id': r.student_id,
+        'date': r.date.isoformat(),
+        'status': r.status,
+        'notes': r.notes,
+        'client_updated_at': r.client_updated_at.isoformat() + 'Z',
+        'device_id': r.device_id,
+    } for r in records]
+    next_cursor = records[-1].id if records else cursor
+    return changes, next_cursor, len(records) == limit
@@ -0,0 +1,194 @@
+"""
+Teacher availability as bitsets: one 672-bit integer per teacher and ISO
+week (7 days x 96 quarter-hours), stored in teacher_availability.
+
+ORM writes to Schedule rebuild the (teacher, week) rows they touch in an
+after_flush hook, in the same transaction; the old pair of a moved
+schedule comes from the attribute history (teacher_id and week_number
+use active_history; expired values are loaded before the flush). Set-based updates of schedules
+must call rebuild() themselves; `flask availability` rebuilds everything.
+A free-teacher lookup is one query for the week plus an AND per teacher.
+"""
+
+from sqlalchemy import event, inspect, select, tuple_
+from sqlalchemy.orm import Session
+from app import db
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DAYS = 7
+BITSET_BYTES = SLOTS_PER_DAY * DAYS // 8
+
+SCHEDULE_FIELDS = ('teacher_id', 'week_number', 'day_of_week', 'start_time', 'end_time', 'is_active')
+DAY_MASK = (1 << SLOTS_PER_DAY) - 1
+
+_listening = False
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def slot_mask(day_of_week, start_time, end_time):
+    """Bits of the quarter-hours touched by [start_time, end_time) on a day (1=Monday)"""
+    first = _minutes(start_time) // SLOT_MINUTES
+    last = -(-_minutes(end_time) // SLOT_MINUTES)  # Round up: 09:10 still blocks 09:00-09:15
+    if last <= first:
+        last = min(first + 1, SLOTS_PER_DAY)
+    return ((1 << (last - first)) - 1) << ((int(day_of_week) - 1) * SLOTS_PER_DAY + first)
+
+
+def day_bits(busy, day_of_week):
+    """The 96 bits of one day"""
+    return (busy >> ((int(day_of_week) - 1) * SLOTS_PER_DAY)) & DAY_MASK
+
+
+def pack(busy):
+    return busy.to_bytes(BITSET_BYTES, 'little')
+
+
+def unpack(data):
+    return int.from_bytes(data, 'little') if data else 0
+
+
+def rebuild(connection, pairs=None):
+    """
+    Recompute the bitsets of some (teacher_id, week_number) pairs, or of
+    every teacher and week. Returns the number of rows written.
+    """
+    from app.models.schedule import Schedule
+    from app.models.teacher_availability import TeacherAvailability
+
+    schedules = Schedule.__table__
+    table = TeacherAvailability.__table__
+    if pairs is not None:
+        pairs = sorted({(int(teacher_id), week) for teacher_id, week in pairs
+                        if teacher_id is not None and week})
+        if not pairs:
+            return 0
+        chunks = [pairs[start:start + 500] for start in range(0, len(pairs), 500)]
+    else:
+        chunks = [None]
+
+    written = 0
+    for chunk in chunks:
+        query = select(schedules.c.teacher_id, schedules.c.week_number, schedules.c.day_of_week,
+                       schedules.c.start_time, schedules.c.end_time).where(schedules.c.is_active == True)
+        delete = table.delete()
+        if chunk is not None:
+            query = query.where(tuple_(schedules.c.teacher_id, schedules.c.week_number).in_(chunk))
+            delete = delete.where(tuple_(table.c.teacher_id, table.c.week_number).in_(chunk))
+
+        bitsets = {}
+        for teacher_id, week, day_of_week, start_time, end_time in connection.execute(query):
+            if not day_of_week or start_time is None or end_time is None:
+                continue
+            busy, sessions = bitsets.get((teacher_id, week), (0, 0))
+            bitsets[(teacher_id, week)] = (busy | slot_mask(day_of_week, start_time, end_time), sessions + 1)
+
+        connection.execute(delete)
+        if bitsets:
+            connection.execute(table.insert(), [
+                {'teacher_id': teacher_id, 'week_number': week, 'busy': pack(busy), 'sessions': sessions}
+                for (teacher_id, week), (busy, sessions) in bitsets.items()
+            ])
+        written += len(bitsets)
+    return written
+
+
+def week_bitsets(week_number):
+    """{teacher_id: (busy bitset, sessions)} of every teacher with schedules in the week"""
+    from app.models.teacher_availability import TeacherAvailability
+
+    table = TeacherAvailability.__table__
+    rows = db.session.execute(select(table.c.teacher_id, table.c.busy, table.c.sessions)
+                              .where(table.c.week_number == week_number))
+    return {teacher_id: (unpack(busy), sessions) for teacher_id, busy, sessions in rows}
+
+
+def class_teacher_ids(class_id):
+    from app.models.class_model import class_teacher
+
+    if not class_id:
+        return set()
+    return set(db.session.execute(select(class_teacher.c.teacher_id)
+                                  .where(class_teacher.c.class_id == class_id)).scalars())
+
+
+def free_teachers(week_number, day_of_week, start_time, end_time, class_id=None, exclude=()):
+    """
+    Active teachers with nothing scheduled in the slot, best candidates
+    first: teachers of the class, then the least busy that day, then the
+    least busy that week.
+    """
+    from app.utils import reference_data
+
+    mask = slot_mask(day_of_week, start_time, end_time)
+    bitsets = week_bitsets(week_number)
+    assigned = class_teacher_ids(class_id)
+    excluded = {int(teacher_id) for teacher_id in exclude if teacher_id}
+
+    candidates = []
+    for teacher in reference_data.teachers():
+        if teacher.id in excluded:
+            continue
+        busy, sessions = bitsets.get(teacher.id, (0, 0))
+        if busy & mask:
+            continue
+        day_slots = day_bits(busy, day_of_week).bit_count()
+        candidates.append({
+            'id': teacher.id,
+            'full_name': teacher.full_name,
+            'assigned_to_class': teacher.id in assigned,
+            'busy_minutes_that_day': day_slots * SLOT_MINUTES,
+            'sessions_that_week': sessions,
+        })
+    candidates.sort(key=lambda item: (not item['assigned_to_class'], item['busy_minutes_that_day'],
+                                      item['sessions_that_week'], item['full_name']))
+    return candidates
+
+
+def _pair(obj, old):
+    """(teacher_id, week_number) of a schedule before/after the flush"""
+    state = inspect(obj)
+    values = []
+    for name in ('teacher_id', 'week_number'):
+        attr = state.attrs[name]
+        history = attr.history
+        values.append(history.deleted[0] if old and history.deleted else attr.loaded_value)
+    return tuple(values)
+
+
+def _register_hooks():
+    global _listening
+    if _listening:
+        return
+    _listening = True
+    from app.models.schedule import Schedule
+
+    @event.listens_for(Session, 'before_flush')
+    def load_schedule_pairs(session, flush_context, instances):
+        with session.no_autoflush:
+            for obj in list(session.dirty) + list(session.deleted):
+                if isinstance(obj, Schedule):
+                    obj.teacher_id, obj.week_number  # Load expired values while the row is still there
+
+    @event.listens_for(Session, 'after_flush')
+    def rebuild_teacher_availability(session, flush_context):
+        pairs = set()
+        for obj in session.new:
+            if isinstance(obj, Schedule):
+                pairs.add(_pair(obj, old=False))
+        for obj in session.dirty:
+            if isinstance(obj, Schedule) and any(
+                    inspect(obj).attrs[name].history.has_changes() for name in SCHEDULE_FIELDS):
+                pairs.update([_pair(obj, old=True), _pair(obj, old=False)])
+        for obj in session.deleted:
+            if isinstance(obj, Schedule):
+                pairs.add(_pair(obj, old=True))
+        if pairs:
+            rebuild(session.connection(), pairs)
+
+
+def init_availability(app):
+    _register_hooks()
@@ -0,0 +1,195 @@
+"""
+Route benchmarks driven through the Flask test client. Records latency
+percentiles, SQL query counts and peak Python memory per route.
+"""
+
+import json
+import math
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from sqlalchemy import event
+from app import db
+from app.utils import calendar_dim
+
+# (name, role, url) of the hot routes; {placeholders} are filled from the data
+ROUTES = [
+    ('dashboard', 'admin', '/dashboard'),
+    ('manager.classes', 'manager', '/manager/classes'),
+    ('manager.students', 'manager', '/manager/students'),
+    ('manager.schedule', 'manager', '/manager/schedule'),
+    ('manager.attendance', 'manager', '/manager/attendance'),
+    ('manager.attendance_matrix', 'manager', '/manager/attendance/matrix?class_id={class_id}'),
+    ('manager.at_risk', 'manager', '/manager/attendance/at-risk'),
+    ('manager.schedule_assignments', 'manager', '/manager/schedule/assignments'),
+    ('manager.schedule_stats', 'manager', '/manager/schedule/stats'),
+    ('calendar.calendar_view', 'teacher', '/calendar/calendar'),
+    ('teacher.schedule', 'teacher', '/teacher/schedule'),
+    ('teacher.attendance', 'teacher', '/teacher/attendance/{schedule_id}'),
+    ('user.dashboard', 'user', '/user/dashboard'),
+    ('financial.transactions', 'admin', '/financial/transactions'),
+    ('api.students', 'admin', '/api/students'),
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0
+    # Nearest-rank percentile
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def pick_users():
+    """A user per role, preferring the one with the most data to show"""
+    from app.models.class_model import Class
+    from app.models.schedule import Schedule
+    from app.models.user import User
+
+    users = {role: User.query.filter_by(role=role, is_active=True).order_by(User.id).first()
+             for role in ('admin', 'manager', 'teacher', 'user')}
+
+    busiest_manager = db.session.query(Class.manager_id).filter(Class.manager_id.isnot(None)).group_by(
+        Class.manager_id).order_by(db.func.count(Class.id).desc()).first()
+    if busiest_manager:
+        users['manager'] = db.session.get(User, busiest_manager[0])
+
+    week = calendar_dim.current_week_key()
+    schedule = Schedule.query.filter_by(week_number=week, is_active=True).order_by(Schedule.id).first() \
+        or Schedule.query.order_by(Schedule.id.desc()).first()
+    if schedule:
+        users['teacher'] = schedule.teacher
+    return users, schedule
+
+
+class QueryCounter:
+    """Counts statements executed on the engine while active"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def run_benchmarks(app, iterations=20, warmup=2, only=None):
+    """Time every route in ROUTES; returns the JSON-serialisable report"""
+    users, schedule = pick_users()
+    params = {
+        'schedule_id': schedule.id if schedule else 0,
+        'class_id': schedule.class_id if schedule else 0,
+    }
+    user_ids = {role: user.id for role, user in users.items() if user}
+    engine = db.engine
+
+    # Requests run in a worker thread so each one gets its own app context
+    # (and DB session) instead of reusing the CLI's
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        results = executor.submit(_time_routes, app, engine, user_ids, params,
+                                  iterations, warmup, only).result()
+
+    return {
+        'revision': git_revision(),
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'database': engine.url.get_backend_name(),
+        'python': platform.python_version(),
+        'row_counts': row_counts(),
+        'routes': results,
+    }
+
+
+def _time_routes(app, engine, user_ids, params, iterations, warmup, only):
+    results = {}
+    for name, role, url in ROUTES:
+        if only and name not in only:
+            continue
+        if role not in user_ids:
+            results[name] = {'skipped': f'no {role} user'}
+            continue
+
+        url = url.format(**params)
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_ids[role])
+            session['_fresh'] = True
+
+        for _ in range(warmup):
+            client.get(url)
+
+        timings = []
+        with QueryCounter(engine) as counter:
+            for _ in range(iterations):
+                start = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+        status = response.status_code
+
+        # Memory is measured in a separate pass; tracing skews the timings
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[name] = {
+            'url': url,
+            'role': role,
+            'status': status,
+            'iterations': iterations,
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'mean_ms': round(statistics.fmean(timings), 2),
+            'max_ms': round(max(timings), 2),
+            'queries': round(counter.count / iterations, 1),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+    return results
+
+
+def row_counts():
+    from app.models.attendance import Attendance
+    from app.models.class_model import Class
+    from app.models.schedule import Schedule
+    from app.models.student import Student
+    from app.models.student_schedule import StudentSchedule
+
+    return {model.__tablename__: db.session.query(db.func.count()).select_from(model).scalar()
+            for model in (Class, Student, Schedule, StudentSchedule, Attendance)}
+
+
+def compare_reports(previous, current):
+    """Per-route p95 and query-count deltas between two reports"""
+    rows = []
+    for name, now in current['routes'].items():
+        before = previous.get('routes', {}).get(name)
+        if not before or 'p95_ms' not in before or 'p95_ms' not in now:
+            continue
+        rows.append((name, before['p95_ms'], now['p95_ms'], before['queries'], now['queries']))
+    return rows
+
+
+def save_report(report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,149 @@
+"""
+Running spent totals of budgets (Budget.spent_total).
+
+ORM changes to expenses are applied as deltas in an after_flush hook, in
+the same transaction; the old values come from the attribute history
+(the expense columns use active_history, and deleted expenses are loaded
+before the flush). A budget whose range or category changes is
+recomputed before it is flushed. Set-based updates call
+add_approved_expenses() themselves; anything else that writes expenses
+in bulk should be followed by `flask budget-totals`.
+"""
+
+from sqlalchemy import and_, event, exists, inspect, or_, select
+from sqlalchemy.orm import Session
+from app import db
+
+EXPENSE_FIELDS = ('status', 'amount', 'expense_date', 'category_id')
+BUDGET_FIELDS = ('start_date', 'end_date', 'category_id')
+
+_listening = False
+
+
+def _covers(budgets, expense_date, category_id):
+    """Budgets whose range contains the date and whose category matches (or is any)"""
+    return and_(budgets.c.start_date <= expense_date, budgets.c.end_date >= expense_date,
+                or_(budgets.c.category_id.is_(None), budgets.c.category_id == category_id))
+
+
+def _spent(budgets):
+    """Correlated sum of approved expenses for each budget row"""
+    from app.models.expense import Expense
+
+    expenses = Expense.__table__
+    return select(db.func.coalesce(db.func.sum(expenses.c.amount), 0)).where(
+        expenses.c.status == 'approved',
+        _covers(budgets, expenses.c.expense_date, expenses.c.category_id),
+    ).scalar_subquery()
+
+
+def apply_delta(connection, expense_date, category_id, delta):
+    """Add delta to the running total of every budget covering the expense"""
+    from app.models.expense import Budget
+
+    if not delta or expense_date is None:
+        return
+    budgets = Budget.__table__
+    connection.execute(budgets.update().where(_covers(budgets, expense_date, category_id))
+                       .values(spent_total=budgets.c.spent_total + delta))
+
+
+def add_approved_expenses(connection, expense_ids):
+    """
+    Add newly approved expenses to the budgets covering them with one
+    UPDATE. Returns the number of budgets touched.
+    """
+    from app.models.expense import Budget, Expense
+
+    if not expense_ids:
+        return 0
+    budgets = Budget.__table__
+    expenses = Expense.__table__
+    matching = and_(expenses.c.id.in_(list(expense_ids)), expenses.c.status == 'approved',
+                    _covers(budgets, expenses.c.expense_date, expenses.c.category_id))
+    added = select(db.func.coalesce(db.func.sum(expenses.c.amount), 0)).where(matching).scalar_subquery()
+    result = connection.execute(budgets.update().where(exists().where(matching))
+                                .values(spent_total=budgets.c.spent_total + added))
+    return result.rowcount
+
+
+def recompute(connection, budget_ids=None):
+    """Recompute running totals from the expenses, for some budgets or all of them"""
+    from app.models.expense import Budget
+
+    budgets = Budget.__table__
+    statement = budgets.update().values(spent_total=_spent(budgets))
+    if budget_ids is not None:
+        statement = statement.where(budgets.c.id.in_(list(budget_ids)))
+    return connection.execute(statement).rowcount
+
+
+def _contribution(obj, old):
+    """(date, category_id, amount) an expense adds to budgets before/after the flush, or None"""
+    state = inspect(obj)
+    values = {}
+    for name in EXPENSE_FIELDS:
+        attr = state.attrs[name]
+        history = attr.history
+        values[name] = history.deleted[0] if old and history.deleted else attr.loaded_value
+    if values['status'] != 'approved' or not values['amount']:
+        return None
+    return values['expense_date'], values['category_id'], values['amount']
+
+
+def _register_hooks():
+    global _listening
+    if _listening:
+        return
+    _listening = True
+    from app.models.expense import Budget, Expense
+
+    @event.listens_for(Session, 'before_flush')
+    def recompute_moved_budgets(session, flush_context, instances):
+        with session.no_autoflush:
+            for obj in session.deleted:
+                if isinstance(obj, Expense):
+                    for name in EXPENSE_FIELDS:
+                        getattr(obj, name)  # Load expired values; they are gone after the DELETE
+        for obj in list(session.new) + list(session.dirty):
+            if not isinstance(obj, Budget):
+                continue
+            if obj in session.new or any(inspect(obj).attrs[name].history.has_changes() for name in BUDGET_FIELDS):
+                expenses = Expense.__table__
+                conditions = [expenses.c.status == 'approved',
+                              expenses.c.expense_date >= obj.start_date,
+                              expenses.c.expense_date <= obj.end_date]
+                if obj.category_id is not None:
+                    conditions.append(expenses.c.category_id == obj.category_id)
+                with session.no_autoflush:
+                    obj.spent_total = session.execute(
+                        select(db.func.coalesce(db.func.sum(expenses.c.amount), 0)).where(*conditions)).scalar()
+
+    @event.listens_for(Session, 'after_flush')
+    def apply_expense_deltas(session, flush_context):
+        changes = []
+        for obj in session.new:
+            if isinstance(obj, Expense):
+                changes.append((None, _contribution(obj, old=False)))
+        for obj in session.dirty:
+            if isinstance(obj, Expense) and any(
+                    inspect(obj).attrs[name].history.has_changes() for name in EXPENSE_FIELDS):
+                changes.append((_contribution(obj, old=True), _contribution(obj, old=False)))
+        for obj in session.deleted:
+            if isinstance(obj, Expense):
+                changes.append((_contribution(obj, old=True), None))
+        if not changes:
+            return
+
+        connection = session.connection()
+        for before, after in changes:
+            if before == after:
+                continue
+            if before is not None:
+                apply_delta(connection, before[0], before[1], -before[2])
+            if after is not None:
+                apply_delta(connection, after[0], after[1], after[2])
+
+
+def init_budgets(app):
+    _register_hooks()
@@ -0,0 +1,237 @@
+"""
+Shared calendar: ISO week, term and Vietnamese public holidays of every
+date from 2020 to 2035, computed once per process and mirrored in the
+dim_date table for SQL joins. All week arithmetic in the app goes through
+here; week keys have the Schedule.week_number format (2025-W25).
+"""
+
+import re
+import threading
+from collections import namedtuple
+from datetime import date, timedelta
+from sqlalchemy import select
+from app import db
+from app.utils.lunar import lunar_to_solar
+
+FIRST_DATE = date(2020, 1, 1)
+LAST_DATE = date(2035, 12, 31)
+
+# Tết Nguyên đán holiday: from New Year's Eve through the 4th day
+TET_DAYS = range(-1, 5)
+FIXED_HOLIDAYS = [
+    (1, 1, 'Tết Dương lịch'),
+    (4, 30, 'Ngày Giải phóng miền Nam'),
+    (5, 1, 'Ngày Quốc tế Lao động'),
+    (9, 2, 'Quốc khánh'),
+]
+TERM_NAMES = {'hk1': 'Học kỳ 1', 'hk2': 'Học kỳ 2', 'summer': 'Nghỉ hè'}
+WEEKDAY_NAMES = ['', 'Thứ 2', 'Thứ 3', 'Thứ 4', 'Thứ 5', 'Thứ 6', 'Thứ 7', 'Chủ nhật']
+
+DateInfo = namedtuple('DateInfo', 'date week_key iso_year iso_week weekday year month month_key '
+                                  'school_year term is_weekend is_holiday holiday_name')
+
+_WEEK_KEY = re.compile(r'^(\d{4})-W(\d{2})$')
+
+_days = None
+_week_starts = None
+_populated = False
+_lock = threading.Lock()
+
+
+def _holidays(year):
+    """{date: name} of the public holidays in a solar year"""
+    holidays = {date(year, month, day): name for month, day, name in FIXED_HOLIDAYS}
+    for lunar_year in (year - 1, year, year + 1):
+        new_year = lunar_to_solar(1, 1, lunar_year)
+        for offset in TET_DAYS:
+            day = new_year + timedelta(days=offset)
+            if day.year == year:
+                holidays[day] = 'Tết Nguyên đán'
+    hung_kings = lunar_to_solar(10, 3, year)
+    holidays[hung_kings] = 'Giỗ Tổ Hùng Vương'
+    return holidays
+
+
+def _term(day):
+    """(school year, term): HK1 September-January, HK2 February-May, summer June-August"""
+    start_year = day.year if day.month >= 9 else day.year - 1
+    if day.month >= 9 or day.month == 1:
+        term = 'hk1'
+    elif day.month <= 5:
+        term = 'hk2'
+    else:
+        term = 'summer'
+    return f'{start_year}-{start_year + 1}', term
+
+
+def term_bounds(day):
+    """(first, last) date of the term containing a date"""
+    start_year = day.year if day.month >= 9 else day.year - 1
+    _, term = _term(day)
+    if term == 'hk1':
+        return date(start_year, 9, 1), date(start_year + 1, 1, 31)
+    if term == 'hk2':
+        return date(start_year + 1, 2, 1), date(start_year + 1, 5, 31)
+    return date(start_year + 1, 6, 1), date(start_year + 1, 8, 31)
+
+
+def _make(day, holidays):
+    iso_year, iso_week, weekday = day.isocalendar()
+    school_year, term = _term(day)
+    holiday_name = holidays.get(day)
+    return DateInfo(
+        date=day, week_key=f'{iso_year}-W{iso_week:02d}', iso_year=iso_year, iso_week=iso_week,
+        weekday=weekday, year=day.year, month=day.month, month_key=day.strftime('%Y-%m'),
+        school_year=school_year, term=term, is_weekend=weekday >= 6,
+        is_holiday=holiday_name is not None, holiday_name=holiday_name,
+    )
+
+
+def _tables():
+    global _days, _week_starts
+    if _days is None:
+        with _lock:
+            if _days is None:
+                days = {}
+                week_starts = {}
+                for year in range(FIRST_DATE.year, LAST_DATE.year + 1):
+                    holidays = _holidays(year)
+                    day = date(year, 1, 1)
+                    while day.year == year:
+                        item = days[day] = _make(day, holidays)
+                        if item.weekday == 1:
+                            week_starts[item.week_key] = day
+                        day += timedelta(days=1)
+                _week_starts = week_starts
+                _days = days
+    return _days, _week_starts
+
+
+def info(day):
+    """DateInfo of a date (computed on the fly outside 2020-2035)"""
+    days, _ = _tables()
+    item = days.get(day)
+    if item is None:
+        item = _make(day, _holidays(day.year))
+    return item
+
+
+def week_key(day):
+    return info(day).week_key
+
+
+def current_week_key():
+    return week_key(date.today())
+
+
+def parse_week_key(key):
+    """(ISO year, ISO week) of a 'YYYY-Www' key; ValueError if it is not a real week"""
+    match = _WEEK_KEY.match(key or '')
+    if not match:
+        raise ValueError(f'Tuần không hợp lệ: {key}')
+    year, week = int(match.group(1)), int(match.group(2))
+    date.fromisocalendar(year, week, 1)  # Rejects week 53 of 52-week years
+    return year, week
+
+
+def make_week_key(year, week):
+    key = f'{year}-W{week:02d}'
+    parse_week_key(key)
+    return key
+
+
+def week_start(key):
+    """Monday of an ISO week"""
+    _, week_starts = _tables()
+    monday = week_starts.get(key)
+    if monday is None:
+        year, week = parse_week_key(key)
+        monday = date.fromisocalendar(year, week, 1)
+    return monday
+
+
+def week_bounds(key):
+    """(Monday, Sunday) of an ISO week"""
+    monday = week_start(key)
+    return monday, monday + timedelta(days=6)
+
+
+def week_dates(key):
+    monday = week_start(key)
+    return [monday + timedelta(days=offset) for offset in range(7)]
+
+
+def shift_week(key, weeks):
+    """Key of the week `weeks` weeks after (or before, if negative) `key`"""
+    return week_key(week_start(key) + timedelta(weeks=weeks))
+
+
+def weeks_between(start, end):
+    """Keys of the ISO weeks overlapping [start, end], in order"""
+    keys = []
+    monday = start - timedelta(days=start.weekday())
+    while monday <= end:
+        keys.append(week_key(monday))
+        monday += timedelta(weeks=1)
+    return keys
+
+
+def week_label(key, current=False):
+    monday, sunday = week_bounds(key)
+    _, week = parse_week_key(key)
+    suffix = ' - Tuần hiện tại' if current else ''
+    return f"Tuần {week}{suffix} ({monday.strftime('%d/%m')} - {sunday.strftime('%d/%m/%Y')})"
+
+
+def week_choices(first, last, mark_current=False):
+    """[(key, label)] for the weeks from `first` to `last` weeks after the current one"""
+    current = current_week_key()
+    return [(shift_week(current, offset), week_label(shift_week(current, offset), mark_current and offset == 0))
+            for offset in range(first, last + 1)]
+
+
+def month_grid(year, month, weeks=6):
+    """`weeks` rows of 7 DateInfo, starting on the Monday on or before the 1st"""
+    first = date(year, month, 1)
+    start = first - timedelta(days=first.weekday())
+    return [[info(start + timedelta(days=row * 7 + column)) for column in range(7)] for row in range(weeks)]
+
+
+def holidays_between(start, end):
+    day = start
+    found = []
+    while day <= end:
+        item = info(day)
+        if item.is_holiday:
+            found.append(item)
+        day += timedelta(days=1)
+    return found
+
+
+def populate(batch_size=1000):
+    """Insert the dim_date rows that are missing; returns how many were added"""
+    from app.models.dim_date import DimDate
+
+    table = DimDate.__table__
+    days, _ = _tables()
+    existing = {row[0] for row in db.session.execute(select(table.c.date))}
+    rows = [item._asdict() for day, item in sorted(days.items()) if day not in existing]
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(table.insert(), rows[start:start + batch_size])
+    db.session.commit()
+    return len(rows)
+
+
+def ensure_populated():
+    """Fill dim_date on first use in this process if it is incomplete"""
+    global _populated
+    from app.models.dim_date import DimDate
+
+    if _populated:
+        return
+    days, _ = _tables()
+    count = db.session.query(db.func.count(DimDate.date)).filter(
+        DimDate.date >= FIRST_DATE, DimDate.date <= LAST_DATE).scalar()
+    if count < len(days):
+        populate()
+    _populated = True
@@ -0,0 +1,181 @@
+"""
+Holiday and exception calendar applied to schedule reads and writes.
+
+A session is closed when its date is a public holiday (dim_date, unless an
+'open' exception covers the date for its class or the whole center) or
+falls inside a closure of the center or of its class. Make-up sessions are
+ordinary Schedule rows that are never closed.
+
+The exceptions of a week are loaded with one query into a WeekCalendar and
+kept per worker until the calendar_exceptions counter in reference_versions
+moves, so callers check each session in memory instead of querying for it.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import tuple_
+from app import db
+from app.utils import calendar_dim, reference_data
+from app.utils.metrics import record_cache
+
+TABLE = 'calendar_exceptions'
+# Week calendars kept per worker
+CACHE_WEEKS = 256
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+class WeekCalendar:
+    """Closures, holiday openings and make-up sessions of one ISO week"""
+
+    def __init__(self, week_key, rows=()):
+        self.week_key = week_key
+        self.dates = calendar_dim.week_dates(week_key)
+        self.makeups = set()  # Schedule ids
+        self._closed = {}  # date: {class_id or None: reason}
+        self._open = {}  # date: {class_id or None}
+        for kind, start_date, end_date, class_id, schedule_id, reason in rows:
+            if kind == 'makeup':
+                if schedule_id:
+                    self.makeups.add(schedule_id)
+                continue
+            for day in self.dates:
+                if start_date <= day <= end_date:
+                    if kind == 'closure':
+                        self._closed.setdefault(day, {}).setdefault(class_id, reason or 'Nghỉ')
+                    elif kind == 'open':
+                        self._open.setdefault(day, set()).add(class_id)
+
+    def date(self, day_of_week):
+        return self.dates[int(day_of_week) - 1]
+
+    def reason(self, day, class_id=None):
+        """Why a class (or, with None, the whole center) has no sessions on a date; None if open"""
+        closed = self._closed.get(day)
+        if closed:
+            if class_id is not None and class_id in closed:
+                return closed[class_id]
+            if None in closed:
+                return closed[None]
+        item = calendar_dim.info(day)
+        if item.is_holiday:
+            opened = self._open.get(day, ())
+            if None not in opened and class_id not in opened:
+                return item.holiday_name
+        return None
+
+    def closed_on(self, day_of_week, class_id=None):
+        return self.reason(self.date(day_of_week), class_id)
+
+    def is_closed(self, schedule):
+        """Whether a schedule of this week is cancelled by the calendar"""
+        if schedule.id in self.makeups:
+            return False
+        return self.closed_on(schedule.day_of_week, schedule.class_id) is not None
+
+    def closed_pairs(self, class_ids):
+        """[(day_of_week, class_id)] closed this week among some classes"""
+        return [(day_of_week, class_id) for day_of_week in range(1, 8) for class_id in class_ids
+                if self.closed_on(day_of_week, class_id) is not None]
+
+
+def load(week_keys):
+    """{week_key: WeekCalendar}; the weeks missing from the cache are read with one query"""
+    from app.models.calendar_exception import CalendarException
+
+    keys = list(dict.fromkeys(week_keys))
+    version = reference_data.version(TABLE)
+    found = {}
+    with _lock:
+        for key in keys:
+            entry = _cache.get(key)
+            if entry and entry[0] == version:
+                _cache.move_to_end(key)
+                found[key] = entry[1]
+    missing = [key for key in keys if key not in found]
+    record_cache('calendar', not missing)
+    if not missing:
+        return found
+
+    bounds = {key: calendar_dim.week_bounds(key) for key in missing}
+    rows = db.session.query(
+        CalendarException.kind, CalendarException.start_date, CalendarException.end_date,
+        CalendarException.class_id, CalendarException.schedule_id, CalendarException.reason,
+    ).filter(
+        CalendarException.start_date <= max(end for _, end in bounds.values()),
+        CalendarException.end_date >= min(start for start, _ in bounds.values()),
+    ).all()
+    with _lock:
+        for key, (monday, sunday) in bounds.items():
+            calendar = WeekCalendar(key, [row for row in rows if row[1] <= sunday and row[2] >= monday])
+            found[key] = calendar
+            _cache[key] = (version, calendar)
+            _cache.move_to_end(key)
+        while len(_cache) > CACHE_WEEKS:
+            _cache.popitem(last=False)
+    return found
+
+
+def for_week(week_key):
+    return load([week_key])[week_key]
+
+
+def for_date(day):
+    return for_week(calendar_dim.week_key(day))
+
+
+def open_sessions(schedules):
+    """The schedules (of any weeks) the calendar does not cancel"""
+    calendars = load({schedule.week_number for schedule in schedules})
+    return [schedule for schedule in schedules if not calendars[schedule.week_number].is_closed(schedule)]
+
+
+def skip_closed(columns, calendar, class_ids):
+    """SQL condition excluding the (day_of_week, class_id) pairs closed in a week"""
+    pairs = calendar.closed_pairs(class_ids)
+    if not pairs:
+        return db.true()
+    return tuple_(columns.day_of_week, columns.class_id).notin_(pairs)
+
+
+def makeup_ids():
+    """SELECT of the schedule ids that are make-up sessions (not to be copied to other weeks)"""
+    from app.models.calendar_exception import CalendarException
+
+    return db.select(CalendarException.schedule_id).where(
+        CalendarException.kind == 'makeup', CalendarException.schedule_id.isnot(None))
+
+
+def add_makeup(class_id, teacher_id, day, start_time, end_time, created_by, room='', subject='',
+               replaces_date=None, reason=None):
+    """
+    Create a make-up session: the Schedule row of its week with the class's
+    students enrolled, and the exception linking it. Returns the exception.
+    """
+    from app.models.calendar_exception import CalendarException
+    from app.models.schedule import Schedule
+    from app.models.student import Student
+    from app.models.student_schedule import StudentSchedule
+
+    session = 'morning' if start_time.hour < 12 else 'afternoon' if start_time.hour < 18 else 'evening'
+    schedule = Schedule(
+        class_id=class_id, teacher_id=teacher_id, day_of_week=day.isoweekday(), session=session,
+        start_time=start_time, end_time=end_time, subject=subject or '', room=room or '',
+        week_number=calendar_dim.week_key(day), week_created=calendar_dim.current_week_key(),
+        is_active=True, created_at=datetime.utcnow(),
+    )
+    db.session.add(schedule)
+    db.session.flush()
+
+    student_ids = [student_id for (student_id,) in db.session.query(Student.id).filter(
+        Student.class_id == class_id, Student.is_active == True)]
+    db.session.add_all([StudentSchedule(student_id=student_id, schedule_id=schedule.id, is_active=True)
+                        for student_id in student_ids])
+
+    exception = CalendarException(kind='makeup', start_date=day, end_date=day, class_id=class_id,
+                                  schedule_id=schedule.id, replaces_date=replaces_date, reason=reason,
+                                  created_by=created_by, created_at=datetime.utcnow())
+    db.session.add(exception)
+    return exception
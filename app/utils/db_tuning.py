@@ -0,0 +1,139 @@
+"""
+Database engine tuning: SQLite PRAGMAs applied on connect and a
+concurrent-writer benchmark to compare settings
+"""
+
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+
+# Baseline used by the benchmark: SQLite defaults (rollback journal, FULL sync)
+DEFAULT_PRAGMAS = []
+
+
+def sqlite_pragmas(config):
+    """(name, value) PRAGMAs configured for SQLite connections"""
+    return [
+        ('journal_mode', config.get('SQLITE_JOURNAL_MODE', 'WAL')),
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('busy_timeout', config.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        ('mmap_size', config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        ('cache_size', config.get('SQLITE_CACHE_SIZE', -64000)),
+    ]
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run the PRAGMAs on every new DBAPI connection of the engine"""
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def init_db_tuning(app):
+    """Attach the SQLite connect hook when the app runs on SQLite"""
+    from app import db
+
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name == 'sqlite':
+        apply_sqlite_pragmas(engine, sqlite_pragmas(app.config))
+
+
+def benchmark_writes(pragmas, writers=20, submissions=50, rows=30, readers=5, busy_timeout=5.0):
+    """
+    Simulate `writers` teachers saving attendance at the same time on a
+    scratch SQLite file while `readers` report pages query the table.
+    Each submission deletes and re-inserts `rows` attendance rows in one
+    transaction, like teacher.attendance does.
+    """
+    from app.models.attendance import Attendance
+    from app.utils.benchmark import percentile
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    engine = create_engine(f'sqlite:///{path}', connect_args={'timeout': busy_timeout},
+                           pool_size=writers + readers, max_overflow=0)
+    if pragmas:
+        apply_sqlite_pragmas(engine, pragmas)
+    table = Attendance.__table__
+    table.create(engine)
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(writers + readers)
+    done = threading.Event()
+    today = date.today()
+    reads = [0]
+
+    def writer(index):
+        barrier.wait()
+        for n in range(submissions):
+            schedule_id = index * submissions + n
+            payload = [{'schedule_id': schedule_id, 'student_id': s, 'date': today, 'status': 'present'}
+                       for s in range(rows)]
+            start = time.perf_counter()
+            try:
+                with engine.begin() as conn:
+                    conn.execute(table.delete().where(table.c.schedule_id == schedule_id, table.c.date == today))
+                    conn.execute(table.insert(), payload)
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+            except OperationalError as e:
+                with lock:
+                    errors.append(str(e.orig))
+
+    def reader():
+        barrier.wait()
+        while not done.is_set():
+            try:
+                with engine.connect() as conn:
+                    conn.execute(table.select().where(table.c.status == 'present').limit(500)).fetchall()
+                with lock:
+                    reads[0] += 1
+            except OperationalError as e:
+                with lock:
+                    errors.append(str(e.orig))
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    started = time.perf_counter()
+    for thread in threads + reader_threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    for thread in reader_threads:
+        thread.join()
+
+    with engine.connect() as conn:
+        journal_mode = conn.exec_driver_sql('PRAGMA journal_mode').scalar()
+    engine.dispose()
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    return {
+        'journal_mode': journal_mode,
+        'writers': writers,
+        'submissions': len(latencies),
+        'reads': reads[0],
+        'errors': len(errors),
+        'error_sample': errors[0] if errors else None,
+        'seconds': round(elapsed, 2),
+        'submissions_per_second': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'p50_ms': round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+    }
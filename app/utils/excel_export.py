@@ -1,8 +1,11 @@
 import io
-from flask import make_response
+import tempfile
+from flask import make_response, Response
 from datetime import datetime
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
 import urllib.parse
 
 def create_excel_response(data, filename, sheet_name='Sheet1'):
@@ -92,6 +95,59 @@ def create_excel_response(data, filename, sheet_name='Sheet1'):
         print(f"Error creating Excel file: {str(e)}")
         return None
 
+def create_streaming_excel_response(headers, rows, filename, sheet_name='Sheet1', column_widths=None):
+    """
+    Create a streamed .xlsx response from an iterable of row lists.
+
+    Uses openpyxl's write-only mode so rows are written as they are
+    produced instead of building every cell in memory, then streams the
+    finished file in chunks.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_name[:31])
+
+    if column_widths:
+        for index, width in enumerate(column_widths, start=1):
+            ws.column_dimensions[get_column_letter(index)].width = width
+
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    header_alignment = Alignment(horizontal="center", vertical="center")
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    for row in rows:
+        ws.append(row)
+
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+
+    def generate():
+        try:
+            while True:
+                chunk = output.read(64 * 1024)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            output.close()
+
+    if not filename.endswith('.xlsx'):
+        filename += '.xlsx'
+    encoded_filename = urllib.parse.quote(filename.encode('utf-8'))
+
+    response = Response(generate(), mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    response.headers['Content-Disposition'] = f'attachment; filename*=UTF-8\'\'{encoded_filename}'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 def export_users_to_excel(users):
     """
     Export users data to Excel
@@ -0,0 +1,174 @@
+"""
+Keyset (cursor) pagination on (sort column, id).
+
+Pages are fetched with WHERE (sort, id) < (last sort, last id) instead of
+OFFSET, so page 500 costs the same as page 1, and no COUNT(*) over the
+whole filtered set is needed. Cursors are signed, opaque tokens.
+"""
+
+from datetime import date, datetime
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import and_, or_
+from app import db
+
+# Rows counted at most for the estimated total on databases without a planner estimate
+COUNT_CAP = 1000
+MAX_PER_PAGE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='keyset-cursor')
+
+
+def _dump_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _load_value(column, value):
+    python_type = column.type.python_type
+    if value is None:
+        return None
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(direction, sort_value, row_id):
+    return _serializer().dumps([direction, _dump_value(sort_value), row_id])
+
+
+def decode_cursor(token, sort_column):
+    """(direction, sort value, id) from a cursor token; raises InvalidCursor"""
+    try:
+        direction, value, row_id = _serializer().loads(token)
+        if direction not in ('next', 'prev'):
+            raise ValueError(direction)
+        return direction, _load_value(sort_column, value), int(row_id)
+    except (BadSignature, TypeError, ValueError) as e:
+        raise InvalidCursor('Cursor không hợp lệ') from e
+
+
+class KeysetPage:
+    """One page of rows plus the cursors of its neighbours"""
+
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None, total=None, total_is_estimate=False):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+        self.total_is_estimate = total_is_estimate
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    @property
+    def total_display(self):
+        if self.total is None:
+            return ''
+        text = f'{self.total:,}'.replace(',', '.')
+        return f'{text}+' if self.total_is_estimate else text
+
+    def to_dict(self, serialize):
+        return {
+            'items': [serialize(item) for item in self.items],
+            'per_page': self.per_page,
+            'next_cursor': self.next_cursor,
+            'prev_cursor': self.prev_cursor,
+            'total': self.total,
+            'total_is_estimate': self.total_is_estimate,
+        }
+
+
+def estimate_total(query, cap=COUNT_CAP):
+    """
+    (total, is_estimate) for a filtered query without counting every row.
+    PostgreSQL uses the planner's row estimate; other databases count at
+    most `cap` rows, so a large set shows as "1.000+".
+    """
+    bind = db.session.get_bind()
+    statement = query.order_by(None).statement
+    if bind.dialect.name == 'postgresql':
+        compiled = statement.compile(dialect=bind.dialect)
+        plan = db.session.connection().exec_driver_sql(
+            f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params).scalar()
+        return int(plan[0]['Plan']['Plan Rows']), True
+
+    limited = statement.limit(cap + 1).subquery()
+    count = db.session.query(db.func.count()).select_from(limited).scalar()
+    if count > cap:
+        return cap, True
+    return count, False
+
+
+def keyset_paginate(query, sort_column, cursor=None, per_page=20, descending=True, id_column=None, with_total=True):
+    """
+    Page through `query` (without its own ORDER BY) by (sort_column, id).
+    `cursor` is a token from a previous page's next_cursor/prev_cursor.
+    Raises InvalidCursor for a tampered or malformed token.
+    """
+    if id_column is None:
+        id_column = query.column_descriptions[0]['entity'].id
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+
+    direction, key = 'next', None
+    if cursor:
+        direction, sort_value, row_id = decode_cursor(cursor, sort_column)
+        key = (sort_value, row_id)
+    backwards = direction == 'prev'
+    # Walking backwards reverses the order, then the page is flipped back
+    newest_first = descending != backwards
+
+    page_query = query
+    if key:
+        sort_value, row_id = key
+        if newest_first:
+            page_query = page_query.filter(or_(
+                sort_column < sort_value, and_(sort_column == sort_value, id_column < row_id)))
+        else:
+            page_query = page_query.filter(or_(
+                sort_column > sort_value, and_(sort_column == sort_value, id_column > row_id)))
+    if newest_first:
+        page_query = page_query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        page_query = page_query.order_by(sort_column.asc(), id_column.asc())
+
+    rows = page_query.limit(per_page + 1).all()
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    has_next = True if backwards else more
+    has_prev = more if backwards else key is not None
+
+    def row_key(row):
+        return getattr(row, sort_column.key), getattr(row, id_column.key)
+
+    next_cursor = encode_cursor('next', *row_key(rows[-1])) if rows and has_next else None
+    prev_cursor = encode_cursor('prev', *row_key(rows[0])) if rows and has_prev else None
+
+    total, is_estimate = estimate_total(query) if with_total else (None, False)
+    return KeysetPage(rows, per_page, next_cursor, prev_cursor, total, is_estimate)
+
+
+def paginate_view(query, sort_column, args, **kwargs):
+    """keyset_paginate for HTML list views: a stale or bad cursor shows the first page"""
+    try:
+        return keyset_paginate(query, sort_column, cursor=args.get('cursor'), **kwargs)
+    except InvalidCursor:
+        return keyset_paginate(query, sort_column, **kwargs)
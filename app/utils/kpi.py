@@ -0,0 +1,183 @@
+"""
+Dashboard KPIs computed with one conditional-aggregation query per
+dashboard and cached per month.
+
+Entries are dropped after a commit that touches the rows behind them
+(same process) and expire after KPI_CACHE_TTL seconds (other workers).
+"""
+
+import threading
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+from flask import current_app
+from sqlalchemy import and_, case, event, inspect, literal, null, select, union_all
+from sqlalchemy.orm import Session
+from app import db
+from app.utils.metrics import record_cache
+
+CategoryTotal = namedtuple('CategoryTotal', 'name color total')
+
+_cache = {}
+_lock = threading.Lock()
+_listening = False
+
+
+def month_bounds(day):
+    start = day.replace(day=1)
+    return start, (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _month_key(day):
+    return day.strftime('%Y-%m')
+
+
+def _cached(dashboard, month_start, compute):
+    key = (dashboard, _month_key(month_start))
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(key)
+    if entry and entry[0] > now:
+        record_cache('kpi', True)
+        return entry[1]
+    record_cache('kpi', False)
+
+    value = compute(month_start)
+    with _lock:
+        _cache[key] = (now + current_app.config.get('KPI_CACHE_TTL', 300), value)
+    return value
+
+
+def invalidate(dashboard, months=None):
+    """Drop cached KPIs of a dashboard, for some 'YYYY-MM' months or all of them"""
+    with _lock:
+        for key in [k for k in _cache if k[0] == dashboard and (months is None or k[1] in months)]:
+            del _cache[key]
+
+
+def clear_kpi_cache():
+    with _lock:
+        _cache.clear()
+
+
+def _financial_kpis(month_start):
+    from app.models.financial_transaction import FinancialTransaction, DonationAsset
+
+    start, end = month_bounds(month_start)
+    ft = FinancialTransaction.__table__
+    assets = DonationAsset.__table__
+    zero = literal(0)
+
+    # Per-category income/expense of the month, plus one row of asset counts
+    by_category = select(
+        literal('category').label('section'),
+        ft.c.category.label('category'),
+        db.func.sum(case((ft.c.transaction_type == 'income', ft.c.amount), else_=zero)).label('v1'),
+        db.func.sum(case((ft.c.transaction_type == 'expense', ft.c.amount), else_=zero)).label('v2'),
+        zero.label('v3'),
+    ).where(
+        ft.c.transaction_date >= start, ft.c.transaction_date < end, ft.c.status == 'approved'
+    ).group_by(ft.c.category)
+    asset_counts = select(
+        literal('assets'),
+        null(),
+        db.func.count(),
+        db.func.sum(case((assets.c.status == 'distributed', 1), else_=0)),
+        db.func.sum(case((assets.c.status == 'received', 1), else_=0)),
+    )
+
+    kpis = {
+        'monthly_income': 0, 'monthly_expense': 0, 'donation_expense': 0,
+        'total_assets': 0, 'distributed_assets': 0, 'available_assets': 0,
+        'income_stats': [], 'expense_stats': [],
+    }
+    for section, category, v1, v2, v3 in db.session.execute(union_all(by_category, asset_counts)):
+        if section == 'assets':
+            kpis['total_assets'] = int(v1 or 0)
+            kpis['distributed_assets'] = int(v2 or 0)
+            kpis['available_assets'] = int(v3 or 0)
+            continue
+        if v1:
+            kpis['income_stats'].append((category, v1))
+            kpis['monthly_income'] += v1
+        if v2:
+            kpis['expense_stats'].append((category, v2))
+            kpis['monthly_expense'] += v2
+            if category == 'donation':
+                kpis['donation_expense'] += v2
+    kpis['net_income'] = kpis['monthly_income'] - kpis['monthly_expense']
+    return kpis
+
+
+def _expense_kpis(month_start):
+    from app.models.expense import Expense, ExpenseCategory
+
+    start, end = month_bounds(month_start)
+    in_month = and_(Expense.status == 'approved', Expense.expense_date >= start, Expense.expense_date < end)
+    rows = db.session.query(
+        ExpenseCategory.name,
+        ExpenseCategory.color,
+        ExpenseCategory.is_active,
+        db.func.sum(case((in_month, Expense.amount))),
+        db.func.sum(case((Expense.status == 'pending', 1), else_=0)),
+    ).outerjoin(Expense, Expense.category_id == ExpenseCategory.id).group_by(ExpenseCategory.id).all()
+
+    category_stats = [CategoryTotal(name, color, total) for name, color, _, total, _ in rows if total is not None]
+    return {
+        'monthly_expenses': sum(stat.total for stat in category_stats) or 0,
+        'pending_count': sum(int(pending or 0) for *_, pending in rows),
+        'categories_count': sum(1 for row in rows if row[2]),
+        'category_stats': category_stats,
+    }
+
+
+def financial_kpis(month_start=None):
+    """Figures of financial.dashboard for the month containing month_start"""
+    return _cached('financial', month_start or date.today(), _financial_kpis)
+
+
+def expense_kpis(month_start=None):
+    """Figures of expense.dashboard for the month containing month_start"""
+    return _cached('expense', month_start or date.today(), _expense_kpis)
+
+
+def _changed_months(obj, attr):
+    """Months of the old and new value of a date attribute"""
+    history = inspect(obj).attrs[attr].history
+    values = list(history.added or ()) + list(history.deleted or ()) + list(history.unchanged or ())
+    return {_month_key(value) for value in values if value}
+
+
+def _register_invalidation():
+    global _listening
+    if _listening:
+        return
+    _listening = True
+    from app.models.expense import Expense, ExpenseCategory
+    from app.models.financial_transaction import FinancialTransaction, DonationAsset
+
+    @event.listens_for(Session, 'after_flush')
+    def collect_stale_kpis(session, flush_context):
+        stale = session.info.setdefault('stale_kpis', set())
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(obj, FinancialTransaction):
+                # No loaded date (e.g. an expired row being deleted): drop every month
+                months = _changed_months(obj, 'transaction_date') or {None}
+                stale.update(('financial', month) for month in months)
+            elif isinstance(obj, DonationAsset):
+                stale.add(('financial', None))  # Asset counts are not per month
+            elif isinstance(obj, (Expense, ExpenseCategory)):
+                stale.add(('expense', None))  # Pending and category counts are not per month
+
+    @event.listens_for(Session, 'after_commit')
+    def drop_stale_kpis(session):
+        for dashboard, month in session.info.pop('stale_kpis', ()):
+            invalidate(dashboard, None if month is None else {month})
+
+    @event.listens_for(Session, 'after_rollback')
+    def forget_stale_kpis(session):
+        session.info.pop('stale_kpis', None)
+
+
+def init_kpis(app):
+    _register_invalidation()
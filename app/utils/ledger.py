@@ -0,0 +1,250 @@
+"""
+Unified ledger: keeps ledger_entries in step with the four money models.
+
+An after_flush hook appends entries in the same transaction as the
+change to Finance, FinancialTransaction, Expense or DonationRecord.
+Only effective money is recorded: approved transactions and expenses,
+completed donation records with an amount, and every Finance row.
+Bulk query.update()/delete() bypass the hook; run `flask ledger-backfill`
+afterwards (it only appends what is missing, so it is safe to repeat).
+"""
+
+from decimal import Decimal
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app import db
+
+CENTS = Decimal('0.01')
+GROUP_COLUMNS = ('period', 'entry_type', 'category', 'class_id', 'source')
+
+_listening = False
+
+
+def _money(value):
+    return Decimal(str(value)).quantize(CENTS)
+
+
+def _sources():
+    """model class: (source name, function returning the effective entry or None)"""
+    from app.models.expense import Expense
+    from app.models.finance import Finance
+    from app.models.financial_transaction import FinancialTransaction, DonationRecord
+
+    def finance(row, categories):
+        return _entry(row.type, row.amount, row.transaction_date, row.category, row.class_id, row.description)
+
+    def financial_transaction(row, categories):
+        if (row.status or 'approved') != 'approved':
+            return None
+        return _entry(row.transaction_type, row.amount, row.transaction_date, row.category, None, row.title)
+
+    def expense(row, categories):
+        if row.status != 'approved':
+            return None
+        return _entry('expense', row.amount, row.expense_date, categories.get(row.category_id), None, row.title)
+
+    def donation_record(row, categories):
+        if (row.status or 'completed') != 'completed' or row.amount is None:
+            return None  # In-kind donations carry no money
+        entry_type = 'income' if row.record_type == 'received' else 'expense'
+        return _entry(entry_type, row.amount, row.transaction_date, row.category, None, row.title)
+
+    return {
+        Finance: ('finance', finance),
+        FinancialTransaction: ('financial_transaction', financial_transaction),
+        Expense: ('expense', expense),
+        DonationRecord: ('donation_record', donation_record),
+    }
+
+
+def _entry(entry_type, amount, entry_date, category, class_id, description):
+    if amount is None or entry_date is None:
+        return None
+    return {
+        'entry_type': 'income' if entry_type == 'income' else 'expense',
+        'amount': _money(amount),
+        'entry_date': entry_date,
+        'period': entry_date.strftime('%Y-%m'),
+        'category': category,
+        'class_id': class_id,
+        'description': (description or '')[:200] or None,
+    }
+
+
+def _same(current, target):
+    fields = ('entry_type', 'amount', 'entry_date', 'category', 'class_id')
+    return all(_money(current[f]) == target[f] if f == 'amount' else current[f] == target[f] for f in fields)
+
+
+def _category_names(connection, category_ids):
+    from app.models.expense import ExpenseCategory
+
+    ids = {category_id for category_id in category_ids if category_id is not None}
+    if not ids:
+        return {}
+    table = ExpenseCategory.__table__
+    return dict(connection.execute(select(table.c.id, table.c.name).where(table.c.id.in_(ids))).all())
+
+
+def current_entries(connection, source, source_ids):
+    """{source_id: latest entry mapping} for source rows whose money is still in the ledger"""
+    from app.models.ledger import LedgerEntry
+
+    table = LedgerEntry.__table__
+    latest = select(db.func.max(table.c.id)).where(
+        table.c.source == source, table.c.source_id.in_(list(source_ids))).group_by(table.c.source_id)
+    rows = connection.execute(select(table).where(table.c.id.in_(latest))).mappings()
+    # A reversal as the latest entry means the row currently contributes nothing
+    return {row['source_id']: row for row in rows if row['reverses_id'] is None}
+
+
+def plan_entries(source, current, targets):
+    """Rows to append so the ledger matches `targets` ({source_id: entry or None})"""
+    rows = []
+    for source_id, target in targets.items():
+        existing = current.get(source_id)
+        if existing is not None and target is not None and _same(existing, target):
+            continue
+        if existing is not None:
+            reversal = {key: existing[key] for key in
+                        ('entry_type', 'entry_date', 'period', 'category', 'class_id', 'description')}
+            reversal.update(source=source, source_id=source_id, amount=-_money(existing['amount']),
+                            reverses_id=existing['id'])
+            rows.append(reversal)
+        if target is not None:
+            rows.append(dict(target, source=source, source_id=source_id, reverses_id=None))
+    return rows
+
+
+def _append(connection, rows):
+    from app.models.ledger import LedgerEntry
+
+    if rows:
+        connection.execute(LedgerEntry.__table__.insert(), rows)
+    return len(rows)
+
+
+def sync_rows(connection, model, rows_by_id, known_new=()):
+    """
+    Append the entries needed for the given source rows. `rows_by_id`
+    maps id to the model instance, or None when the row was deleted.
+    """
+    source, effective = _sources()[model]
+    categories = _category_names(connection, [getattr(row, 'category_id', None)
+                                              for row in rows_by_id.values() if row is not None])
+    targets = {row_id: effective(row, categories) if row is not None else None
+               for row_id, row in rows_by_id.items()}
+    existing_ids = [row_id for row_id in rows_by_id if row_id not in known_new]
+    current = current_entries(connection, source, existing_ids) if existing_ids else {}
+    return _append(connection, plan_entries(source, current, targets))
+
+
+def _register_hooks():
+    global _listening
+    if _listening:
+        return
+    _listening = True
+    models = tuple(_sources())
+
+    @event.listens_for(Session, 'after_flush')
+    def record_ledger_entries(session, flush_context):
+        changed = {}
+        new_ids = set()
+        for obj in session.new:
+            if isinstance(obj, models):
+                changed.setdefault(type(obj), {})[obj.id] = obj
+                new_ids.add((type(obj), obj.id))
+        for obj in session.dirty:
+            if isinstance(obj, models) and session.is_modified(obj, include_collections=False):
+                changed.setdefault(type(obj), {})[obj.id] = obj
+        for obj in session.deleted:
+            if isinstance(obj, models):
+                changed.setdefault(type(obj), {})[obj.id] = None
+        if not changed:
+            return
+
+        connection = session.connection()
+        for model, rows_by_id in changed.items():
+            known_new = {row_id for (m, row_id) in new_ids if m is model}
+            sync_rows(connection, model, rows_by_id, known_new)
+
+
+def init_ledger(app):
+    _register_hooks()
+
+
+def backfill(batch_size=1000, echo=None):
+    """
+    Bring the ledger in line with the source tables: entries for rows that
+    have none (or changed outside the ORM), reversals for deleted rows.
+    Returns {source: entries appended}.
+    """
+    from app.models.ledger import LedgerEntry
+
+    ledger = LedgerEntry.__table__
+    appended = {}
+    for model, (source, _) in _sources().items():
+        total = 0
+        last_id = 0
+        while True:
+            rows = model.query.filter(model.id > last_id).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            total += sync_rows(db.session.connection(), model, {row.id: row for row in rows})
+            db.session.commit()
+            db.session.expunge_all()
+
+        # Ledger entries whose source row no longer exists
+        orphan_ids = [source_id for (source_id,) in db.session.execute(
+            select(ledger.c.source_id).where(
+                ledger.c.source == source,
+                ledger.c.source_id.not_in(select(model.__table__.c.id))).distinct())]
+        for start in range(0, len(orphan_ids), batch_size):
+            chunk = orphan_ids[start:start + batch_size]
+            total += sync_rows(db.session.connection(), model, dict.fromkeys(chunk))
+            db.session.commit()
+
+        appended[source] = total
+        if echo:
+            echo(f'{source}: {total} entries appended')
+    return appended
+
+
+def cash_flow(start_date, end_date, group_by=('period', 'entry_type'), class_ids=None, sources=None):
+    """
+    Sum of ledger amounts between two dates (inclusive), grouped by any of
+    period, entry_type, category, class_id and source, in one query
+    """
+    from app.models.ledger import LedgerEntry
+
+    unknown = [name for name in group_by if name not in GROUP_COLUMNS]
+    if unknown:
+        raise ValueError(f'Không thể nhóm theo: {", ".join(unknown)}')
+
+    columns = [getattr(LedgerEntry, name) for name in group_by]
+    query = db.session.query(*columns, db.func.sum(LedgerEntry.amount), db.func.count(LedgerEntry.id)).filter(
+        LedgerEntry.entry_date >= start_date, LedgerEntry.entry_date <= end_date)
+    if class_ids is not None:
+        query = query.filter(LedgerEntry.class_id.in_(class_ids))
+    if sources:
+        query = query.filter(LedgerEntry.source.in_(sources))
+    if columns:
+        query = query.group_by(*columns).order_by(*columns)
+
+    results = []
+    for row in query:
+        item = dict(zip(group_by, row[:len(group_by)]))
+        item['total'] = float(row[-2] or 0)
+        item['entries'] = row[-1]
+        results.append(item)
+    return results
+
+
+def totals(start_date, end_date, class_ids=None):
+    """{'income': ..., 'expense': ..., 'net': ...} for the period"""
+    by_type = {row['entry_type']: row['total'] for row in
+               cash_flow(start_date, end_date, group_by=('entry_type',), class_ids=class_ids)}
+    income = by_type.get('income', 0.0)
+    expense = by_type.get('expense', 0.0)
+    return {'income': income, 'expense': expense, 'net': income - expense}
@@ -0,0 +1,196 @@
+"""
+Filtered list queries shared by the HTML list views and the JSON list API,
+with the keyset sort column and a JSON serializer for each list
+"""
+
+from datetime import datetime
+from sqlalchemy import or_
+
+
+def _date_arg(args, name):
+    return datetime.strptime(args.get(name), '%Y-%m-%d').date() if args.get(name) else None
+
+
+def transactions_query(args):
+    from app.models.financial_transaction import FinancialTransaction
+
+    query = FinancialTransaction.query
+    start_date = _date_arg(args, 'start_date')
+    if start_date:
+        query = query.filter(FinancialTransaction.transaction_date >= start_date)
+    end_date = _date_arg(args, 'end_date')
+    if end_date:
+        query = query.filter(FinancialTransaction.transaction_date <= end_date)
+    if args.get('transaction_type'):
+        query = query.filter(FinancialTransaction.transaction_type == args.get('transaction_type'))
+    if args.get('category'):
+        query = query.filter(FinancialTransaction.category == args.get('category'))
+
+    search = args.get('search', '')
+    if search:
+        query = query.filter(or_(
+            FinancialTransaction.title.contains(search),
+            FinancialTransaction.description.contains(search),
+            FinancialTransaction.vendor_payer.contains(search)
+        ))
+    return query, FinancialTransaction.transaction_date
+
+
+def donations_query(args):
+    from app.models.financial_transaction import DonationAsset
+
+    query = DonationAsset.query
+    if args.get('status'):
+        query = query.filter(DonationAsset.status == args.get('status'))
+    if args.get('category'):
+        query = query.filter(DonationAsset.category == args.get('category'))
+
+    search = args.get('search', '')
+    if search:
+        query = query.filter(or_(
+            DonationAsset.asset_name.contains(search),
+            DonationAsset.description.contains(search),
+            DonationAsset.donor_name.contains(search)
+        ))
+    return query, DonationAsset.donation_date
+
+
+def donation_records_query(args):
+    from app.models.financial_transaction import DonationRecord
+
+    query = DonationRecord.query
+    if args.get('record_type'):
+        query = query.filter(DonationRecord.record_type == args.get('record_type'))
+    if args.get('category'):
+        query = query.filter(DonationRecord.category == args.get('category'))
+
+    search = args.get('search', '')
+    if search:
+        query = query.filter(or_(
+            DonationRecord.title.contains(search),
+            DonationRecord.description.contains(search),
+            DonationRecord.donor_name.contains(search),
+            DonationRecord.recipient_name.contains(search)
+        ))
+    return query, DonationRecord.transaction_date
+
+
+def expenses_query(args):
+    from app.models.expense import Expense
+
+    query = Expense.query
+    start_date = _date_arg(args, 'start_date')
+    if start_date:
+        query = query.filter(Expense.expense_date >= start_date)
+    end_date = _date_arg(args, 'end_date')
+    if end_date:
+        query = query.filter(Expense.expense_date <= end_date)
+    if args.get('category_id', type=int):
+        query = query.filter(Expense.category_id == args.get('category_id', type=int))
+    if args.get('status'):
+        query = query.filter(Expense.status == args.get('status'))
+    if args.get('payment_method'):
+        query = query.filter(Expense.payment_method == args.get('payment_method'))
+
+    search = args.get('search', '')
+    if search:
+        query = query.filter(or_(
+            Expense.title.contains(search),
+            Expense.description.contains(search),
+            Expense.vendor.contains(search)
+        ))
+    return query, Expense.expense_date
+
+
+def students_query(args):
+    from app.models.student import Student
+
+    query = Student.query.filter_by(is_active=True)
+    if args.get('class_id', type=int):
+        query = query.filter(Student.class_id == args.get('class_id', type=int))
+
+    search = args.get('search', '')
+    if search:
+        query = query.filter(or_(
+            Student.full_name.contains(search),
+            Student.student_code.contains(search)
+        ))
+    return query, Student.full_name
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def serialize_transaction(t):
+    return {
+        'id': t.id,
+        'title': t.title,
+        'amount': float(t.amount),
+        'transaction_date': _iso(t.transaction_date),
+        'transaction_type': t.transaction_type,
+        'category': t.category,
+        'payment_method': t.payment_method,
+        'vendor_payer': t.vendor_payer,
+        'status': t.status,
+    }
+
+
+def serialize_donation(d):
+    return {
+        'id': d.id,
+        'asset_name': d.asset_name,
+        'category': d.category,
+        'quantity': d.quantity,
+        'donor_name': d.donor_name,
+        'donation_date': _iso(d.donation_date),
+        'status': d.status,
+    }
+
+
+def serialize_donation_record(r):
+    return {
+        'id': r.id,
+        'title': r.title,
+        'record_type': r.record_type,
+        'category': r.category,
+        'amount': float(r.amount) if r.amount is not None else None,
+        'donor_name': r.donor_name,
+        'recipient_name': r.recipient_name,
+        'transaction_date': _iso(r.transaction_date),
+        'status': r.status,
+    }
+
+
+def serialize_expense(e):
+    return {
+        'id': e.id,
+        'title': e.title,
+        'amount': float(e.amount),
+        'expense_date': _iso(e.expense_date),
+        'category_id': e.category_id,
+        'vendor': e.vendor,
+        'payment_method': e.payment_method,
+        'status': e.status,
+    }
+
+
+def serialize_student(s):
+    return {
+        'id': s.id,
+        'student_code': s.student_code,
+        'full_name': s.full_name,
+        'class_id': s.class_id,
+        'parent_name': s.parent_name,
+        'parent_phone': s.parent_phone,
+    }
+
+
+# name: (query builder, serializer, newest first)
+LISTS = {
+    'transactions': (transactions_query, serialize_transaction, True),
+    'donations': (donations_query, serialize_donation, True),
+    'donation-records': (donation_records_query, serialize_donation_record, True),
+    'expenses': (expenses_query, serialize_expense, True),
+    'students': (students_query, serialize_student, False),
+}
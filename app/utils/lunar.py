@@ -0,0 +1,106 @@
+"""
+Vietnamese lunar calendar (UTC+7) to solar date conversion, after Hồ Ngọc
+Đức's astronomical algorithm. Only what the holiday calendar needs.
+"""
+
+import math
+from datetime import date
+
+TIME_ZONE = 7
+_JD_OFFSET = 1721425  # Julian day number of date.fromordinal(0)
+
+
+def _new_moon(k):
+    """Julian day of the k-th new moon after 1900-01-01"""
+    t = k / 1236.85
+    t2 = t * t
+    t3 = t2 * t
+    dr = math.pi / 180
+    jd1 = 2415020.75933 + 29.53058868 * k + 0.0001178 * t2 - 0.000000155 * t3
+    jd1 += 0.00033 * math.sin((166.56 + 132.87 * t - 0.009173 * t2) * dr)
+    m = 359.2242 + 29.10535608 * k - 0.0000333 * t2 - 0.00000347 * t3
+    mpr = 306.0253 + 385.81691806 * k + 0.0107306 * t2 + 0.00001236 * t3
+    f = 21.2964 + 390.67050646 * k - 0.0016528 * t2 - 0.00000239 * t3
+    c1 = (0.1734 - 0.000393 * t) * math.sin(m * dr) + 0.0021 * math.sin(2 * dr * m)
+    c1 = c1 - 0.4068 * math.sin(mpr * dr) + 0.0161 * math.sin(dr * 2 * mpr)
+    c1 = c1 - 0.0004 * math.sin(dr * 3 * mpr)
+    c1 = c1 + 0.0104 * math.sin(dr * 2 * f) - 0.0051 * math.sin(dr * (m + mpr))
+    c1 = c1 - 0.0074 * math.sin(dr * (m - mpr)) + 0.0004 * math.sin(dr * (2 * f + m))
+    c1 = c1 - 0.0004 * math.sin(dr * (2 * f - m)) - 0.0006 * math.sin(dr * (2 * f + mpr))
+    c1 = c1 + 0.0010 * math.sin(dr * (2 * f - mpr)) + 0.0005 * math.sin(dr * (2 * mpr + m))
+    if t < -11:
+        delta_t = 0.001 + 0.000839 * t + 0.0002261 * t2 - 0.00000845 * t3 - 0.000000081 * t * t3
+    else:
+        delta_t = -0.000278 + 0.000265 * t + 0.000262 * t2
+    return jd1 + c1 - delta_t
+
+
+def _sun_longitude(jdn):
+    """Sun's true longitude in radians, normalized to [0, 2*pi)"""
+    t = (jdn - 2451545.0) / 36525
+    t2 = t * t
+    dr = math.pi / 180
+    m = 357.52910 + 35999.05030 * t - 0.0001559 * t2 - 0.00000048 * t * t2
+    l0 = 280.46645 + 36000.76983 * t + 0.0003032 * t2
+    dl = (1.914600 - 0.004817 * t - 0.000014 * t2) * math.sin(dr * m)
+    dl += (0.019993 - 0.000101 * t) * math.sin(dr * 2 * m) + 0.000290 * math.sin(dr * 3 * m)
+    longitude = (l0 + dl) * dr
+    return longitude - math.pi * 2 * math.floor(longitude / (math.pi * 2))
+
+
+def _sun_sector(day_number):
+    """Which of the 12 solar-term sectors the sun is in at local midnight"""
+    return math.floor(_sun_longitude(day_number - 0.5 - TIME_ZONE / 24) / math.pi * 6)
+
+
+def _new_moon_day(k):
+    return math.floor(_new_moon(k) + 0.5 + TIME_ZONE / 24)
+
+
+def _lunar_month_11(year):
+    """Julian day on which lunar month 11 (containing the winter solstice) of `year` starts"""
+    off = date(year, 12, 31).toordinal() + _JD_OFFSET - 2415021
+    k = math.floor(off / 29.530588853)
+    new_moon = _new_moon_day(k)
+    if _sun_sector(new_moon) >= 9:
+        new_moon = _new_moon_day(k - 1)
+    return new_moon
+
+
+def _leap_month_offset(a11):
+    k = math.floor((a11 - 2415021.076998695) / 29.530588853 + 0.5)
+    i = 1
+    arc = _sun_sector(_new_moon_day(k + i))
+    while True:
+        last = arc
+        i += 1
+        arc = _sun_sector(_new_moon_day(k + i))
+        if arc == last or i >= 14:
+            return i - 1
+
+
+def lunar_to_solar(day, month, year, leap=False):
+    """Solar date of a lunar date; ValueError for a leap month that does not exist"""
+    if month < 11:
+        a11 = _lunar_month_11(year - 1)
+        b11 = _lunar_month_11(year)
+    else:
+        a11 = _lunar_month_11(year)
+        b11 = _lunar_month_11(year + 1)
+    k = math.floor(0.5 + (a11 - 2415021.076998695) / 29.530588853)
+    off = month - 11
+    if off < 0:
+        off += 12
+    if b11 - a11 > 365:
+        leap_off = _leap_month_offset(a11)
+        leap_month = leap_off - 2
+        if leap_month < 0:
+            leap_month += 12
+        if leap and month != leap_month:
+            raise ValueError(f'Năm âm lịch {year} không có tháng {month} nhuận')
+        if leap or off >= leap_off:
+            off += 1
+    elif leap:
+        raise ValueError(f'Năm âm lịch {year} không có tháng nhuận')
+    month_start = _new_moon_day(k + off)
+    return date.fromordinal(month_start + day - 1 - _JD_OFFSET)
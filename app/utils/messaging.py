@@ -0,0 +1,359 @@
+"""
+Outbound messaging: DB-backed outbox, pluggable gateways and the worker
+that delivers queued messages in rate-limited batches
+"""
+
+import hashlib
+import json
+import os
+import smtplib
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from flask import current_app
+from app import db
+from app.models.outbound_message import OutboundMessage
+
+
+class GatewayError(Exception):
+    """Raised by a gateway when a message could not be delivered"""
+
+
+class MessageGateway:
+    """Base class for delivery gateways (SMS provider, Zalo, email...)"""
+
+    def send(self, message):
+        """Deliver one message dict; raise GatewayError on failure"""
+        raise NotImplementedError
+
+
+class FileGateway(MessageGateway):
+    """Local stand-in that appends every message to a JSON-lines file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        line = json.dumps({
+            'channel': message['channel'],
+            'recipient': message['recipient'],
+            'subject': message['subject'],
+            'body': message['body'],
+            'sent_at': datetime.utcnow().isoformat()
+        }, ensure_ascii=False)
+        try:
+            with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        except OSError as e:
+            raise GatewayError(str(e))
+
+
+class SMTPDebugGateway(MessageGateway):
+    """Local stand-in that sends messages to an SMTP debugging server"""
+
+    def __init__(self, host, port, sender, sms_domain):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.sms_domain = sms_domain
+
+    def send(self, message):
+        recipient = message['recipient']
+        if '@' not in recipient:
+            recipient = f'{recipient}@{self.sms_domain}'
+
+        email = EmailMessage()
+        email['From'] = self.sender
+        email['To'] = recipient
+        email['Subject'] = message['subject'] or 'Thông báo'
+        email.set_content(message['body'])
+        try:
+            with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+                smtp.send_message(email)
+        except (OSError, smtplib.SMTPException) as e:
+            raise GatewayError(str(e))
+
+
+GATEWAYS = {
+    'file': lambda config: FileGateway(
+        config.get('MESSAGE_OUTBOX_FILE') or os.path.join(current_app.instance_path, 'outbox.log')),
+    'smtp_debug': lambda config: SMTPDebugGateway(
+        config.get('MESSAGE_SMTP_HOST', 'localhost'), config.get('MESSAGE_SMTP_PORT', 1025),
+        config.get('MESSAGE_SENDER', 'noreply@qllhttbb.vn'), config.get('MESSAGE_SMS_DOMAIN', 'sms.local')),
+}
+
+
+def get_gateway():
+    """Build the gateway configured by MESSAGE_GATEWAY"""
+    name = current_app.config.get('MESSAGE_GATEWAY', 'file')
+    if name not in GATEWAYS:
+        raise ValueError(f'Unknown message gateway: {name}')
+    if name == 'file':
+        os.makedirs(current_app.instance_path, exist_ok=True)
+    return GATEWAYS[name](current_app.config)
+
+
+class RateLimiter:
+    """Token bucket limiting sends per second for one channel"""
+
+    def __init__(self, rate):
+        self.rate = float(rate)
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def make_dedupe_key(channel, recipient, body, scope):
+    """
+    Identical messages to the same recipient are only queued once per
+    scope (a send date, a campaign...), so a repeated notice still goes
+    out in the next one
+    """
+    payload = f'{scope}|{channel}|{recipient}|{body}'
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def enqueue_messages(messages, created_by=None, scope=None):
+    """
+    Queue message dicts (channel, recipient, body, optional subject,
+    category, student_id, dedupe_scope) in bulk. Duplicates of messages
+    already in the outbox for the same scope are skipped; the scope
+    defaults to today's date. Returns the number of new messages queued.
+    """
+    scope = scope or datetime.now().date().isoformat()
+    rows = {}
+    for message in messages:
+        recipient = (message.get('recipient') or '').strip()
+        if not recipient:
+            continue
+        channel = message.get('channel', 'sms')
+        key = message.get('dedupe_key') or make_dedupe_key(
+            channel, recipient, message['body'], message.get('dedupe_scope') or scope)
+        rows.setdefault(key, {
+            'channel': channel,
+            'recipient': recipient,
+            'subject': message.get('subject'),
+            'body': message['body'],
+            'category': message.get('category'),
+            'student_id': message.get('student_id'),
+            'dedupe_key': key,
+            'status': 'pending',
+            'attempts': 0,
+            'next_attempt_at': datetime.utcnow(),
+            'created_by': created_by,
+            'created_at': datetime.utcnow()
+        })
+
+    keys = list(rows)
+    existing = set()
+    for i in range(0, len(keys), 500):
+        existing.update(k for (k,) in db.session.query(OutboundMessage.dedupe_key).filter(
+            OutboundMessage.dedupe_key.in_(keys[i:i + 500])))
+
+    new_rows = [row for key, row in rows.items() if key not in existing]
+    if new_rows:
+        db.session.execute(OutboundMessage.__table__.insert(), new_rows)
+    db.session.commit()
+    return len(new_rows)
+
+
+def claim_batch(batch_size):
+    """
+    Mark up to batch_size due messages as 'sending' under a new claim
+    token and return them as plain dicts (with the token). The due rows
+    are locked (skipping rows other workers hold, where supported) and
+    the conditional UPDATE keeps concurrent workers from claiming the
+    same rows; the claimed rows are read back by token.
+    """
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=current_app.config.get('MESSAGE_CLAIM_TIMEOUT', 300))
+
+    # Messages left in 'sending' by a crashed worker become due again; the
+    # cleared token stops a slow worker from recording their result later
+    OutboundMessage.query.filter(
+        OutboundMessage.status == 'sending',
+        OutboundMessage.claimed_at < stale_before
+    ).update({'status': 'pending', 'claim_token': None}, synchronize_session=False)
+
+    ids = [row_id for (row_id,) in db.session.query(OutboundMessage.id).filter(
+        OutboundMessage.status == 'pending',
+        OutboundMessage.next_attempt_at <= now
+    ).order_by(OutboundMessage.next_attempt_at, OutboundMessage.id).limit(batch_size).with_for_update(
+        skip_locked=True)]
+
+    if not ids:
+        db.session.commit()
+        return []
+
+    token = uuid.uuid4().hex
+    OutboundMessage.query.filter(
+        OutboundMessage.id.in_(ids),
+        OutboundMessage.status == 'pending'
+    ).update({'status': 'sending', 'claimed_at': now, 'claim_token': token}, synchronize_session=False)
+    db.session.commit()
+
+    claimed = db.session.query(
+        OutboundMessage.id, OutboundMessage.channel, OutboundMessage.recipient,
+        OutboundMessage.subject, OutboundMessage.body, OutboundMessage.attempts,
+        OutboundMessage.claim_token
+    ).filter(
+        OutboundMessage.id.in_(ids),
+        OutboundMessage.claim_token == token
+    ).all()
+    return [row._asdict() for row in claimed]
+
+
+def _backoff(attempts):
+    base = current_app.config.get('MESSAGE_RETRY_BASE_SECONDS', 30)
+    return timedelta(seconds=min(base * (2 ** (attempts - 1)), 6 * 3600))
+
+
+def dispatch_pending(batch_size=100, workers=4, gateway=None):
+    """
+    Deliver one batch of due messages using a thread pool. Sends are
+    rate limited per channel; failures are retried with exponential
+    backoff until MESSAGE_MAX_ATTEMPTS. Returns (sent, failed) counts.
+    """
+    gateway = gateway or get_gateway()
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+
+    limits = current_app.config.get('MESSAGE_RATE_LIMITS', {})
+    limiters = {channel: RateLimiter(limits.get(channel, limits.get('default', 5)))
+                for channel in {m['channel'] for m in batch}}
+
+    def deliver(message):
+        limiters[message['channel']].acquire()
+        try:
+            gateway.send(message)
+            return message, None
+        except GatewayError as e:
+            return message, str(e) or 'Gateway error'
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(deliver, batch))
+
+    now = datetime.utcnow()
+    max_attempts = current_app.config.get('MESSAGE_MAX_ATTEMPTS', 5)
+    token = batch[0]['claim_token']
+    # Rows reclaimed after MESSAGE_CLAIM_TIMEOUT belong to another worker now
+    still_claimed = (OutboundMessage.claim_token == token, OutboundMessage.status == 'sending')
+    sent_ids = [m['id'] for m, error in results if error is None]
+    sent = 0
+    if sent_ids:
+        sent = OutboundMessage.query.filter(OutboundMessage.id.in_(sent_ids), *still_claimed).update({
+            'status': 'sent',
+            'sent_at': now,
+            'attempts': OutboundMessage.attempts + 1,
+            'last_error': None
+        }, synchronize_session=False)
+
+    failed = 0
+    for message, error in results:
+        if error is None:
+            continue
+        attempts = message['attempts'] + 1
+        failed += OutboundMessage.query.filter(OutboundMessage.id == message['id'], *still_claimed).update({
+            'status': 'failed' if attempts >= max_attempts else 'pending',
+            'attempts': attempts,
+            'next_attempt_at': now + _backoff(attempts),
+            'last_error': error[:1000]
+        }, synchronize_session=False)
+
+    db.session.commit()
+    return sent, failed
+
+
+def run_worker(batch_size=100, workers=4, interval=5, once=False):
+    """Deliver queued messages until the outbox is empty (once) or forever"""
+    gateway = get_gateway()
+    while True:
+        sent, failed = dispatch_pending(batch_size, workers, gateway)
+        if sent or failed:
+            current_app.logger.info('Outbox: sent %s, failed %s', sent, failed)
+            continue
+        if once:
+            return
+        time.sleep(interval)
+
+
+def outbox_stats():
+    """Message counts per status"""
+    rows = db.session.query(OutboundMessage.status, db.func.count(OutboundMessage.id)).group_by(
+        OutboundMessage.status).all()
+    return {status: count for status, count in rows}
+
+
+def build_absence_alerts(alert_date, class_ids=None):
+    """Absence alert messages for parents of students absent on alert_date"""
+    from app.models.attendance import Attendance
+    from app.models.class_model import Class
+    from app.models.schedule import Schedule
+    from app.models.student import Student
+
+    query = db.session.query(
+        Student.id, Student.full_name, Student.parent_phone,
+        Class.name, Schedule.start_time, Attendance.status
+    ).join(Attendance, Attendance.student_id == Student.id
+    ).join(Schedule, Schedule.id == Attendance.schedule_id
+    ).join(Class, Class.id == Schedule.class_id).filter(
+        Attendance.date == alert_date,
+        Attendance.status.in_(['absent_with_reason', 'absent_without_reason']),
+        Student.is_active == True,
+        Student.parent_phone.isnot(None),
+        Student.parent_phone != ''
+    )
+    if class_ids is not None:
+        query = query.filter(Schedule.class_id.in_(class_ids))
+
+    messages = []
+    for student_id, full_name, phone, class_name, start_time, status in query:
+        reason = 'có lý do' if status == 'absent_with_reason' else 'không lý do'
+        messages.append({
+            'channel': 'sms',
+            'recipient': phone,
+            'subject': 'Thông báo vắng học',
+            'body': (f'Trung tâm thông báo: học sinh {full_name} vắng {reason} buổi học lớp {class_name} '
+                     f'lúc {start_time.strftime("%H:%M")} ngày {alert_date.strftime("%d/%m/%Y")}.'),
+            'category': 'absence_alert',
+            'student_id': student_id,
+            'dedupe_scope': f'absence:{alert_date.isoformat()}'
+        })
+    return messages
+
+
+def build_class_broadcast(class_ids, body, category='broadcast'):
+    """One message per parent phone of active students in the given classes"""
+    from app.models.student import Student
+
+    query = db.session.query(Student.id, Student.parent_phone).filter(
+        Student.class_id.in_(class_ids),
+        Student.is_active == True,
+        Student.parent_phone.isnot(None),
+        Student.parent_phone != ''
+    )
+    return [{
+        'channel': 'sms',
+        'recipient': phone,
+        'subject': 'Thông báo',
+        'body': body,
+        'category': category,
+        'student_id': student_id
+    } for student_id, phone in query]
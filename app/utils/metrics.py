@@ -0,0 +1,343 @@
+"""
+Prometheus-style metrics without external dependencies.
+
+Each process keeps its own counters and histograms in memory and flushes
+them every METRICS_FLUSH_SECONDS to a JSON file in METRICS_DIR. The
+/metrics route sums the files of every worker, so the numbers are correct
+with any number of gunicorn workers. When a worker exits, the gunicorn
+child_exit hook (gunicorn.conf.py) folds its file into metrics_archive.json
+so totals never go backwards and dead workers' files do not pile up; a
+process that finds a file left under its own pid does the same before its
+first write. Gauges that describe shared state (queue depths) are read
+from the database at scrape time instead.
+"""
+
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# Latency histogram buckets in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'http_requests_total': ('counter', 'HTTP requests by endpoint, method and status'),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint'),
+    'db_queries_total': ('counter', 'SQL statements executed, by endpoint'),
+    'db_query_duration_seconds_total': ('counter', 'Time spent executing SQL, by endpoint'),
+    'db_pool_checkout_wait_seconds': ('histogram', 'Time waiting for a connection from the pool'),
+    'cache_requests_total': ('counter', 'Cache lookups by cache and result (hit/miss)'),
+    'job_queue_depth': ('gauge', 'Items waiting in background job queues'),
+}
+
+
+class MetricsRegistry:
+    """Counters and histograms of the current process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    @staticmethod
+    def _key(labels):
+        return json.dumps(sorted(labels.items()))
+
+    def inc(self, name, labels, value=1):
+        key = self._key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        key = self._key(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            buckets = series.get(key)
+            if buckets is None:
+                # Bucket counts, then sum and count
+                buckets = series[key] = [0] * (len(BUCKETS) + 2)
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    buckets[i] += 1
+                    break
+            buckets[-2] += value
+            buckets[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': {name: dict(series) for name, series in self.counters.items()},
+                'histograms': {name: {k: list(v) for k, v in series.items()}
+                               for name, series in self.histograms.items()},
+            }
+
+
+registry = MetricsRegistry()
+_state = {'directory': None, 'last_flush': 0.0, 'interval': 5.0, 'pid': None}
+
+ARCHIVE_FILE = 'metrics_archive.json'
+
+
+def record_cache(cache, hit):
+    """Count a lookup in one of the in-process caches"""
+    registry.inc('cache_requests_total', {'cache': cache, 'result': 'hit' if hit else 'miss'})
+
+
+def _endpoint():
+    if has_request_context():
+        return request.endpoint or 'unknown'
+    return 'background'
+
+
+def _merge(merged, snapshot):
+    """Add one snapshot's counters and histograms into merged"""
+    for name, series in snapshot.get('counters', {}).items():
+        target = merged['counters'].setdefault(name, {})
+        for key, value in series.items():
+            target[key] = target.get(key, 0) + value
+    for name, series in snapshot.get('histograms', {}).items():
+        target = merged['histograms'].setdefault(name, {})
+        for key, values in series.items():
+            if key in target:
+                target[key] = [a + b for a, b in zip(target[key], values)]
+            else:
+                target[key] = list(values)
+    return merged
+
+
+def _read(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write(path, snapshot):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _archive_lock(directory):
+    """Serializes archive updates between the gunicorn arbiter and workers (no-op without fcntl)"""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(os.path.join(directory, 'metrics.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def mark_process_dead(pid, directory=None):
+    """
+    Fold an exited process's file into the archive total and delete it.
+    Called from gunicorn's child_exit hook; returns whether a file was folded.
+    """
+    directory = directory or _state['directory']
+    if not directory:
+        return False
+    path = os.path.join(directory, f'metrics_{pid}.json')
+    with _archive_lock(directory):
+        snapshot = _read(path)
+        if snapshot is None:
+            return False
+        archive_path = os.path.join(directory, ARCHIVE_FILE)
+        archive = _read(archive_path) or {'counters': {}, 'histograms': {}}
+        try:
+            _write(archive_path, _merge(archive, snapshot))
+            os.remove(path)
+        except OSError:
+            return False
+    return True
+
+
+def flush(force=False):
+    """Write this process's metrics to its file in the metrics directory"""
+    directory = _state['directory']
+    now = time.monotonic()
+    if not directory or (not force and now - _state['last_flush'] < _state['interval']):
+        return
+    _state['last_flush'] = now
+    pid = os.getpid()
+    if _state['pid'] != pid:
+        # First write of this process: a file under the same pid belongs to an earlier one
+        mark_process_dead(pid, directory)
+        _state['pid'] = pid
+    try:
+        _write(os.path.join(directory, f'metrics_{pid}.json'), registry.snapshot())
+    except OSError:
+        pass
+
+
+def collect():
+    """Sum the snapshots of every process and the archive (or just this process without a directory)"""
+    directory = _state['directory']
+    if not directory:
+        return registry.snapshot()
+
+    flush(force=True)
+    merged = {'counters': {}, 'histograms': {}}
+    for path in glob.glob(os.path.join(directory, 'metrics_*.json')):
+        snapshot = _read(path)
+        if snapshot is not None:
+            _merge(merged, snapshot)
+    return merged
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs, extra=()):
+    pairs = list(pairs) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _header(lines, name):
+    metric_type, text = HELP.get(name, ('untyped', name))
+    lines.append(f'# HELP {name} {text}')
+    lines.append(f'# TYPE {name} {metric_type}')
+
+
+def queue_depths():
+    """Pending work in the DB-backed job queues, read at scrape time"""
+    from app import db
+    from app.models.attendance import Attendance
+    from app.models.attendance_stat import AnalyticsCursor
+    from app.models.outbound_message import OutboundMessage
+
+    depths = {}
+    for status, count in db.session.query(OutboundMessage.status, db.func.count(OutboundMessage.id)).filter(
+            OutboundMessage.status.in_(['pending', 'sending'])).group_by(OutboundMessage.status):
+        depths[f'outbox_{status}'] = count
+    depths.setdefault('outbox_pending', 0)
+    depths.setdefault('outbox_sending', 0)
+
+    cursor = db.session.get(AnalyticsCursor, 'attendance_stats')
+    depths['attendance_stats'] = db.session.query(db.func.count(Attendance.id)).filter(
+        Attendance.id > (cursor.last_id if cursor else 0)).scalar()
+    return depths
+
+
+def render_prometheus(extra_gauges=None):
+    """All metrics in the Prometheus text exposition format"""
+    data = collect()
+    lines = []
+    for name in sorted(data['counters']):
+        _header(lines, name)
+        for key, value in sorted(data['counters'][name].items()):
+            lines.append(f'{name}{_labels(json.loads(key))} {value!r}')
+
+    for name in sorted(data['histograms']):
+        _header(lines, name)
+        for key, values in sorted(data['histograms'][name].items()):
+            pairs = json.loads(key)
+            cumulative = 0
+            for bound, count in zip(BUCKETS, values):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(pairs, [("le", f"{bound:g}")])} {cumulative}')
+            lines.append(f'{name}_bucket{_labels(pairs, [("le", "+Inf")])} {values[-1]}')
+            lines.append(f'{name}_sum{_labels(pairs)} {values[-2]:.6f}')
+            lines.append(f'{name}_count{_labels(pairs)} {values[-1]}')
+
+    if extra_gauges:
+        _header(lines, 'job_queue_depth')
+        for queue, depth in sorted(extra_gauges.items()):
+            lines.append(f'job_queue_depth{_labels([("queue", queue)])} {depth}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def _instrument_pool(engine):
+    """Time pool.connect() to expose how long requests wait for a connection"""
+    pool = engine.pool
+    if getattr(pool, '_metrics_wrapped', False):
+        return
+    connect = pool.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            registry.observe('db_pool_checkout_wait_seconds', {}, time.perf_counter() - start)
+
+    pool.connect = timed_connect
+    pool._metrics_wrapped = True
+
+
+def init_metrics(app):
+    """Register request hooks and SQL listeners when METRICS_ENABLED"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    directory = app.config.get('METRICS_DIR') or os.path.join(app.instance_path, 'metrics')
+    try:
+        os.makedirs(directory, exist_ok=True)
+        _state['directory'] = directory
+    except OSError:
+        _state['directory'] = None  # Fall back to per-process metrics
+    _state['interval'] = float(app.config.get('METRICS_FLUSH_SECONDS', 5))
+    atexit.register(flush, True)
+
+    @app.before_request
+    def start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('_metrics_start', None)
+        if start is not None:
+            endpoint = request.endpoint or 'unknown'
+            registry.inc('http_requests_total', {
+                'endpoint': endpoint, 'method': request.method, 'status': str(response.status_code)})
+            registry.observe('http_request_duration_seconds', {'endpoint': endpoint},
+                             time.perf_counter() - start)
+        flush()
+        return response
+
+    from app import db
+
+    with app.app_context():
+        engine = db.engine
+    _instrument_pool(engine)
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_metrics_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('_metrics_query_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        labels = {'endpoint': _endpoint()}
+        registry.inc('db_queries_total', labels)
+        registry.inc('db_query_duration_seconds_total', labels, elapsed)
+
+    @event.listens_for(engine, 'handle_error')
+    def discard_failed(context):
+        starts = context.connection.info.get('_metrics_query_start') if context.connection else None
+        if starts:
+            starts.pop()
+
+    @event.listens_for(engine, 'engine_disposed')
+    def rewrap_pool(engine):
+        _instrument_pool(engine)
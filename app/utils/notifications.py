@@ -0,0 +1,231 @@
+"""
+Notification generation engine for schedule announcements
+"""
+
+import hashlib
+import io
+import json
+import zipfile
+from collections import OrderedDict
+from datetime import timedelta
+from jinja2 import Environment
+from sqlalchemy.orm import joinedload
+from app.models.schedule import Schedule
+from app.utils import calendar_exceptions
+from app.utils.calendar_dim import week_key
+from app.utils.metrics import record_cache
+
+DAY_NAMES = {
+    1: 'Thứ Hai', 2: 'Thứ Ba', 3: 'Thứ Tư', 4: 'Thứ Năm',
+    5: 'Thứ Sáu', 6: 'Thứ Bảy', 7: 'Chủ Nhật'
+}
+
+SESSION_NAMES = {
+    'morning': 'Buổi sáng',
+    'afternoon': 'Buổi chiều',
+    'evening': 'Buổi tối'
+}
+
+# Maximum number of days a single bundle may cover
+MAX_BUNDLE_DAYS = 62
+
+# Number of rendered messages kept in the content-hash cache
+CACHE_SIZE = 1024
+
+_DAILY_TEMPLATE = (
+    "📚 THÔNG BÁO LỊCH HỌC\n"
+    "📅 Ngày: {{ day_name }}, {{ date_str }}\n\n"
+    "{% if sessions %}"
+    "📋 LỊCH HỌC HÔM NAY:\n"
+    "{% for s in sessions %}"
+    "\n{{ loop.index }}. Lớp: {{ s.class_name }}\n"
+    "{% if include_time %}   ⏰ Thời gian: {{ s.start_time }} - {{ s.end_time }}\n{% endif %}"
+    "{% if include_teacher %}   👨‍🏫 Giáo viên: {{ s.teacher_name }}\n{% endif %}"
+    "{% if s.room %}   📍 Phòng: {{ s.room }}\n{% else %}   📍 Buổi: {{ s.session_name }}\n{% endif %}"
+    "{% endfor %}"
+    "{% else %}"
+    "ℹ️ Hôm nay không có lịch học.\n"
+    "{% endif %}"
+    "\n📞 Mọi thắc mắc xin liên hệ văn phòng."
+)
+
+_REMINDER_TEMPLATE = (
+    "💰 THÔNG BÁO HỌC PHÍ\n\n"
+    "Kính gửi Quý Phụ huynh,\n\n"
+    "Trung tâm xin thông báo về việc đóng học phí tháng {{ month_str }}:\n\n"
+    "📅 Hạn đóng: {{ date_str }}\n"
+    "💵 Học phí: [Số tiền]\n"
+    "🏦 Tài khoản: [Số tài khoản]\n"
+    "📝 Nội dung CK: [Tên học sinh] - Học phí tháng {{ month_str }}\n\n"
+    "Quý phụ huynh vui lòng đóng học phí đúng hạn.\n"
+    "📞 Liên hệ: [Số điện thoại] để được hỗ trợ."
+)
+
+_CUSTOM_TEMPLATE = "{{ custom_message or 'Nội dung thông báo tùy chỉnh' }}"
+
+_DEFAULT_TEMPLATE = (
+    "📚 THÔNG BÁO\n\n"
+    "Nội dung thông báo sẽ được cập nhật.\n"
+    "📞 Mọi thắc mắc xin liên hệ văn phòng."
+)
+
+_CONTACT_TEMPLATE = (
+    "\n\n📞 THÔNG TIN LIÊN HỆ:\n"
+    "📱 Hotline: [Số điện thoại]\n"
+    "📧 Email: [Email liên hệ]\n"
+    "🌐 Website: [Website]\n"
+    "📍 Địa chỉ: [Địa chỉ trung tâm]"
+)
+
+# Templates are compiled once per process and reused for every message
+_env = Environment(autoescape=False, keep_trailing_newline=True)
+TEMPLATES = {
+    'daily': _env.from_string(_DAILY_TEMPLATE),
+    'reminder': _env.from_string(_REMINDER_TEMPLATE),
+    'custom': _env.from_string(_CUSTOM_TEMPLATE),
+    'default': _env.from_string(_DEFAULT_TEMPLATE),
+    'contact': _env.from_string(_CONTACT_TEMPLATE),
+}
+
+# Templates whose output depends on the sessions of a class on a date
+SCHEDULE_TEMPLATES = {'daily'}
+
+_cache = OrderedDict()
+
+
+def date_range(start_date, end_date):
+    """Yield every date between start_date and end_date (inclusive)"""
+    current = start_date
+    while current <= end_date:
+        yield current
+        current += timedelta(days=1)
+
+
+def load_sessions(start_date, end_date, class_ids=None, per_class=True):
+    """
+    Load schedules for a date range with one eager-loaded query.
+
+    Returns a dict keyed by (date, class_id) with lists of plain session
+    dicts, so rendering never touches lazy ORM relationships. With
+    per_class=False all classes of a date share the (date, None) key.
+    Sessions cancelled by a holiday or closure are left out.
+    """
+    dates = list(date_range(start_date, end_date))
+    weeks = sorted({week_key(d) for d in dates})
+
+    query = Schedule.query.options(
+        joinedload(Schedule.class_obj),
+        joinedload(Schedule.teacher)
+    ).filter(
+        Schedule.week_number.in_(weeks),
+        Schedule.is_active == True
+    )
+    if class_ids:
+        query = query.filter(Schedule.class_id.in_(class_ids))
+
+    by_week_day = {}
+    for schedule in query.order_by(Schedule.session, Schedule.start_time).all():
+        by_week_day.setdefault((schedule.week_number, schedule.day_of_week), []).append((schedule.id, {
+            'class_id': schedule.class_id,
+            'class_name': schedule.class_obj.name if schedule.class_obj else '',
+            'teacher_name': schedule.teacher.full_name if schedule.teacher else '',
+            'start_time': schedule.start_time.strftime('%H:%M'),
+            'end_time': schedule.end_time.strftime('%H:%M'),
+            'room': schedule.room or '',
+            'session_name': SESSION_NAMES.get(schedule.session, schedule.session),
+        }))
+
+    calendars = calendar_exceptions.load(weeks)
+    sessions = OrderedDict()
+    for day in dates:
+        calendar = calendars[week_key(day)]
+        for schedule_id, session in by_week_day.get((week_key(day), day.isoweekday()), []):
+            if schedule_id not in calendar.makeups and calendar.reason(day, session['class_id']):
+                continue
+            key = (day, session['class_id'] if per_class else None)
+            sessions.setdefault(key, []).append(session)
+    return sessions
+
+
+def content_hash(template_type, date_obj, sessions, options, custom_message=None):
+    """Stable hash of everything that affects a rendered message"""
+    payload = json.dumps({
+        'template': template_type,
+        'date': date_obj.isoformat(),
+        'sessions': sessions,
+        'options': sorted(options.items()),
+        'custom_message': custom_message or '',
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def render_notification(template_type, date_obj, sessions, options, custom_message=None):
+    """
+    Render one notification, reusing the cached text when the inputs
+    have not changed. Returns (content_hash, text).
+    """
+    digest = content_hash(template_type, date_obj, sessions, options, custom_message)
+    cached = _cache.get(digest)
+    record_cache('notifications', cached is not None)
+    if cached is not None:
+        _cache.move_to_end(digest)
+        return digest, cached
+
+    template = TEMPLATES.get(template_type, TEMPLATES['default'])
+    text = template.render(
+        day_name=DAY_NAMES.get(date_obj.isoweekday(), ''),
+        date_str=date_obj.strftime('%d/%m/%Y'),
+        month_str=date_obj.strftime('%m/%Y'),
+        sessions=sessions,
+        custom_message=custom_message,
+        include_teacher=options.get('include_teacher', True),
+        include_time=options.get('include_time', True),
+    )
+    if options.get('include_contact'):
+        text += TEMPLATES['contact'].render()
+
+    _cache[digest] = text
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return digest, text
+
+
+def generate_bundle(start_date, end_date, class_ids, template_type, options, custom_message=None):
+    """Generate notifications for every (date, class) pair in the range"""
+    messages = []
+
+    if template_type in SCHEDULE_TEMPLATES:
+        sessions = load_sessions(start_date, end_date, class_ids)
+        for (day, class_id), class_sessions in sessions.items():
+            digest, text = render_notification(template_type, day, class_sessions, options, custom_message)
+            messages.append({
+                'date': day.isoformat(),
+                'class_id': class_id,
+                'class_name': class_sessions[0]['class_name'],
+                'hash': digest,
+                'text': text
+            })
+    else:
+        for day in date_range(start_date, end_date):
+            digest, text = render_notification(template_type, day, [], options, custom_message)
+            messages.append({
+                'date': day.isoformat(),
+                'class_id': None,
+                'class_name': None,
+                'hash': digest,
+                'text': text
+            })
+
+    return messages
+
+
+def bundle_to_zip(messages):
+    """Pack generated messages into a zip of text files"""
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for message in messages:
+            name = message['class_name'] or 'thong_bao'
+            safe_name = ''.join(c if c.isalnum() or c in '-_' else '_' for c in name)
+            archive.writestr(f"{message['date']}/{safe_name}_{message['hash'][:8]}.txt", message['text'])
+    output.seek(0)
+    return output
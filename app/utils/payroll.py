@@ -0,0 +1,269 @@
+"""
+Teacher workload and payroll.
+
+A session counts as delivered when attendance was taken for it: each
+distinct (schedule_id, date) in the attendance table. Its hours come from
+the schedule's start_time/end_time and its pay from PAYROLL_HOURLY_RATES
+for the schedule's session type (morning, afternoon, evening).
+
+Sessions and minutes per (month, teacher, session type) come from one
+grouped query. Closed months are stored in payroll_snapshots the first
+time they are reported and read from there afterwards; the current month
+is always computed. An after_flush hook drops the snapshot of a month
+whose attendance (or whose schedules' teacher or times) changes through
+the ORM; bulk deletes should be followed by `flask payroll-snapshot
+--recompute`. archive_term() snapshots a term's months before moving its
+rows, and aggregate() reads the archive tables as well, so archived terms
+stay paid even when their months are recomputed.
+"""
+
+from datetime import date, datetime
+from flask import current_app
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from app import db
+from app.utils import calendar_dim
+
+DEFAULT_HOURLY_RATES = {'morning': 100000, 'afternoon': 100000, 'evening': 120000}
+SESSION_NAMES = {'morning': 'Buổi sáng', 'afternoon': 'Buổi chiều', 'evening': 'Buổi tối'}
+SCHEDULE_FIELDS = ('teacher_id', 'session', 'start_time', 'end_time')
+
+_listening = False
+
+
+def month_key(day):
+    return day.strftime('%Y-%m')
+
+
+def parse_month(key):
+    """(year, month) of a YYYY-MM key"""
+    try:
+        year, month = (int(part) for part in key.split('-'))
+        date(year, month, 1)
+    except (AttributeError, ValueError):
+        raise ValueError(f'Tháng không hợp lệ: {key}')
+    return year, month
+
+
+def months_between(first, last):
+    """Month keys from first to last, inclusive"""
+    year, month = parse_month(first)
+    end = parse_month(last)
+    if (year, month) > end:
+        raise ValueError('Tháng bắt đầu phải trước tháng kết thúc')
+    keys = []
+    while (year, month) <= end:
+        keys.append(f'{year:04d}-{month:02d}')
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return keys
+
+
+def _minutes(start_time, end_time):
+    minutes = (end_time.hour * 60 + end_time.minute) - (start_time.hour * 60 + start_time.minute)
+    return max(minutes, 0)
+
+
+def aggregate(months):
+    """
+    {(month_key, teacher_id, session): [sessions, minutes]} of delivered
+    sessions in some months: one grouped query over the distinct
+    (schedule, date) pairs of the attendance table and its archive.
+    """
+    from app.models.attendance import Attendance
+    from app.models.dim_date import DimDate
+    from app.models.schedule import Schedule
+    from app.utils.archive import with_history
+
+    months = list(months)
+    if not months:
+        return {}
+    calendar_dim.ensure_populated()
+    first = date(*parse_month(min(months)), 1)
+    year, month = parse_month(max(months))
+    last = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+
+    attendance = with_history(Attendance)
+    schedules = with_history(Schedule)
+    dates = DimDate.__table__
+    delivered = select(attendance.c.schedule_id, attendance.c.date).where(
+        attendance.c.date >= first, attendance.c.date < last).distinct().subquery()
+
+    # Few distinct time pairs per teacher and month, so durations are summed here
+    rows = db.session.execute(
+        select(dates.c.month_key, schedules.c.teacher_id, schedules.c.session,
+               schedules.c.start_time, schedules.c.end_time, db.func.count())
+        .select_from(delivered)
+        .join(schedules, schedules.c.id == delivered.c.schedule_id)
+        .join(dates, dates.c.date == delivered.c.date)
+        .where(dates.c.month_key.in_(months))
+        .group_by(dates.c.month_key, schedules.c.teacher_id, schedules.c.session,
+                  schedules.c.start_time, schedules.c.end_time)
+    ).all()
+    figures = {}
+    for key, teacher_id, session, start_time, end_time, sessions in rows:
+        entry = figures.setdefault((key, teacher_id, session), [0, 0])
+        entry[0] += sessions
+        entry[1] += _minutes(start_time, end_time) * sessions
+    return figures
+
+
+def snapshot(months, recompute=False):
+    """
+    Store the figures of the closed months among `months` that have no
+    complete snapshot yet (all of them with recompute). Returns the months
+    computed.
+    """
+    from app.models.payroll import PayrollMonth, PayrollSnapshot
+
+    current = month_key(date.today())
+    closed = [key for key in months if key < current]
+    if not recompute:
+        stored = {key for (key,) in db.session.query(PayrollMonth.month_key).filter(
+            PayrollMonth.month_key.in_(closed))}
+        closed = [key for key in closed if key not in stored]
+    if not closed:
+        return []
+
+    figures = aggregate(closed)
+    connection = db.session.connection()
+    snapshots = PayrollSnapshot.__table__
+    connection.execute(snapshots.delete().where(snapshots.c.month_key.in_(closed)))
+    connection.execute(PayrollMonth.__table__.delete().where(PayrollMonth.month_key.in_(closed)))
+    if figures:
+        connection.execute(snapshots.insert(), [
+            {'month_key': key, 'teacher_id': teacher_id, 'session': session,
+             'sessions': sessions, 'minutes': minutes}
+            for (key, teacher_id, session), (sessions, minutes) in figures.items()])
+    totals = {}
+    for (key, _, _), (sessions, _) in figures.items():
+        totals[key] = totals.get(key, 0) + sessions
+    now = datetime.utcnow()
+    connection.execute(PayrollMonth.__table__.insert(), [
+        {'month_key': key, 'sessions': totals.get(key, 0), 'computed_at': now} for key in closed])
+    db.session.commit()
+    return closed
+
+
+def rates():
+    return current_app.config.get('PAYROLL_HOURLY_RATES', DEFAULT_HOURLY_RATES)
+
+
+def report(first, last, teacher_id=None):
+    """
+    Workload and pay from month `first` to `last` (YYYY-MM):
+    {months, rows: [{month, teacher_id, name, session, session_name,
+    sessions, hours, rate, amount}], teachers: [per-teacher totals], totals}.
+    Closed months are snapshotted on the way; the current one is live.
+    """
+    from app.models.payroll import PayrollSnapshot
+    from app.utils import reference_data
+
+    months = months_between(first, last)
+    snapshot(months)
+    current = month_key(date.today())
+    live = [key for key in months if key >= current]
+
+    figures = {}
+    stored = db.session.query(PayrollSnapshot.month_key, PayrollSnapshot.teacher_id, PayrollSnapshot.session,
+                              PayrollSnapshot.sessions, PayrollSnapshot.minutes).filter(
+        PayrollSnapshot.month_key.in_([key for key in months if key < current]))
+    for key, row_teacher, session, sessions, minutes in stored:
+        figures[(key, row_teacher, session)] = [sessions, minutes]
+    figures.update(aggregate(live))
+    if teacher_id is not None:
+        figures = {key: value for key, value in figures.items() if key[1] == teacher_id}
+
+    names = {row.id: row.full_name for row in reference_data.teachers()}
+    missing = {key[1] for key in figures} - set(names)
+    if missing:  # Managers who teach, former teachers
+        from app.models.user import User
+        names.update(db.session.query(User.id, User.full_name).filter(User.id.in_(missing)))
+    hourly = rates()
+    order = list(SESSION_NAMES)
+    rows = []
+    for (key, row_teacher, session), (sessions, minutes) in figures.items():
+        rate = hourly.get(session, 0)
+        rows.append({
+            'month': key, 'teacher_id': row_teacher, 'name': names.get(row_teacher, f'#{row_teacher}'),
+            'session': session, 'session_name': SESSION_NAMES.get(session, session),
+            'sessions': sessions, 'hours': round(minutes / 60, 2), 'rate': rate,
+            'amount': round(minutes * rate / 60),
+        })
+    rows.sort(key=lambda row: (row['name'], row['teacher_id'], row['month'],
+                               order.index(row['session']) if row['session'] in order else len(order)))
+
+    teachers = {}
+    for row in rows:
+        entry = teachers.setdefault(row['teacher_id'], {
+            'teacher_id': row['teacher_id'], 'name': row['name'], 'sessions': 0, 'hours': 0, 'amount': 0})
+        entry['sessions'] += row['sessions']
+        entry['hours'] = round(entry['hours'] + row['hours'], 2)
+        entry['amount'] += row['amount']
+    teachers = list(teachers.values())
+    return {
+        'months': months,
+        'rows': rows,
+        'teachers': teachers,
+        'totals': {'sessions': sum(entry['sessions'] for entry in teachers),
+                   'hours': round(sum(entry['hours'] for entry in teachers), 2),
+                   'amount': sum(entry['amount'] for entry in teachers)},
+    }
+
+
+def excel_rows(payroll):
+    """Rows for create_streaming_excel_response, one per teacher, month and session type"""
+    for row in payroll['rows']:
+        yield [row['name'], row['month'], row['session_name'], row['sessions'], row['hours'],
+               row['rate'], row['amount']]
+
+
+def invalidate(connection, months):
+    """Drop the snapshots of some months; they are recomputed when next reported"""
+    from app.models.payroll import PayrollMonth, PayrollSnapshot
+
+    months = list(months)
+    if not months:
+        return
+    connection.execute(PayrollMonth.__table__.delete().where(PayrollMonth.month_key.in_(months)))
+    connection.execute(PayrollSnapshot.__table__.delete().where(PayrollSnapshot.month_key.in_(months)))
+
+
+def _schedule_months(schedule):
+    try:
+        monday, sunday = calendar_dim.week_bounds(schedule.week_number)
+    except (TypeError, ValueError):
+        return set()
+    return {month_key(monday), month_key(sunday)}
+
+
+def _register_hooks():
+    global _listening
+    if _listening:
+        return
+    _listening = True
+    from app.models.attendance import Attendance
+    from app.models.schedule import Schedule
+
+    @event.listens_for(Session, 'after_flush')
+    def drop_changed_months(session, flush_context):
+        months = set()
+        for obj in list(session.new) + list(session.deleted):
+            if isinstance(obj, Attendance) and obj.date:
+                months.add(month_key(obj.date))
+        for obj in session.dirty:
+            if isinstance(obj, Attendance):
+                state = inspect(obj)
+                if state.attrs.date.history.has_changes() or state.attrs.schedule_id.history.has_changes():
+                    months.update(month_key(day) for day in state.attrs.date.history.deleted if day)
+                    if obj.date:
+                        months.add(month_key(obj.date))
+            elif isinstance(obj, Schedule):
+                state = inspect(obj)
+                if any(state.attrs[name].history.has_changes() for name in SCHEDULE_FIELDS):
+                    months.update(_schedule_months(obj))
+        if months:
+            invalidate(session.connection(), months)
+
+
+def init_payroll(app):
+    _register_hooks()
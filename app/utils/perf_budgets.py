@@ -0,0 +1,131 @@
+"""
+Per-route SQL query-count and latency budgets, checked against the
+seeded scale dataset with `flask check-budgets`
+"""
+
+import re
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import event
+from app import db
+from app.utils.benchmark import pick_users, percentile
+
+# endpoint: (role, max queries per request, max p95 latency in ms, url args).
+# Query budgets must not grow with the data: a route that needs one more
+# query per row in a template loop is an N+1 and should fail here.
+BUDGETS = {
+    'main.dashboard': ('admin', 20, 300, {}),
+    'calendar.month_view': ('manager', 15, 400, {}),
+    'calendar.calendar_view': ('manager', 15, 400, {}),
+    'manager.schedule': ('manager', 25, 400, {}),
+    'manager.classes': ('manager', 15, 300, {}),
+    'manager.attendance': ('manager', 20, 300, {}),
+    'manager.attendance_matrix': ('manager', 10, 800, {}),
+    'manager.at_risk_students': ('manager', 5, 100, {}),
+    'finance.finance_dashboard': ('admin', 15, 400, {}),
+    'finance.financial_report': ('admin', 15, 400, {}),
+    'teacher.schedule': ('teacher', 15, 200, {}),
+    'api.get_students': ('admin', 5, 300, {}),
+}
+
+_LITERALS = re.compile(r"('(?:[^']|'')*'|\b\d+\b)")
+
+
+def normalize_statement(statement):
+    """SQL with literals and IN lists collapsed, to group repeated statements"""
+    statement = _LITERALS.sub('?', ' '.join(statement.split()))
+    return re.sub(r'IN \((?:\?|__\[POSTCOMPILE_\w+\]|, )+\)', 'IN (...)', statement)
+
+
+class StatementRecorder:
+    """Records every SQL statement executed on the engine while active"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def check_budgets(app, iterations=5, only=None):
+    """
+    Request every budgeted route and compare against its budget.
+    Returns a list of result dicts; 'violations' is empty when it passed.
+    """
+    users, schedule = pick_users()
+    user_ids = {role: user.id for role, user in users.items() if user}
+    engine = db.engine
+
+    # Same as the benchmarks: a worker thread gives every request a fresh app context
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(_check_routes, app, engine, user_ids, iterations, only).result()
+
+
+def _check_routes(app, engine, user_ids, iterations, only):
+    results = []
+    for endpoint, (role, max_queries, max_p95_ms, args) in BUDGETS.items():
+        if only and endpoint not in only:
+            continue
+        if role not in user_ids:
+            results.append({'endpoint': endpoint, 'skipped': f'no {role} user', 'violations': []})
+            continue
+
+        with app.test_request_context():
+            from flask import url_for
+            url = url_for(endpoint, **args)
+
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_ids[role])
+            session['_fresh'] = True
+        try:
+            client.get(url)  # warm-up
+        except Exception as e:
+            results.append({'endpoint': endpoint, 'url': url, 'queries': 0, 'max_queries': max_queries,
+                            'p95_ms': 0, 'max_p95_ms': max_p95_ms, 'top_statements': [],
+                            'violations': [f'{type(e).__name__}: {e}']})
+            continue
+
+        timings = []
+        statements = []
+        status = None
+        for _ in range(iterations):
+            with StatementRecorder(engine) as recorder:
+                start = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+            statements = recorder.statements
+            status = response.status_code
+
+        queries = len(statements)
+        p95 = round(percentile(timings, 95), 2)
+        violations = []
+        if status != 200:
+            violations.append(f'HTTP {status}')
+        if queries > max_queries:
+            violations.append(f'{queries} queries > budget {max_queries}')
+        if p95 > max_p95_ms:
+            violations.append(f'p95 {p95} ms > budget {max_p95_ms} ms')
+
+        results.append({
+            'endpoint': endpoint,
+            'url': url,
+            'queries': queries,
+            'max_queries': max_queries,
+            'p95_ms': p95,
+            'max_p95_ms': max_p95_ms,
+            'violations': violations,
+            'top_statements': Counter(normalize_statement(s) for s in statements).most_common(5)
+                if queries > max_queries else [],
+        })
+    return results
@@ -0,0 +1,241 @@
+"""
+Versioned cache of the reference data behind dropdowns: active classes,
+teachers, managers, events, expense categories and time slots, kept as
+compact tuples.
+
+A change to a displayed column through the ORM bumps the table's counter
+in reference_versions within the same transaction. Each worker keeps one
+copy per dataset and reloads it only when that counter moved; counters
+are read with one query per request (or every REFERENCE_CHECK_SECONDS).
+Core/bulk writes to these tables must call bump() themselves.
+calendar_exceptions is tracked the same way for the week calendars of
+app/utils/calendar_exceptions.py.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from flask import current_app, g, has_request_context
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from app import db
+from app.utils.metrics import record_cache
+
+ClassRef = namedtuple('ClassRef', 'id name manager_id')
+PersonRef = namedtuple('PersonRef', 'id full_name')
+NamedRef = namedtuple('NamedRef', 'id name')
+TimeSlotRef = namedtuple('TimeSlotRef', 'id name session_type start_time end_time')
+
+_cache = {}
+_versions = {'checked_at': None, 'values': {}}
+_lock = threading.Lock()
+_listening = False
+
+
+def _tracked():
+    """model: columns whose changes make cached reference data stale"""
+    from app.models.calendar_exception import CalendarException
+    from app.models.class_model import Class
+    from app.models.event import Event
+    from app.models.expense import ExpenseCategory
+    from app.models.time_slot import TimeSlot
+    from app.models.user import User
+
+    return {
+        CalendarException: ('kind', 'start_date', 'end_date', 'class_id', 'schedule_id'),
+        Class: ('name', 'manager_id', 'is_active'),
+        User: ('full_name', 'role', 'is_active'),
+        Event: ('name', 'is_active'),
+        ExpenseCategory: ('name', 'is_active'),
+        TimeSlot: ('name', 'session_type', 'start_time', 'end_time', 'is_active'),
+    }
+
+
+def _datasets():
+    """dataset name: (table it depends on, loader returning a tuple of rows)"""
+    from app.models.class_model import Class
+    from app.models.event import Event
+    from app.models.expense import ExpenseCategory
+    from app.models.time_slot import TimeSlot
+    from app.models.user import User
+
+    def rows(factory, *columns, where=(), order_by=None):
+        def load():
+            query = db.session.query(*columns).filter(*where).order_by(*(order_by or [columns[0]]))
+            return tuple(factory(*row) for row in query)
+        return load
+
+    return {
+        'classes': (Class.__tablename__, rows(
+            ClassRef, Class.id, Class.name, Class.manager_id, where=[Class.is_active == True])),
+        'teachers': (User.__tablename__, rows(
+            PersonRef, User.id, User.full_name, where=[User.role == 'teacher', User.is_active == True])),
+        'managers': (User.__tablename__, rows(
+            PersonRef, User.id, User.full_name, where=[User.role == 'manager', User.is_active == True])),
+        'events': (Event.__tablename__, rows(
+            NamedRef, Event.id, Event.name, where=[Event.is_active == True])),
+        'expense_categories': (ExpenseCategory.__tablename__, rows(
+            NamedRef, ExpenseCategory.id, ExpenseCategory.name, where=[ExpenseCategory.is_active == True])),
+        'time_slots': (TimeSlot.__tablename__, rows(
+            TimeSlotRef, TimeSlot.id, TimeSlot.name, TimeSlot.session_type, TimeSlot.start_time,
+            TimeSlot.end_time, where=[TimeSlot.is_active == True],
+            order_by=[TimeSlot.session_type, TimeSlot.start_time, TimeSlot.id])),
+    }
+
+
+def _current_versions():
+    """{table: version}, read at most once per request / check interval"""
+    from app.models.reference_version import ReferenceVersion
+
+    if has_request_context() and '_reference_versions' in g:
+        return g._reference_versions
+
+    interval = current_app.config.get('REFERENCE_CHECK_SECONDS', 0)
+    now = time.monotonic()
+    with _lock:
+        checked_at = _versions['checked_at']
+        values = _versions['values']
+    if checked_at is None or now - checked_at >= interval:
+        table = ReferenceVersion.__table__
+        values = dict(db.session.execute(select(table.c.table_name, table.c.version)).all())
+        with _lock:
+            _versions.update(checked_at=now, values=values)
+
+    if has_request_context():
+        g._reference_versions = values
+    return values
+
+
+def version(table):
+    """Change counter of a table, read like those of the cached datasets"""
+    return _current_versions().get(table, 0)
+
+
+def get(name):
+    """Cached rows of a dataset (tuple of namedtuples)"""
+    table, load = _datasets()[name]
+    version = _current_versions().get(table, 0)
+    with _lock:
+        entry = _cache.get(name)
+    if entry and entry[0] == version:
+        record_cache('reference', True)
+        return entry[1]
+    record_cache('reference', False)
+
+    rows = load()
+    with _lock:
+        _cache[name] = (version, rows)
+    return rows
+
+
+def classes(manager_id=None):
+    rows = get('classes')
+    if manager_id is None:
+        return rows
+    return tuple(row for row in rows if row.manager_id == manager_id)
+
+
+def teachers():
+    return get('teachers')
+
+
+def managers():
+    return get('managers')
+
+
+def events():
+    return get('events')
+
+
+def expense_categories():
+    return get('expense_categories')
+
+
+def time_slots():
+    return get('time_slots')
+
+
+def class_choices(manager_id=None):
+    """[(id, name)] for a class SelectField, optionally only one manager's classes"""
+    return [(row.id, row.name) for row in classes(manager_id)]
+
+
+def person_choices(rows):
+    return [(row.id, row.full_name) for row in rows]
+
+
+def named_choices(rows):
+    return [(row.id, row.name) for row in rows]
+
+
+def bump(connection, tables):
+    """Increment the change counters of some tables (inside the caller's transaction)"""
+    from app.models.reference_version import ReferenceVersion
+
+    table = ReferenceVersion.__table__
+    for name in sorted(set(tables)):
+        result = connection.execute(table.update().where(table.c.table_name == name)
+                                    .values(version=table.c.version + 1))
+        if not result.rowcount:
+            connection.execute(table.insert().values(table_name=name, version=1))
+
+
+def invalidate(tables=None):
+    """Drop this worker's copies depending on some tables, or all of them"""
+    datasets = _datasets()
+    with _lock:
+        for name in list(_cache):
+            if tables is None or datasets[name][0] in tables:
+                del _cache[name]
+        _versions['checked_at'] = None
+    if has_request_context():
+        g.pop('_reference_versions', None)
+
+
+def _changed(obj, columns):
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in columns)
+
+
+def _register_hooks():
+    global _listening
+    if _listening:
+        return
+    _listening = True
+    tracked = _tracked()
+
+    @event.listens_for(Session, 'before_flush')
+    def collect_reference_changes(session, flush_context, instances):
+        # History is still available before the flush
+        tables = session.info.setdefault('reference_changes', set())
+        for obj in session.dirty:
+            columns = tracked.get(type(obj))
+            if columns and _changed(obj, columns):
+                tables.add(obj.__tablename__)
+        for obj in list(session.new) + list(session.deleted):
+            if type(obj) in tracked:
+                tables.add(obj.__tablename__)
+
+    @event.listens_for(Session, 'after_flush')
+    def bump_reference_versions(session, flush_context):
+        tables = session.info.get('reference_changes')
+        pending = tables - session.info.setdefault('reference_bumped', set()) if tables else None
+        if pending:
+            bump(session.connection(), pending)
+            session.info['reference_bumped'].update(pending)
+
+    @event.listens_for(Session, 'after_commit')
+    def drop_stale_reference_data(session):
+        session.info.pop('reference_bumped', None)
+        tables = session.info.pop('reference_changes', None)
+        if tables:
+            invalidate(tables)
+
+    @event.listens_for(Session, 'after_rollback')
+    def forget_reference_changes(session):
+        session.info.pop('reference_changes', None)
+        session.info.pop('reference_bumped', None)
+
+
+def init_reference_data(app):
+    _register_hooks()
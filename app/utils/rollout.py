@@ -0,0 +1,182 @@
+"""
+Multi-week schedule rollout and batch revert.
+
+rollout() copies a source week's active schedules (make-up sessions
+aside) into many target weeks in one transaction: one INSERT ... SELECT
+per target week (skipping sessions that would clash with what the target
+week already has, and optionally those the holiday and exception calendar
+closes) plus one INSERT ... SELECT for the student enrollments. Every row carries the ScheduleBatch id, so
+revert() removes a whole rollout, copy or published timetable with two
+set-based DELETEs.
+"""
+
+import json
+from datetime import datetime
+from sqlalchemy import and_, exists, or_, select
+from app import db
+from app.utils import availability, calendar_dim, calendar_exceptions
+
+MAX_TARGET_WEEKS = 53
+# Columns copied from the source schedule as they are
+COPIED_COLUMNS = ('class_id', 'teacher_id', 'day_of_week', 'session', 'start_time', 'end_time',
+                  'subject', 'room', 'room_id')
+
+
+class RolloutError(ValueError):
+    """Invalid rollout input or a batch that cannot be reverted"""
+
+
+def target_weeks(first_week, count, every=1):
+    """`count` week keys starting at `first_week`, `every` weeks apart"""
+    calendar_dim.parse_week_key(first_week)
+    if not 1 <= count <= MAX_TARGET_WEEKS:
+        raise RolloutError(f'Số tuần phải từ 1 đến {MAX_TARGET_WEEKS}')
+    return [calendar_dim.shift_week(first_week, offset * every) for offset in range(count)]
+
+
+def parse_week_list(text):
+    """Week keys from 'YYYY-Www, YYYY-Www ...' (commas or spaces), in order, without duplicates"""
+    weeks = []
+    for key in text.replace(',', ' ').split():
+        calendar_dim.parse_week_key(key)
+        if key not in weeks:
+            weeks.append(key)
+    if len(weeks) > MAX_TARGET_WEEKS:
+        raise RolloutError(f'Tối đa {MAX_TARGET_WEEKS} tuần mỗi lần')
+    return weeks
+
+
+def _clash(target, source):
+    """An active target-week schedule overlapping the source row's slot for its teacher, class or room"""
+    return exists().where(
+        target.c.week_number == db.bindparam('target_week'),
+        target.c.is_active == True,
+        target.c.day_of_week == source.c.day_of_week,
+        target.c.start_time < source.c.end_time,
+        target.c.end_time > source.c.start_time,
+        or_(target.c.teacher_id == source.c.teacher_id,
+            target.c.class_id == source.c.class_id,
+            and_(target.c.room_id.isnot(None), target.c.room_id == source.c.room_id)),
+    )
+
+
+def rollout(source_week, weeks, created_by, class_ids=None, skip_holidays=True, kind='rollout'):
+    """
+    Copy the source week into each target week and return the batch.
+    class_ids limits the copy to some classes (None = all).
+    """
+    from app.models.schedule import Schedule
+    from app.models.schedule_batch import ScheduleBatch
+    from app.models.student_schedule import StudentSchedule
+
+    calendar_dim.parse_week_key(source_week)
+    weeks = [week for week in weeks if week != source_week]
+    if not weeks:
+        raise RolloutError('Chưa chọn tuần đích (khác tuần mẫu)')
+
+    schedules = Schedule.__table__
+    source = schedules.alias('source')
+    target = schedules.alias('target')
+    conditions = [source.c.week_number == source_week, source.c.is_active == True,
+                  source.c.id.notin_(calendar_exceptions.makeup_ids())]
+    if class_ids is not None:
+        conditions.append(source.c.class_id.in_(list(class_ids)))
+    source_classes = db.session.query(source.c.class_id, db.func.count()).filter(
+        *conditions).group_by(source.c.class_id).all()
+    source_count = sum(count for _, count in source_classes)
+    if not source_count:
+        raise RolloutError('Không tìm thấy lịch dạy nào trong tuần mẫu')
+
+    now = datetime.utcnow()
+    batch = ScheduleBatch(kind=kind, week_number=source_week, status='published',
+                          created_by=created_by, created_at=now, published_at=now)
+    db.session.add(batch)
+    db.session.flush()
+
+    conditions.append(~_clash(target, source))
+    current_week = calendar_dim.current_week_key()
+    columns = list(COPIED_COLUMNS) + ['week_number', 'week_created', 'batch_id', 'is_active', 'created_at']
+    rows = select(
+        *[source.c[name] for name in COPIED_COLUMNS],
+        db.bindparam('target_week'), db.literal(current_week), db.literal(batch.id),
+        db.literal(True), db.literal(now),
+    ).where(*conditions)
+
+    # Closed days come from the week calendars, loaded together
+    calendars = calendar_exceptions.load(weeks) if skip_holidays else {}
+    source_class_ids = [class_id for class_id, _ in source_classes]
+    connection = db.session.connection()
+    created = {}
+    for week in weeks:
+        query = rows
+        if skip_holidays:
+            query = rows.where(calendar_exceptions.skip_closed(source.c, calendars[week], source_class_ids))
+        created[week] = connection.execute(schedules.insert().from_select(columns, query),
+                                           {'target_week': week}).rowcount
+
+    # Enrollments follow the source session with the same class, teacher, day and time
+    copy = schedules.alias('copy')
+    enrollments = StudentSchedule.__table__
+    enrolled = connection.execute(enrollments.insert().from_select(
+        ['student_id', 'schedule_id', 'enrolled_date', 'is_active'],
+        select(enrollments.c.student_id, copy.c.id, db.literal(now), db.literal(True)).distinct()
+        .select_from(copy.join(source, and_(
+            source.c.week_number == source_week,
+            source.c.is_active == True,
+            source.c.class_id == copy.c.class_id,
+            source.c.teacher_id == copy.c.teacher_id,
+            source.c.day_of_week == copy.c.day_of_week,
+            source.c.start_time == copy.c.start_time,
+            source.c.end_time == copy.c.end_time,
+        )).join(enrollments, and_(enrollments.c.schedule_id == source.c.id, enrollments.c.is_active == True)))
+        .where(copy.c.batch_id == batch.id))).rowcount
+
+    pairs = connection.execute(select(schedules.c.teacher_id, schedules.c.week_number)
+                               .where(schedules.c.batch_id == batch.id).distinct()).all()
+    availability.rebuild(connection, pairs)
+
+    total = sum(created.values())
+    batch.summary = json.dumps({
+        'source_week': source_week,
+        'target_weeks': weeks,
+        'source_schedules': source_count,
+        'created': total,
+        'created_by_week': created,
+        'skipped': source_count * len(weeks) - total,
+        'enrollments': enrolled,
+        'skip_holidays': skip_holidays,
+    }, ensure_ascii=False)
+    db.session.commit()
+    return batch
+
+
+def revert(batch):
+    """
+    Delete every schedule of a published batch and their enrollments.
+    Refused once attendance has been taken for any of them.
+    Returns (schedules, enrollments) deleted.
+    """
+    from app.models.attendance import Attendance
+    from app.models.schedule import Schedule
+    from app.models.student_schedule import StudentSchedule
+
+    if batch.status != 'published':
+        raise RolloutError('Chỉ có thể hoàn tác lịch đã áp dụng')
+    schedules = Schedule.__table__
+    batch_rows = select(schedules.c.id).where(schedules.c.batch_id == batch.id)
+    attended = db.session.query(db.func.count(Attendance.id)).filter(
+        Attendance.schedule_id.in_(batch_rows)).scalar()
+    if attended:
+        raise RolloutError(f'Không thể hoàn tác: đã có {attended} bản ghi điểm danh cho các lịch này')
+
+    connection = db.session.connection()
+    pairs = connection.execute(select(schedules.c.teacher_id, schedules.c.week_number)
+                               .where(schedules.c.batch_id == batch.id).distinct()).all()
+    enrollments = StudentSchedule.__table__
+    unenrolled = connection.execute(enrollments.delete().where(enrollments.c.schedule_id.in_(batch_rows))).rowcount
+    deleted = connection.execute(schedules.delete().where(schedules.c.batch_id == batch.id)).rowcount
+    availability.rebuild(connection, pairs)
+
+    batch.status = 'reverted'
+    db.session.commit()
+    return deleted, unenrolled
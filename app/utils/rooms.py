@@ -0,0 +1,162 @@
+"""
+Rooms: normalization of the free-text Schedule.room, room conflicts, the
+free-room finder and the utilization report.
+
+ORM writes resolve Schedule.room to a Room (created on first use) in a
+before_flush hook, setting only room_id: the text is kept as entered; Core inserts must set room_id themselves. Occupancy
+questions are single queries on ix_schedule_room_week_day.
+"""
+
+import re
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import and_, event, exists, inspect, select
+from sqlalchemy.orm import Session
+from app import db
+
+# Rooms are counted as open 07:00-21:00 every non-holiday day
+DEFAULT_HOURS_PER_DAY = 14
+
+_listening = False
+
+
+def normalize_name(text):
+    """Canonical room name: 'phòng  101' -> 'P101', ' lab a ' -> 'LAB A'; None if blank"""
+    name = ' '.join((text or '').split()).upper()
+    name = re.sub(r'^(PHÒNG|PHONG|P\.?)\s*(?=\d)', 'P', name)
+    return name[:50] or None
+
+
+def _overlaps(schedules, start_time, end_time):
+    return and_(schedules.c.start_time < end_time, schedules.c.end_time > start_time)
+
+
+def room_conflict(room_text, week_number, day_of_week, start_time, end_time, exclude_id=None):
+    """An active schedule already using the room in that slot, or None"""
+    from app.models.room import Room
+    from app.models.schedule import Schedule
+
+    name = normalize_name(room_text)
+    if not name:
+        return None
+    query = Schedule.query.join(Room, Room.id == Schedule.room_id).filter(
+        Room.name == name,
+        Schedule.week_number == week_number,
+        Schedule.day_of_week == int(day_of_week),
+        Schedule.is_active == True,
+        Schedule.start_time < end_time,
+        Schedule.end_time > start_time,
+    )
+    if exclude_id:
+        query = query.filter(Schedule.id != exclude_id)
+    return query.first()
+
+
+def free_rooms(week_number, day_of_week, start_time, end_time, min_capacity=None):
+    """Active rooms with no active schedule overlapping the slot, by name"""
+    from app.models.room import Room
+    from app.models.schedule import Schedule
+
+    schedules = Schedule.__table__
+    booked = exists().where(
+        schedules.c.room_id == Room.id,
+        schedules.c.week_number == week_number,
+        schedules.c.day_of_week == int(day_of_week),
+        schedules.c.is_active == True,
+        _overlaps(schedules, start_time, end_time),
+    )
+    query = Room.query.filter(Room.is_active == True, ~booked)
+    if min_capacity:
+        query = query.filter(Room.capacity >= min_capacity)
+    return query.order_by(Room.name).all()
+
+
+def _hours(start_time, end_time):
+    return max((end_time.hour * 60 + end_time.minute) - (start_time.hour * 60 + start_time.minute), 0) / 60
+
+
+def utilization(start, end):
+    """
+    [{room, booked_hours, available_hours, rate}] over the dates [start, end]:
+    sessions held on non-holiday days over the room's opening hours on those
+    days. One grouped query for the bookings, one count for the days.
+    """
+    from app.models.dim_date import DimDate
+    from app.models.room import Room
+    from app.models.schedule import Schedule
+    from app.utils import calendar_dim
+
+    calendar_dim.ensure_populated()
+    hours_per_day = current_app.config.get('ROOM_HOURS_PER_DAY', DEFAULT_HOURS_PER_DAY)
+    open_days = db.session.query(db.func.count(DimDate.date)).filter(
+        DimDate.date >= start, DimDate.date <= end, DimDate.is_holiday == False).scalar() or 0
+    available = open_days * hours_per_day
+
+    # Sessions per (room, start, end): few distinct time pairs, so durations are summed here
+    rows = db.session.query(
+        Schedule.room_id, Schedule.start_time, Schedule.end_time, db.func.count(Schedule.id)
+    ).join(DimDate, and_(DimDate.week_key == Schedule.week_number,
+                         DimDate.weekday == Schedule.day_of_week)).filter(
+        Schedule.room_id.isnot(None),
+        Schedule.is_active == True,
+        DimDate.date >= start,
+        DimDate.date <= end,
+        DimDate.is_holiday == False,
+    ).group_by(Schedule.room_id, Schedule.start_time, Schedule.end_time)
+    booked = {}
+    for room_id, start_time, end_time, sessions in rows:
+        booked[room_id] = booked.get(room_id, 0) + _hours(start_time, end_time) * sessions
+
+    report = []
+    for room in Room.query.filter(Room.is_active == True).order_by(Room.name):
+        hours = round(booked.get(room.id, 0), 2)
+        report.append({
+            'room': room,
+            'booked_hours': hours,
+            'available_hours': available,
+            'rate': round(hours / available * 100, 1) if available else 0,
+        })
+    report.sort(key=lambda item: -item['rate'])
+    return report
+
+
+def _register_hooks():
+    global _listening
+    if _listening:
+        return
+    _listening = True
+    from app.models.room import Room
+    from app.models.schedule import Schedule
+
+    @event.listens_for(Session, 'before_flush')
+    def resolve_schedule_rooms(session, flush_context, instances):
+        pending = []
+        for obj in list(session.new) + list(session.dirty):
+            if not isinstance(obj, Schedule):
+                continue
+            if obj in session.new:
+                if obj.room_id is None and obj.room_obj is None:
+                    pending.append(obj)
+            elif inspect(obj).attrs.room.history.has_changes():
+                pending.append(obj)
+        if not pending:
+            return
+
+        names = {normalize_name(obj.room) for obj in pending} - {None}
+        with session.no_autoflush:
+            rooms = {room.name: room for room in session.query(Room).filter(Room.name.in_(names))} if names else {}
+        for obj in pending:
+            name = normalize_name(obj.room)
+            if name is None:
+                obj.room_obj = None
+                obj.room_id = None
+                continue
+            room = rooms.get(name)
+            if room is None:
+                room = rooms[name] = Room(name=name, is_active=True, created_at=datetime.utcnow())
+                session.add(room)
+            obj.room_obj = room  # room keeps the text as typed
+
+
+def init_rooms(app):
+    _register_hooks()
@@ -0,0 +1,101 @@
+"""
+Schedule aggregates computed in SQL over the (week_number, day_of_week)
+index: totals, sessions per class / teacher / room / week and time-slot
+usage for a week or a term. Every figure is one grouped query returning
+only the rows a screen displays; names come from the reference-data cache.
+"""
+
+from sqlalchemy import distinct, func, select
+from app import db
+from app.utils import calendar_dim, reference_data
+
+
+def weeks_for(week=None, term=None):
+    """Week keys of a term ('2025-2026-hk1'), or of one week (default: the current one)"""
+    if term:
+        from app.utils.archive import term_weeks
+        return term_weeks(term)
+    week = week or calendar_dim.current_week_key()
+    calendar_dim.parse_week_key(week)
+    return [week]
+
+
+def _filters(schedules, weeks, class_ids=None):
+    conditions = [schedules.c.week_number.in_(weeks), schedules.c.is_active == True]
+    if class_ids is not None:
+        conditions.append(schedules.c.class_id.in_(list(class_ids)))
+    return conditions
+
+
+def totals(weeks, class_ids=None):
+    """{sessions, classes, teachers, rooms, slots}: one aggregate row plus one count of distinct slots"""
+    from app.models.schedule import Schedule
+
+    schedules = Schedule.__table__
+    conditions = _filters(schedules, weeks, class_ids)
+    sessions, classes, teachers, rooms = db.session.execute(select(
+        func.count(), func.count(distinct(schedules.c.class_id)),
+        func.count(distinct(schedules.c.teacher_id)), func.count(distinct(schedules.c.room_id)),
+    ).where(*conditions)).one()
+    slots = db.session.execute(select(func.count()).select_from(
+        select(schedules.c.start_time, schedules.c.end_time).where(*conditions).distinct().subquery()
+    )).scalar()
+    return {'sessions': sessions, 'classes': classes, 'teachers': teachers, 'rooms': rooms, 'slots': slots}
+
+
+def _grouped(column, weeks, class_ids=None):
+    from app.models.schedule import Schedule
+
+    schedules = Schedule.__table__
+    return db.session.execute(
+        select(schedules.c[column], func.count()).where(*_filters(schedules, weeks, class_ids))
+        .group_by(schedules.c[column]).order_by(func.count().desc(), schedules.c[column])
+    ).all()
+
+
+def overview(weeks, class_ids=None):
+    """Totals and the per-class, per-teacher, per-room, per-slot and per-week groups"""
+    from app.models.room import Room
+    from app.models.schedule import Schedule
+
+    class_names = {row.id: row.name for row in reference_data.classes()}
+    teacher_names = {row.id: row.full_name for row in reference_data.teachers()}
+    room_names = dict(db.session.query(Room.id, Room.name))
+
+    schedules = Schedule.__table__
+    slot_rows = db.session.execute(
+        select(schedules.c.start_time, schedules.c.end_time, func.count(),
+               func.count(distinct(schedules.c.class_id)))
+        .where(*_filters(schedules, weeks, class_ids))
+        .group_by(schedules.c.start_time, schedules.c.end_time)
+        .order_by(schedules.c.start_time, schedules.c.end_time)
+    ).all()
+
+    result = totals(weeks, class_ids)
+    result.update({
+        'weeks': list(weeks),
+        'per_class': [{'class_id': class_id, 'name': class_names.get(class_id, ''), 'sessions': count}
+                      for class_id, count in _grouped('class_id', weeks, class_ids)],
+        'per_teacher': [{'teacher_id': teacher_id, 'name': teacher_names.get(teacher_id, ''), 'sessions': count}
+                        for teacher_id, count in _grouped('teacher_id', weeks, class_ids)],
+        'per_room': [{'room_id': room_id, 'name': room_names.get(room_id, ''), 'sessions': count}
+                     for room_id, count in _grouped('room_id', weeks, class_ids) if room_id is not None],
+        'slot_usage': [{'start_time': start.strftime('%H:%M'), 'end_time': end.strftime('%H:%M'),
+                        'sessions': count, 'classes': classes}
+                       for start, end, count, classes in slot_rows],
+    })
+    if len(weeks) > 1:
+        result['per_week'] = [{'week_number': week, 'sessions': count}
+                              for week, count in sorted(_grouped('week_number', weeks, class_ids))]
+    return result
+
+
+def slot_in_use(start_time, end_time):
+    """Whether an active schedule uses exactly this start/end time (EXISTS, stops at the first row)"""
+    from app.models.schedule import Schedule
+
+    return db.session.query(Schedule.query.filter(
+        Schedule.is_active == True,
+        Schedule.start_time == start_time,
+        Schedule.end_time == end_time,
+    ).exists()).scalar()
@@ -0,0 +1,260 @@
+"""
+Synthetic data generator for load testing. Everything is written with
+bulk Core inserts in chunks so millions of rows take minutes, not hours.
+"""
+
+import random
+from datetime import date, datetime, time, timedelta
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models.attendance import Attendance
+from app.models.class_model import Class
+from app.models.expense import Expense, ExpenseCategory
+from app.models.financial_transaction import FinancialTransaction
+from app.models.room import Room
+from app.models.schedule import Schedule
+from app.models.student import Student
+from app.models.student_schedule import StudentSchedule
+from app.models.user import User
+from app.utils.calendar_dim import week_key
+
+CHUNK_SIZE = 10000
+
+# Prefix of every generated username so seeded data is easy to recognise
+SEED_PREFIX = 'seed_'
+
+FIRST_NAMES = ['An', 'Bình', 'Chi', 'Dũng', 'Giang', 'Hà', 'Hải', 'Hương', 'Khánh', 'Lan',
+               'Linh', 'Long', 'Mai', 'Minh', 'Nam', 'Ngọc', 'Phong', 'Quân', 'Thảo', 'Trang']
+LAST_NAMES = ['Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Huỳnh', 'Phan', 'Vũ', 'Võ', 'Đặng']
+MIDDLE_NAMES = ['Văn', 'Thị', 'Minh', 'Thu', 'Đức', 'Ngọc', 'Gia', 'Bảo']
+SUBJECTS = ['Toán', 'Tiếng Việt', 'Tiếng Anh', 'Khoa học', 'Mỹ thuật', 'Âm nhạc']
+
+# (session, start, end) slots a class can be scheduled in
+SLOTS = [
+    ('morning', time(7, 30), time(9, 0)),
+    ('morning', time(9, 30), time(11, 0)),
+    ('afternoon', time(14, 0), time(15, 30)),
+    ('afternoon', time(16, 0), time(17, 30)),
+    ('evening', time(18, 30), time(20, 0)),
+]
+
+# Share of attendance rows per status
+STATUS_WEIGHTS = [('present', 0.88), ('absent_with_reason', 0.07), ('absent_without_reason', 0.05)]
+
+
+def _insert(table, rows, echo=None):
+    """Insert rows in CHUNK_SIZE executemany batches; returns the count"""
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= CHUNK_SIZE:
+            db.session.execute(table.insert(), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+        count += len(batch)
+    db.session.commit()
+    if echo:
+        echo(f'  {table.name}: {count:,} rows')
+    return count
+
+
+def _name(rng):
+    return f'{rng.choice(LAST_NAMES)} {rng.choice(MIDDLE_NAMES)} {rng.choice(FIRST_NAMES)}'
+
+
+def _week_mondays(weeks):
+    """Mondays of the last `weeks` ISO weeks, oldest first, ending this week"""
+    this_monday = date.today() - timedelta(days=date.today().weekday())
+    return [this_monday - timedelta(weeks=w) for w in range(weeks - 1, -1, -1)]
+
+
+def seed_scale(classes=200, students=10000, teachers=100, managers=10, weeks=156,
+               sessions_per_week=3, transactions_per_month=300, seed=42, echo=print):
+    """
+    Generate a synthetic center. Every class gets `sessions_per_week`
+    schedule rows per week for `weeks` weeks; its students are enrolled in
+    each of them and get an attendance row for every session already held.
+    """
+    if User.query.filter(User.username.like(f'{SEED_PREFIX}%')).first():
+        raise ValueError('Seed data already exists; use a fresh database')
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    today = date.today()
+    password_hash = generate_password_hash('seed123')  # Hashed once, shared by all seeded users
+
+    echo('Users, classes and students')
+    user_table = User.__table__
+    _insert(user_table, ({
+        'username': f'{SEED_PREFIX}{role}{i}',
+        'email': f'{SEED_PREFIX}{role}{i}@example.com',
+        'password_hash': password_hash,
+        'full_name': _name(rng),
+        'phone': f'09{rng.randrange(10 ** 8):08d}',
+        'role': role,
+        'is_active': True,
+        'created_at': now
+    } for role, count in (('manager', managers), ('teacher', teachers)) for i in range(count)), echo)
+
+    manager_ids = [uid for (uid,) in db.session.query(User.id).filter(
+        User.username.like(f'{SEED_PREFIX}manager%')).order_by(User.id)]
+    teacher_ids = [uid for (uid,) in db.session.query(User.id).filter(
+        User.username.like(f'{SEED_PREFIX}teacher%')).order_by(User.id)]
+
+    first_class_id = (db.session.query(db.func.max(Class.id)).scalar() or 0) + 1
+    _insert(Class.__table__, ({
+        'name': f'Lớp S{i + 1:03d}',
+        'description': 'Dữ liệu thử nghiệm',
+        'manager_id': manager_ids[i % len(manager_ids)] if manager_ids else None,
+        'is_active': True,
+        'created_at': now
+    } for i in range(classes)), echo)
+    class_ids = [cid for (cid,) in db.session.query(Class.id).filter(
+        Class.id >= first_class_id).order_by(Class.id)]
+
+    first_student_id = (db.session.query(db.func.max(Student.id)).scalar() or 0) + 1
+    _insert(Student.__table__, ({
+        'student_code': f'SS{i + 1:06d}',
+        'full_name': _name(rng),
+        'date_of_birth': date(2010, 1, 1) + timedelta(days=rng.randrange(3650)),
+        'parent_name': _name(rng),
+        'parent_phone': f'09{rng.randrange(10 ** 8):08d}',
+        'class_id': class_ids[i % len(class_ids)],
+        'is_active': rng.random() > 0.03,
+        'created_at': now
+    } for i in range(students)), echo)
+
+    members = {}
+    for student_id, class_id in db.session.query(Student.id, Student.class_id).filter(
+            Student.id >= first_student_id):
+        members.setdefault(class_id, []).append(student_id)
+
+    echo('Schedules')
+    room_names = [f'P{100 + i}' for i in range(40)]
+    known = {name for (name,) in db.session.query(Room.name).filter(Room.name.in_(room_names))}
+    _insert(Room.__table__, ({'name': name, 'is_active': True, 'created_at': now}
+                             for name in room_names if name not in known))
+    room_ids = dict(db.session.query(Room.name, Room.id).filter(Room.name.in_(room_names)))
+    mondays = _week_mondays(weeks)
+    first_schedule_id = (db.session.query(db.func.max(Schedule.id)).scalar() or 0) + 1
+
+    def schedule_rows():
+        for index, class_id in enumerate(class_ids):
+            # A class keeps the same weekly pattern for the whole period
+            pattern = [(rng.randint(1, 6), rng.choice(SLOTS), rng.choice(SUBJECTS),
+                        teacher_ids[(index + k) % len(teacher_ids)])
+                       for k in range(sessions_per_week)]
+            for monday in mondays:
+                week = week_key(monday)
+                for day_of_week, (session, start, end), subject, teacher_id in pattern:
+                    yield {
+                        'class_id': class_id,
+                        'teacher_id': teacher_id,
+                        'day_of_week': day_of_week,
+                        'session': session,
+                        'start_time': start,
+                        'end_time': end,
+                        'subject': subject,
+                        'room': room_names[index % 40],
+                        'room_id': room_ids[room_names[index % 40]],
+                        'week_number': week,
+                        'week_created': week,
+                        'is_active': True,
+                        'created_at': now
+                    }
+
+    _insert(Schedule.__table__, schedule_rows(), echo)
+
+    echo('Enrollments and attendance')
+    schedules = db.session.query(
+        Schedule.id, Schedule.class_id, Schedule.week_number, Schedule.day_of_week
+    ).filter(Schedule.id >= first_schedule_id).order_by(Schedule.id).all()
+    week_monday = {week_key(monday): monday for monday in mondays}
+
+    _insert(StudentSchedule.__table__, ({
+        'student_id': student_id,
+        'schedule_id': schedule_id,
+        'enrolled_date': now,
+        'is_active': True
+    } for schedule_id, class_id, _, _ in schedules for student_id in members.get(class_id, [])), echo)
+
+    statuses = [status for status, _ in STATUS_WEIGHTS]
+    weights = [weight for _, weight in STATUS_WEIGHTS]
+
+    def attendance_rows():
+        for schedule_id, class_id, week, day_of_week in schedules:
+            held_on = week_monday[week] + timedelta(days=day_of_week - 1)
+            if held_on > today:
+                continue
+            class_members = members.get(class_id, [])
+            picks = rng.choices(statuses, weights, k=len(class_members))
+            stamp = datetime.combine(held_on, time(12, 0))
+            for student_id, status in zip(class_members, picks):
+                yield {
+                    'schedule_id': schedule_id,
+                    'student_id': student_id,
+                    'date': held_on,
+                    'status': status,
+                    'created_at': stamp,
+                    'updated_at': stamp
+                }
+
+    _insert(Attendance.__table__, attendance_rows(), echo)
+
+    echo('Finance')
+    creator_id = manager_ids[0] if manager_ids else teacher_ids[0]
+    category = ExpenseCategory(name='Dữ liệu thử nghiệm', description='Sinh tự động', created_at=now)
+    db.session.add(category)
+    db.session.commit()
+
+    months = sorted({(monday.year, monday.month) for monday in mondays})
+
+    def transaction_rows():
+        for year, month in months:
+            for i in range(transactions_per_month):
+                income = rng.random() < 0.7
+                yield {
+                    'title': 'Học phí' if income else 'Chi phí vận hành',
+                    'amount': rng.randrange(200, 5000) * 1000,
+                    'transaction_date': date(year, month, rng.randint(1, 28)),
+                    'transaction_type': 'income' if income else 'expense',
+                    'category': 'Học phí' if income else 'Văn phòng phẩm',
+                    'payment_method': rng.choice(['cash', 'bank_transfer']),
+                    'status': 'approved',
+                    'created_by': creator_id,
+                    'created_at': now,
+                    'updated_at': now
+                }
+
+    def expense_rows():
+        for year, month in months:
+            for i in range(transactions_per_month // 10):
+                yield {
+                    'title': 'Mua sắm thiết bị',
+                    'amount': rng.randrange(100, 3000) * 1000,
+                    'expense_date': date(year, month, rng.randint(1, 28)),
+                    'payment_method': 'cash',
+                    'status': rng.choice(['pending', 'approved', 'approved', 'rejected']),
+                    'category_id': category.id,
+                    'created_by': creator_id,
+                    'created_at': now,
+                    'updated_at': now
+                }
+
+    _insert(FinancialTransaction.__table__, transaction_rows(), echo)
+    _insert(Expense.__table__, expense_rows(), echo)
+
+    # Core inserts bypass the ledger hook
+    echo('Ledger')
+    from app.utils.ledger import backfill
+    backfill(echo=lambda line: echo(f'  {line}'))
+
+    # ... the reference-data versions and the availability bitsets
+    from app.utils import availability, reference_data
+    reference_data.bump(db.session.connection(), [User.__tablename__, Class.__tablename__])
+    echo('Availability')
+    availability.rebuild(db.session.connection())
+    db.session.commit()
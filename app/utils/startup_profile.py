@@ -0,0 +1,78 @@
+"""
+Cold-start profiling: import-time breakdown of create_app() and the time
+until the first response, each measured in a fresh interpreter
+"""
+
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Run in the child process; prints one JSON line with the phase timings
+_FIRST_RESPONSE_SCRIPT = '''
+import json, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+response = app.test_client().get({path!r})
+done = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (done - created) * 1000,
+    "status": response.status_code,
+}}))
+'''
+
+
+def _run(args, env_overrides=None):
+    env = dict(os.environ, **(env_overrides or {}))
+    # Metrics files of the child processes would pollute instance/metrics
+    env.setdefault('METRICS_ENABLED', 'false')
+    return subprocess.run([sys.executable] + args, cwd=PROJECT_ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def parse_importtime(output):
+    """(module, self_us, cumulative_us) rows from `python -X importtime` output"""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|', 2)
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def import_profile(env_overrides=None):
+    """
+    Import-time of `create_app()` grouped by top-level package, largest
+    first, plus the total in milliseconds
+    """
+    result = _run(['-X', 'importtime', '-c', 'from app import create_app; create_app()'], env_overrides)
+    by_package = defaultdict(int)
+    for module, self_us, _ in parse_importtime(result.stderr):
+        by_package[module.split('.')[0]] += self_us
+    packages = sorted(((name, us / 1000) for name, us in by_package.items()), key=lambda p: p[1], reverse=True)
+    return packages, sum(ms for _, ms in packages)
+
+
+def first_response(path='/auth/login', runs=3, env_overrides=None):
+    """
+    Start a fresh interpreter `runs` times and time import, create_app()
+    and the first request. Returns the run with the median total.
+    """
+    samples = []
+    for _ in range(runs):
+        result = _run(['-c', _FIRST_RESPONSE_SCRIPT.format(path=path)], env_overrides)
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        sample['total_ms'] = sample['import_ms'] + sample['create_app_ms'] + sample['first_request_ms']
+        samples.append(sample)
+    samples.sort(key=lambda s: s['total_ms'])
+    median = samples[len(samples) // 2]
+    return {key: round(value, 1) if isinstance(value, float) else value for key, value in median.items()}
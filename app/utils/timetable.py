@@ -0,0 +1,516 @@
+"""
+Weekly timetable generator.
+
+Each class needs N sessions in a week. A session is placed on a TimeSlot
+of a day, with one of the class's teachers (class_teacher) and, when
+rooms exist, a free room. Hard constraints: no teacher, class or room is
+double-booked, counting the schedules already active that week, and no
+class is placed on a day the holiday and exception calendar closes. Soft
+constraints (weighted, see DEFAULT_WEIGHTS / TIMETABLE_WEIGHTS): teacher
+idle time between sessions of a day, two sessions of a class on the same
+day, and a class leaving its usual room.
+
+Construction assigns the most constrained session first (smallest live
+domain) with forward checking; a time-boxed local search then re-inserts
+unplaced sessions (ejecting one blocker if needed) and moves sessions to
+lower the soft cost. Occupancy is kept as availability bitsets, so every
+check is one integer AND. The result is written in bulk as a draft
+ScheduleBatch whose schedules stay inactive until published.
+"""
+
+import json
+import random
+import time
+from collections import Counter, defaultdict, namedtuple
+from datetime import datetime
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import aliased
+from app import db
+from app.utils.availability import DAY_MASK, SLOTS_PER_DAY, SLOT_MINUTES, day_bits, slot_mask
+
+DEFAULT_DAYS = (1, 2, 3, 4, 5, 6)
+DEFAULT_SESSIONS_PER_WEEK = 2
+DEFAULT_TIME_LIMIT = 5.0
+DEFAULT_WEIGHTS = {'teacher_gaps': 3, 'class_same_day': 5, 'room_changes': 1}
+MAX_SESSIONS_PER_WEEK = 14
+# Weeks looked back to find each class's usual room
+ROOM_HISTORY_WEEKS = 4
+
+Slot = namedtuple('Slot', 'index day_of_week start_time end_time session_type mask')
+Placement = namedtuple('Placement', 'slot teacher_id room_id')
+
+
+class TimetableError(ValueError):
+    """Invalid generator input or a batch that cannot be published"""
+
+
+class Problem:
+    """Everything the solver needs, loaded with a handful of queries"""
+
+    def __init__(self, week_number, class_ids, sessions_per_week, days=DEFAULT_DAYS):
+        from app.models.class_model import class_teacher
+        from app.models.room import Room
+        from app.models.schedule import Schedule
+        from app.utils import availability, calendar_dim, calendar_exceptions, reference_data
+
+        calendar_dim.parse_week_key(week_number)
+        self.week_number = week_number
+        active_classes = {row.id: row for row in reference_data.classes()}
+        self.classes = [active_classes[class_id] for class_id in class_ids if class_id in active_classes]
+        if not self.classes:
+            raise TimetableError('Chưa chọn lớp nào để xếp lịch')
+        self.sessions_per_week = {row.id: min(max(int(sessions_per_week.get(row.id, 0)), 0), MAX_SESSIONS_PER_WEEK)
+                                  for row in self.classes}
+
+        self.slots = []
+        for day_of_week in sorted(set(days)):
+            for slot in reference_data.time_slots():
+                self.slots.append(Slot(len(self.slots), day_of_week, slot.start_time, slot.end_time,
+                                       slot.session_type, slot_mask(day_of_week, slot.start_time, slot.end_time)))
+        if not self.slots:
+            raise TimetableError('Chưa có khung giờ nào đang hoạt động')
+        self.overlaps = [[other.index for other in self.slots if other.mask & slot.mask] for slot in self.slots]
+
+        class_ids = [row.id for row in self.classes]
+        active_teachers = {row.id for row in reference_data.teachers()}
+        self.teachers = defaultdict(list)
+        for class_id, teacher_id in db.session.execute(
+                select(class_teacher.c.class_id, class_teacher.c.teacher_id)
+                .where(class_teacher.c.class_id.in_(class_ids))
+                .order_by(class_teacher.c.class_id, class_teacher.c.teacher_id)):
+            if teacher_id in active_teachers:
+                self.teachers[class_id].append(teacher_id)
+
+        self.teacher_busy = {teacher_id: busy for teacher_id, (busy, _) in
+                             availability.week_bitsets(week_number).items()}
+
+        schedules = Schedule.__table__
+        self.class_busy = defaultdict(int)
+        self.room_busy = defaultdict(int)
+        for class_id, room_id, day_of_week, start_time, end_time in db.session.execute(
+                select(schedules.c.class_id, schedules.c.room_id, schedules.c.day_of_week,
+                       schedules.c.start_time, schedules.c.end_time)
+                .where(schedules.c.week_number == week_number, schedules.c.is_active == True)):
+            mask = slot_mask(day_of_week, start_time, end_time)
+            self.class_busy[class_id] |= mask
+            if room_id:
+                self.room_busy[room_id] |= mask
+        # A closed day is fully busy for the class
+        for day_of_week, class_id in calendar_exceptions.for_week(week_number).closed_pairs(class_ids):
+            self.class_busy[class_id] |= DAY_MASK << ((day_of_week - 1) * SLOTS_PER_DAY)
+
+        self.rooms = [room_id for (room_id,) in db.session.query(Room.id).filter(
+            Room.is_active == True).order_by(Room.name)]
+        self.room_names = dict(db.session.query(Room.id, Room.name).filter(Room.is_active == True))
+
+        # Usual room: the one a class used most over the previous weeks
+        history = [calendar_dim.shift_week(week_number, -offset) for offset in range(1, ROOM_HISTORY_WEEKS + 1)]
+        usage = db.session.execute(
+            select(schedules.c.class_id, schedules.c.room_id, db.func.count())
+            .where(schedules.c.class_id.in_(class_ids), schedules.c.week_number.in_(history),
+                   schedules.c.room_id.isnot(None))
+            .group_by(schedules.c.class_id, schedules.c.room_id))
+        self.usual_room = {}
+        best = {}
+        for class_id, room_id, count in usage:
+            if count > best.get(class_id, 0) and room_id in self.room_names:
+                best[class_id] = count
+                self.usual_room[class_id] = room_id
+
+
+class Solver:
+    def __init__(self, problem, weights=None, seed=None):
+        self.problem = problem
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.random = random.Random(seed)
+
+        self.sessions = []  # class_id per session
+        self.unplaceable = {}  # class_id: reason
+        for row in problem.classes:
+            if problem.sessions_per_week[row.id] and not problem.teachers.get(row.id):
+                self.unplaceable[row.id] = 'Lớp chưa được phân công giáo viên'
+                continue
+            self.sessions.extend([row.id] * problem.sessions_per_week[row.id])
+
+        self.teacher_busy = defaultdict(int, problem.teacher_busy)
+        self.class_busy = defaultdict(int, problem.class_busy)
+        self.room_busy = defaultdict(int, problem.room_busy)
+        self.class_days = Counter()  # (class_id, day) -> generated sessions
+        self.class_rooms = defaultdict(Counter)  # class_id -> room_id -> generated sessions
+        self.assignment = [None] * len(self.sessions)
+
+        # Full domains: (slot, teacher) pairs free before anything is generated
+        self.domains = []
+        for class_id in self.sessions:
+            class_busy = self.class_busy[class_id]
+            self.domains.append([
+                (slot.index, teacher_id)
+                for slot in problem.slots if not slot.mask & class_busy
+                for teacher_id in problem.teachers[class_id]
+                if not slot.mask & self.teacher_busy[teacher_id]
+            ])
+
+    # Occupancy
+
+    def _fits(self, class_id, slot_index, teacher_id):
+        mask = self.problem.slots[slot_index].mask
+        return not (mask & self.class_busy[class_id] or mask & self.teacher_busy[teacher_id])
+
+    def _free_room(self, class_id, slot_index):
+        """Usual room of the class if free, else the room it already uses most, else any free room"""
+        if not self.problem.rooms:
+            return None
+        mask = self.problem.slots[slot_index].mask
+        preferred = [self.problem.usual_room.get(class_id)]
+        preferred += [room_id for room_id, _ in self.class_rooms[class_id].most_common()]
+        for room_id in preferred:
+            if room_id and not mask & self.room_busy[room_id]:
+                return room_id
+        for room_id in self.problem.rooms:
+            if not mask & self.room_busy[room_id]:
+                return room_id
+        return False  # Every room is taken
+
+    def _place(self, index, placement):
+        class_id = self.sessions[index]
+        slot = self.problem.slots[placement.slot]
+        self.class_busy[class_id] |= slot.mask
+        self.teacher_busy[placement.teacher_id] |= slot.mask
+        if placement.room_id:
+            self.room_busy[placement.room_id] |= slot.mask
+            self.class_rooms[class_id][placement.room_id] += 1
+        self.class_days[(class_id, slot.day_of_week)] += 1
+        self.assignment[index] = placement
+
+    def _unplace(self, index):
+        placement = self.assignment[index]
+        class_id = self.sessions[index]
+        slot = self.problem.slots[placement.slot]
+        self.class_busy[class_id] &= ~slot.mask
+        self.teacher_busy[placement.teacher_id] &= ~slot.mask
+        if placement.room_id:
+            self.room_busy[placement.room_id] &= ~slot.mask
+            self.class_rooms[class_id][placement.room_id] -= 1
+        self.class_days[(class_id, slot.day_of_week)] -= 1
+        self.assignment[index] = None
+        return placement
+
+    # Soft cost, evaluated only for what a move touches
+
+    def _teacher_gap_hours(self, teacher_id, day_of_week):
+        bits = day_bits(self.teacher_busy[teacher_id], day_of_week)
+        if not bits:
+            return 0
+        span = bits.bit_length() - ((bits & -bits).bit_length() - 1)
+        return (span - bits.bit_count()) * SLOT_MINUTES / 60
+
+    def _class_room_cost(self, class_id):
+        rooms = self.class_rooms[class_id]
+        usual = self.problem.usual_room.get(class_id)
+        used = [room_id for room_id, count in rooms.items() if count > 0]
+        if not used:
+            return 0
+        if usual:
+            return sum(count for room_id, count in rooms.items() if room_id != usual)
+        return len(used) - 1
+
+    def _local_cost(self, class_id, pairs):
+        """Soft cost of one class plus some (teacher, day) pairs"""
+        weights = self.weights
+        cost = weights['room_changes'] * self._class_room_cost(class_id)
+        days = {day for _, day in pairs}
+        cost += weights['class_same_day'] * sum(max(self.class_days[(class_id, day)] - 1, 0) for day in days)
+        cost += weights['teacher_gaps'] * sum(self._teacher_gap_hours(teacher_id, day) for teacher_id, day in pairs)
+        return cost
+
+    def total_cost(self):
+        weights = self.weights
+        breakdown = {'teacher_gaps': 0, 'class_same_day': 0, 'room_changes': 0}
+        touched = {(placement.teacher_id, self.problem.slots[placement.slot].day_of_week)
+                   for placement in self.assignment if placement}
+        breakdown['teacher_gaps'] = round(sum(self._teacher_gap_hours(*pair) for pair in touched), 2)
+        breakdown['class_same_day'] = sum(max(count - 1, 0) for count in self.class_days.values())
+        breakdown['room_changes'] = sum(self._class_room_cost(row.id) for row in self.problem.classes)
+        return round(sum(weights[name] * value for name, value in breakdown.items()), 2), breakdown
+
+    def _try(self, index, slot_index, teacher_id):
+        """Soft-cost change of placing an unplaced session, or None if it does not fit"""
+        class_id = self.sessions[index]
+        if not self._fits(class_id, slot_index, teacher_id):
+            return None
+        room_id = self._free_room(class_id, slot_index)
+        if room_id is False:
+            return None
+        pairs = [(teacher_id, self.problem.slots[slot_index].day_of_week)]
+        before = self._local_cost(class_id, pairs)
+        placement = Placement(slot_index, teacher_id, room_id)
+        self._place(index, placement)
+        delta = self._local_cost(class_id, pairs) - before
+        self._unplace(index)
+        return delta, placement
+
+    # Construction: most constrained session first, with forward checking
+
+    def construct(self):
+        live = [set(domain) for domain in self.domains]
+        by_class = defaultdict(list)
+        by_teacher = defaultdict(set)
+        for index, class_id in enumerate(self.sessions):
+            by_class[class_id].append(index)
+            for _, teacher_id in self.domains[index]:
+                by_teacher[teacher_id].add(index)
+
+        pending = set(range(len(self.sessions)))
+        while pending:
+            index = min(pending, key=lambda i: (len(live[i]), i))
+            pending.discard(index)
+            best = None
+            for slot_index, teacher_id in live[index]:
+                tried = self._try(index, slot_index, teacher_id)
+                if tried:
+                    score = tried[0] + self.random.random() * 0.01  # Random tie-break
+                    if best is None or score < best[0]:
+                        best = (score, tried[1])
+            if best is None:
+                continue  # Left for the local search
+            placement = best[1]
+            self._place(index, placement)
+
+            blocked = self.problem.overlaps[placement.slot]
+            for other in by_class[self.sessions[index]]:
+                if other in pending:
+                    live[other] = {value for value in live[other] if value[0] not in blocked}
+            for other in by_teacher[placement.teacher_id]:
+                if other in pending:
+                    live[other] -= {(slot_index, placement.teacher_id) for slot_index in blocked}
+
+    # Local search
+
+    def _reinsert(self, index):
+        """Place an unplaced session, ejecting one blocking session if that one can move elsewhere"""
+        options = [tried for slot_index, teacher_id in self.domains[index]
+                   for tried in [self._try(index, slot_index, teacher_id)] if tried]
+        if options:
+            self._place(index, min(options, key=lambda option: option[0])[1])
+            return True
+
+        class_id = self.sessions[index]
+        candidates = list(self.domains[index])
+        self.random.shuffle(candidates)
+        for slot_index, teacher_id in candidates[:20]:
+            mask = self.problem.slots[slot_index].mask
+            blockers = [other for other, placement in enumerate(self.assignment) if placement and
+                        mask & self.problem.slots[placement.slot].mask and
+                        (placement.teacher_id == teacher_id or self.sessions[other] == class_id)]
+            if len(blockers) != 1:
+                continue
+            blocker = blockers[0]
+            removed = self._unplace(blocker)
+            tried = self._try(index, slot_index, teacher_id)
+            if tried:
+                self._place(index, tried[1])
+                moves = [move for value in self.domains[blocker]
+                         for move in [self._try(blocker, *value)] if move]
+                if moves:
+                    self._place(blocker, min(moves, key=lambda move: move[0])[1])
+                    return True
+                self._unplace(index)
+            self._place(blocker, removed)
+        return False
+
+    def _move(self, index):
+        """
+        Move a placed session to a random alternative if the soft cost does
+        not increase; returns the cost change, or None if the move was rejected
+        """
+        class_id = self.sessions[index]
+        slot_index, teacher_id = self.random.choice(self.domains[index])
+        current = self.assignment[index]
+        old_pair = (current.teacher_id, self.problem.slots[current.slot].day_of_week)
+        new_pair = (teacher_id, self.problem.slots[slot_index].day_of_week)
+        pairs = list({old_pair, new_pair})
+        before = self._local_cost(class_id, pairs)
+        self._unplace(index)
+        if self._fits(class_id, slot_index, teacher_id):
+            room_id = self._free_room(class_id, slot_index)
+            if room_id is not False:
+                self._place(index, Placement(slot_index, teacher_id, room_id))
+                delta = self._local_cost(class_id, pairs) - before
+                if delta <= 0:
+                    return delta
+                self._unplace(index)
+        self._place(index, current)
+        return None
+
+    def improve(self, deadline, max_idle=60000):
+        idle = 0
+        iterations = 0
+        placed = [index for index, placement in enumerate(self.assignment) if placement]
+        for index in [index for index, placement in enumerate(self.assignment) if placement is None]:
+            if time.perf_counter() >= deadline:
+                break
+            if self.domains[index] and self._reinsert(index):
+                placed.append(index)
+        while placed and idle < max_idle and time.perf_counter() < deadline:
+            iterations += 1
+            index = self.random.choice(placed)
+            delta = self._move(index) if self.domains[index] else None
+            # Sideways moves are accepted to leave plateaus but do not reset the idle count
+            idle = 0 if delta is not None and delta < 0 else idle + 1
+        return iterations
+
+
+def solve(problem, weights=None, time_limit=DEFAULT_TIME_LIMIT, seed=None):
+    """Run the solver; returns (solver, stats)"""
+    started = time.perf_counter()
+    solver = Solver(problem, weights=weights, seed=seed)
+    solver.construct()
+    constructed_at = time.perf_counter()
+    constructed_cost, _ = solver.total_cost()
+    iterations = solver.improve(started + time_limit)
+    cost, breakdown = solver.total_cost()
+
+    unplaced = Counter(solver.sessions[index] for index, placement in enumerate(solver.assignment)
+                       if placement is None)
+    stats = {
+        'classes': len(problem.classes),
+        'sessions': len(solver.sessions) + sum(problem.sessions_per_week[class_id] for class_id in solver.unplaceable),
+        'placed': sum(1 for placement in solver.assignment if placement),
+        'unplaced': [{'class_id': class_id, 'sessions': count, 'reason': 'Không còn khung giờ phù hợp'}
+                     for class_id, count in sorted(unplaced.items())] +
+                    [{'class_id': class_id, 'sessions': problem.sessions_per_week[class_id], 'reason': reason}
+                     for class_id, reason in sorted(solver.unplaceable.items())],
+        'cost': cost,
+        'cost_after_construction': constructed_cost,
+        'cost_breakdown': breakdown,
+        'weights': solver.weights,
+        'iterations': iterations,
+        'construct_ms': round((constructed_at - started) * 1000),
+        'total_ms': round((time.perf_counter() - started) * 1000),
+    }
+    return solver, stats
+
+
+def weights_from_config(app_config, overrides=None):
+    weights = dict(DEFAULT_WEIGHTS, **app_config.get('TIMETABLE_WEIGHTS', {}))
+    for name, value in (overrides or {}).items():
+        if name in weights and value is not None:
+            weights[name] = float(value)
+    return weights
+
+
+def generate(week_number, class_ids, sessions_per_week, created_by, days=DEFAULT_DAYS,
+             weights=None, time_limit=DEFAULT_TIME_LIMIT, seed=None):
+    """Solve and write the result as a draft ScheduleBatch (inactive schedules); returns the batch"""
+    from app.models.schedule import Schedule
+    from app.models.schedule_batch import ScheduleBatch
+    from app.utils import calendar_dim
+
+    problem = Problem(week_number, class_ids, sessions_per_week, days)
+    solver, stats = solve(problem, weights=weights, time_limit=time_limit, seed=seed)
+    names = {row.id: row.name for row in problem.classes}
+    for item in stats['unplaced']:
+        item['class_name'] = names.get(item['class_id'], '')
+
+    now = datetime.utcnow()
+    batch = ScheduleBatch(kind='generated', week_number=week_number, status='draft',
+                          summary=json.dumps(stats, ensure_ascii=False), created_by=created_by, created_at=now)
+    db.session.add(batch)
+    db.session.flush()
+
+    current_week = calendar_dim.current_week_key()
+    rows = []
+    for index, placement in enumerate(solver.assignment):
+        if placement is None:
+            continue
+        slot = problem.slots[placement.slot]
+        rows.append({
+            'class_id': solver.sessions[index],
+            'teacher_id': placement.teacher_id,
+            'day_of_week': slot.day_of_week,
+            'session': slot.session_type,
+            'start_time': slot.start_time,
+            'end_time': slot.end_time,
+            'subject': '',
+            'room': problem.room_names.get(placement.room_id, '') if placement.room_id else '',
+            'room_id': placement.room_id,
+            'week_number': week_number,
+            'week_created': current_week,
+            'batch_id': batch.id,
+            'is_active': False,
+            'created_at': now,
+        })
+    if rows:
+        db.session.execute(Schedule.__table__.insert(), rows)
+    db.session.commit()
+    return batch
+
+
+def conflicts(batch):
+    """Active schedules clashing with a batch's drafts (teacher, class or room), as (draft, active) pairs"""
+    from app.models.schedule import Schedule
+
+    active = aliased(Schedule)
+    return db.session.query(Schedule, active).join(active, and_(
+        active.week_number == Schedule.week_number,
+        active.day_of_week == Schedule.day_of_week,
+        active.is_active == True,
+        active.id != Schedule.id,
+        active.start_time < Schedule.end_time,
+        active.end_time > Schedule.start_time,
+        or_(active.teacher_id == Schedule.teacher_id,
+            active.class_id == Schedule.class_id,
+            and_(active.room_id.isnot(None), active.room_id == Schedule.room_id)),
+    )).filter(Schedule.batch_id == batch.id).all()
+
+
+def publish(batch):
+    """
+    Activate a draft batch: refuse if anything scheduled since clashes,
+    enroll the classes' students and refresh teacher availability.
+    Returns the number of schedules activated.
+    """
+    from app.models.schedule import Schedule
+    from app.models.student import Student
+    from app.models.student_schedule import StudentSchedule
+    from app.utils import availability
+
+    if batch.status != 'draft':
+        raise TimetableError('Chỉ có thể áp dụng bản nháp')
+    clashes = conflicts(batch)
+    if clashes:
+        raise TimetableError(f'Có {len(clashes)} lịch bị trùng với lịch đã tạo sau khi xếp, hãy xếp lại')
+
+    schedules = Schedule.__table__
+    students = Student.__table__
+    enrollments = StudentSchedule.__table__
+    connection = db.session.connection()
+    now = datetime.utcnow()
+    activated = connection.execute(schedules.update().where(schedules.c.batch_id == batch.id)
+                                   .values(is_active=True)).rowcount
+    connection.execute(enrollments.insert().from_select(
+        ['student_id', 'schedule_id', 'enrolled_date', 'is_active'],
+        select(students.c.id, schedules.c.id, db.literal(now), db.literal(True))
+        .join(schedules, schedules.c.class_id == students.c.class_id)
+        .where(schedules.c.batch_id == batch.id, students.c.is_active == True)))
+    pairs = connection.execute(select(schedules.c.teacher_id, schedules.c.week_number)
+                               .where(schedules.c.batch_id == batch.id).distinct()).all()
+    availability.rebuild(connection, pairs)
+
+    batch.status = 'published'
+    batch.published_at = now
+    db.session.commit()
+    return activated
+
+
+def discard(batch):
+    """Delete a draft batch's schedules"""
+    from app.models.schedule import Schedule
+
+    if batch.status != 'draft':
+        raise TimetableError('Chỉ có thể hủy bản nháp')
+    schedules = Schedule.__table__
+    deleted = db.session.connection().execute(schedules.delete().where(schedules.c.batch_id == batch.id)).rowcount
+    batch.status = 'discarded'
+    db.session.commit()
+    return deleted
@@ -0,0 +1,197 @@
+"""
+Cached user loader for Flask-Login. Requests authenticate from a small
+immutable snapshot of the user instead of loading the User row each time.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, g, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.utils.metrics import record_cache
+
+# Upper bound on cached snapshots per process
+CACHE_SIZE = 5000
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+_listening = False
+# Bumped by every invalidation; a load that overlapped one is not cached
+_generation = [0]
+
+
+class CachedUser:
+    """
+    Read-only snapshot of a User (id, username, email, role, full_name,
+    is_active, managed class ids). Any other attribute, e.g. a
+    relationship, is read from the User row, loaded on first use.
+    """
+
+    _fields = ('id', 'username', 'email', 'role', 'full_name', 'active', 'created_at', 'managed_class_ids')
+
+    def __init__(self, **values):
+        for name in self._fields:
+            object.__setattr__(self, name, values[name])
+
+    @classmethod
+    def from_user(cls, user, managed_class_ids):
+        return cls(id=user.id, username=user.username, email=user.email, role=user.role,
+                   full_name=user.full_name, active=bool(user.is_active), created_at=user.created_at,
+                   managed_class_ids=tuple(managed_class_ids))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('CachedUser is read-only; update the User model instead')
+
+    def __getattr__(self, name):
+        # Only called for attributes the snapshot doesn't have
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    @property
+    def model(self):
+        """The User row, loaded once per request on first access"""
+        from app.models.user import User
+
+        # The session's identity map only holds weak references, so keep
+        # the row on g or every fallback attribute would reload it
+        if not has_app_context():
+            return db.session.get(User, self.id)
+        models = g.setdefault('_cached_user_models', {})
+        user = models.get(self.id)
+        if user is None:
+            user = models[self.id] = db.session.get(User, self.id)
+        return user
+
+    # Flask-Login interface
+    @property
+    def is_active(self):
+        return self.active
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    @property
+    def is_anonymous(self):
+        return False
+
+    def get_id(self):
+        return str(self.id)
+
+    def is_admin(self):
+        return self.role == 'admin'
+
+    def is_manager(self):
+        return self.role == 'manager'
+
+    def is_teacher(self):
+        return self.role == 'teacher'
+
+    def is_user(self):
+        return self.role == 'user'
+
+    def __eq__(self, other):
+        return getattr(other, 'id', None) == self.id and hasattr(other, 'role')
+
+    def __hash__(self):
+        return hash(('user', self.id))
+
+    def __repr__(self):
+        return f'<CachedUser {self.username}>'
+
+
+def load_cached_user(user_id):
+    """Flask-Login user_loader"""
+    from app.models.class_model import Class
+    from app.models.user import User
+
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    ttl = current_app.config.get('USER_CACHE_TTL', 60)
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(user_id)
+        if entry and entry[0] > now:
+            _cache.move_to_end(user_id)
+            record_cache('user', True)
+            return entry[1]
+        generation = _generation[0]
+    record_cache('user', False)
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    managed_class_ids = [class_id for (class_id,) in db.session.query(Class.id).filter(
+        Class.manager_id == user_id, Class.is_active == True)]
+    snapshot = CachedUser.from_user(user, managed_class_ids)
+
+    with _lock:
+        if generation == _generation[0]:
+            _cache[user_id] = (now + ttl, snapshot)
+            _cache.move_to_end(user_id)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return snapshot
+
+
+def invalidate_user(*user_ids):
+    with _lock:
+        _generation[0] += 1
+        for user_id in user_ids:
+            if user_id is not None:
+                _cache.pop(user_id, None)
+
+
+def clear_user_cache():
+    with _lock:
+        _generation[0] += 1
+        _cache.clear()
+
+
+def _register_invalidation():
+    """
+    Drop snapshots when a user, or the classes they manage, change. Ids are
+    collected at flush and dropped after the commit, so a request cannot
+    cache the old row again while the transaction is still open.
+    """
+    global _listening
+    from app.models.class_model import Class
+    from app.models.user import User
+
+    if _listening:
+        return
+    _listening = True
+
+    @event.listens_for(Session, 'after_flush')
+    def collect_stale_users(session, flush_context):
+        stale = session.info.setdefault('stale_users', set())
+        for obj in list(session.dirty) + list(session.deleted):
+            if isinstance(obj, User):
+                stale.add(obj.id)
+            elif isinstance(obj, Class):
+                history = inspect(obj).attrs.manager_id.history
+                stale.update([obj.manager_id, *(history.deleted or ())])
+        for obj in session.new:
+            if isinstance(obj, Class):
+                stale.add(obj.manager_id)
+
+    @event.listens_for(Session, 'after_commit')
+    def drop_stale_users(session):
+        stale = session.info.pop('stale_users', None)
+        if stale:
+            invalidate_user(*stale)
+
+    @event.listens_for(Session, 'after_rollback')
+    def forget_stale_users(session):
+        session.info.pop('stale_users', None)
+
+
+def init_user_cache(login_manager):
+    login_manager.user_loader(load_cached_user)
+    _register_invalidation()
@@ -21,6 +21,25 @@ class Config:
 
     SQLALCHEMY_DATABASE_URI = database_url or 'sqlite:///' + os.path.join(basedir, 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection pool
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() != 'false',
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),  # Seconds; below server idle timeouts
+    }
+    if not SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        SQLALCHEMY_ENGINE_OPTIONS.update({
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+            'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        })
+
+    # SQLite PRAGMAs applied to every new connection (see app/utils/db_tuning.py)
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -64000))  # Negative = KiB, i.e. 64MB
     WTF_CSRF_ENABLED = False  # Disable CSRF protection temporarily
 
     # Pagination
@@ -29,5 +48,39 @@ class Config:
     # Upload settings
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
 
+    # Outbound messaging (parent notifications)
+    MESSAGE_GATEWAY = os.environ.get('MESSAGE_GATEWAY', 'file')  # file, smtp_debug
+    MESSAGE_OUTBOX_FILE = os.environ.get('MESSAGE_OUTBOX_FILE')  # Default: instance/outbox.log
+    MESSAGE_SMTP_HOST = os.environ.get('MESSAGE_SMTP_HOST', 'localhost')
+    MESSAGE_SMTP_PORT = int(os.environ.get('MESSAGE_SMTP_PORT', 1025))
+    MESSAGE_RATE_LIMITS = {'sms': 10, 'email': 20, 'default': 5}  # Messages per second
+    MESSAGE_MAX_ATTEMPTS = 5
+    MESSAGE_RETRY_BASE_SECONDS = 30
+
+    # Seconds dashboard KPIs are cached (changes in this process invalidate them at once)
+    KPI_CACHE_TTL = int(os.environ.get('KPI_CACHE_TTL', 300))
+
+    # Teacher pay per delivered hour (VND) by session type, see app/utils/payroll.py
+    PAYROLL_HOURLY_RATES = {
+        'morning': int(os.environ.get('PAYROLL_RATE_MORNING', 100000)),
+        'afternoon': int(os.environ.get('PAYROLL_RATE_AFTERNOON', 100000)),
+        'evening': int(os.environ.get('PAYROLL_RATE_EVENING', 120000)),
+    }
+
+    # Seconds between reads of reference_versions (0: once per request); dropdown data is reloaded only when it moved
+    REFERENCE_CHECK_SECONDS = float(os.environ.get('REFERENCE_CHECK_SECONDS', 0))
+
+    # Defer heavy imports that requests don't need (Flask-Migrate) until first use
+    LAZY_IMPORTS = os.environ.get('LAZY_IMPORTS', 'true').lower() != 'false'
+
+    # Seconds a logged-in user's snapshot is reused before reloading it from the DB
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+
+    # Metrics (/metrics in Prometheus text format)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() != 'false'
+    METRICS_DIR = os.environ.get('METRICS_DIR')  # Shared by all workers; default: instance/metrics
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # Bearer token for scrapers; admins can always view
+    METRICS_FLUSH_SECONDS = 5
+
     # Railway specific settings
     PORT = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,15 @@
+"""
+Gunicorn settings, loaded automatically from the working directory
+(or with `gunicorn -c gunicorn.conf.py app:app`).
+"""
+
+import os
+
+
+def child_exit(server, worker):
+    """Fold an exited worker's metrics file into the archive total (see app/utils/metrics.py)"""
+    from app.utils.metrics import mark_process_dead
+
+    directory = os.environ.get('METRICS_DIR') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'instance', 'metrics')
+    mark_process_dead(worker.pid, directory)
@@ -0,0 +1,33 @@
+"""attendance student/date index
+
+Revision ID: a1c0e5d2f028
+Revises: 
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c0e5d2f028'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_index(table, name):
+    inspector = sa.inspect(op.get_bind())
+    return any(index['name'] == name for index in inspector.get_indexes(table))
+
+
+def upgrade():
+    # Existing databases were created with db.create_all(), so only add
+    # the index when it is missing
+    if not _has_index('attendance', 'ix_attendance_student_date'):
+        op.create_index('ix_attendance_student_date', 'attendance', ['student_id', 'date'])
+
+
+def downgrade():
+    if _has_index('attendance', 'ix_attendance_student_date'):
+        op.drop_index('ix_attendance_student_date', table_name='attendance')
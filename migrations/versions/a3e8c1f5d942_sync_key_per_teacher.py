@@ -0,0 +1,52 @@
+"""attendance_sync_records: idempotency keys unique per teacher instead of globally
+
+Revision ID: a3e8c1f5d942
+Revises: f7a2d9c4e186
+Create Date: 2026-10-19 23:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3e8c1f5d942'
+down_revision = 'f7a2d9c4e186'
+branch_labels = None
+depends_on = None
+
+TABLE = 'attendance_sync_records'
+TEACHER_KEY = 'uq_attendance_sync_records_teacher_key'
+KEY_ONLY = 'uq_attendance_sync_records_idempotency_key'
+# Names the unnamed SQLite constraint when batch mode reflects the table
+NAMING_CONVENTION = {'uq': 'uq_%(table_name)s_%(column_0_name)s'}
+
+
+def _unique_constraints():
+    inspector = sa.inspect(op.get_bind())
+    return {tuple(constraint['column_names']): constraint['name'] or KEY_ONLY
+            for constraint in inspector.get_unique_constraints(TABLE)}
+
+
+def upgrade():
+    constraints = _unique_constraints()
+    key_only = constraints.get(('idempotency_key',))
+    if key_only is None and ('teacher_id', 'idempotency_key') in constraints:
+        return
+    with op.batch_alter_table(TABLE, naming_convention=NAMING_CONVENTION) as batch_op:
+        if key_only is not None:
+            batch_op.drop_constraint(key_only, type_='unique')
+        if ('teacher_id', 'idempotency_key') not in constraints:
+            batch_op.create_unique_constraint(TEACHER_KEY, ['teacher_id', 'idempotency_key'])
+
+
+def downgrade():
+    constraints = _unique_constraints()
+    teacher_key = constraints.get(('teacher_id', 'idempotency_key'))
+    if teacher_key is None and ('idempotency_key',) in constraints:
+        return
+    with op.batch_alter_table(TABLE, naming_convention=NAMING_CONVENTION) as batch_op:
+        if teacher_key is not None:
+            batch_op.drop_constraint(teacher_key, type_='unique')
+        if ('idempotency_key',) not in constraints:
+            batch_op.create_unique_constraint(KEY_ONLY, ['idempotency_key'])
@@ -0,0 +1,126 @@
+"""archive tables for finished terms (schedules, enrollments, attendance, sync records)
+
+Revision ID: a7c3e9f4b218
+Revises: f1b6d8e2a745
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9f4b218'
+down_revision = 'f1b6d8e2a745'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _archive_columns():
+    return [
+        sa.Column('term_key', sa.String(20), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+    ]
+
+
+def _id():
+    return sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False)
+
+
+ARCHIVES = {
+    'schedule_archive': lambda: [
+        _id(),
+        sa.Column('class_id', sa.Integer(), nullable=False),
+        sa.Column('teacher_id', sa.Integer(), nullable=False),
+        sa.Column('day_of_week', sa.Integer(), nullable=False),
+        sa.Column('session', sa.String(20), nullable=False),
+        sa.Column('start_time', sa.Time(), nullable=False),
+        sa.Column('end_time', sa.Time(), nullable=False),
+        sa.Column('subject', sa.String(100), nullable=True),
+        sa.Column('room', sa.String(50), nullable=True),
+        sa.Column('room_id', sa.Integer(), nullable=True),
+        sa.Column('batch_id', sa.Integer(), nullable=True),
+        sa.Column('week_number', sa.String(10), nullable=False),
+        sa.Column('week_created', sa.String(10), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+    ],
+    'student_schedule_archive': lambda: [
+        _id(),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('schedule_id', sa.Integer(), nullable=False),
+        sa.Column('enrolled_date', sa.DateTime(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+    ],
+    'attendance_archive': lambda: [
+        _id(),
+        sa.Column('schedule_id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('reason', sa.Text(), nullable=True),
+        sa.Column('check_in_time', sa.DateTime(), nullable=True),
+        sa.Column('check_out_time', sa.DateTime(), nullable=True),
+        sa.Column('lesson_content', sa.Text(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    ],
+    'attendance_sync_records_archive': lambda: [
+        _id(),
+        sa.Column('idempotency_key', sa.String(100), nullable=False),
+        sa.Column('teacher_id', sa.Integer(), nullable=False),
+        sa.Column('schedule_id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('device_id', sa.String(100), nullable=True),
+        sa.Column('client_updated_at', sa.DateTime(), nullable=False),
+        sa.Column('received_at', sa.DateTime(), nullable=True),
+        sa.Column('result', sa.String(20), nullable=False),
+        sa.Column('attendance_id', sa.Integer(), nullable=True),
+    ],
+}
+
+INDEXES = {
+    'schedule_archive': [('class_id', 'week_number')],
+    'student_schedule_archive': [('schedule_id',)],
+    'attendance_archive': [('schedule_id',), ('student_id', 'date')],
+    'attendance_sync_records_archive': [('schedule_id',)],
+}
+
+
+def upgrade():
+    for name, columns in ARCHIVES.items():
+        if _has_table(name):
+            continue
+        op.create_table(name, *columns(), *_archive_columns())
+        op.create_index(f'ix_{name}_term', name, ['term_key'])
+        for index in INDEXES[name]:
+            op.create_index(f'ix_{name}_{"_".join(index)}', name, list(index))
+    if not _has_table('archived_terms'):
+        op.create_table(
+            'archived_terms',
+            sa.Column('term_key', sa.String(20), primary_key=True),
+            sa.Column('status', sa.String(20), nullable=False),
+            sa.Column('schedules', sa.Integer(), nullable=True),
+            sa.Column('enrollments', sa.Integer(), nullable=True),
+            sa.Column('attendance', sa.Integer(), nullable=True),
+            sa.Column('sync_records', sa.Integer(), nullable=True),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('archived_at', sa.DateTime(), nullable=True),
+            sa.Column('export_path', sa.String(500), nullable=True),
+            sa.Column('exported_at', sa.DateTime(), nullable=True),
+        )
+
+
+def downgrade():
+    # Archived rows are dropped with their tables; restore them with the exports first
+    for name in ['archived_terms'] + list(ARCHIVES):
+        if _has_table(name):
+            op.drop_table(name)
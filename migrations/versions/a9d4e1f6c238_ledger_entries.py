@@ -0,0 +1,49 @@
+"""ledger_entries: unified append-only money ledger
+
+Revision ID: a9d4e1f6c238
+Revises: f3c8a2e7b615
+Create Date: 2026-10-19 22:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4e1f6c238'
+down_revision = 'f3c8a2e7b615'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # Existing money rows are copied in by `flask ledger-backfill`
+    if not _has_table('ledger_entries'):
+        op.create_table(
+            'ledger_entries',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('source', sa.String(30), nullable=False),
+            sa.Column('source_id', sa.Integer(), nullable=False),
+            sa.Column('entry_type', sa.String(10), nullable=False),
+            sa.Column('amount', sa.Numeric(14, 2), nullable=False),
+            sa.Column('entry_date', sa.Date(), nullable=False),
+            sa.Column('period', sa.String(7), nullable=False),
+            sa.Column('category', sa.String(100), nullable=True),
+            sa.Column('class_id', sa.Integer(), nullable=True),
+            sa.Column('description', sa.String(200), nullable=True),
+            sa.Column('reverses_id', sa.Integer(), sa.ForeignKey('ledger_entries.id'), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_ledger_entries_date_type_category_class', 'ledger_entries',
+                        ['entry_date', 'entry_type', 'category', 'class_id'])
+        op.create_index('ix_ledger_entries_period_type', 'ledger_entries', ['period', 'entry_type'])
+        op.create_index('ix_ledger_entries_source', 'ledger_entries', ['source', 'source_id', 'id'])
+
+
+def downgrade():
+    if _has_table('ledger_entries'):
+        op.drop_table('ledger_entries')
@@ -0,0 +1,35 @@
+"""reference_versions: change counters of cached reference tables
+
+Revision ID: b2f7c5a8d904
+Revises: a9d4e1f6c238
+Create Date: 2026-10-19 22:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2f7c5a8d904'
+down_revision = 'a9d4e1f6c238'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # Rows are created on the first change of each table
+    if not _has_table('reference_versions'):
+        op.create_table(
+            'reference_versions',
+            sa.Column('table_name', sa.String(50), primary_key=True),
+            sa.Column('version', sa.Integer(), nullable=False),
+        )
+
+
+def downgrade():
+    if _has_table('reference_versions'):
+        op.drop_table('reference_versions')
@@ -0,0 +1,31 @@
+"""schedule (week_number, day_of_week) index for week views and aggregates
+
+Revision ID: b4d9f2c6e803
+Revises: a7c3e9f4b218
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d9f2c6e803'
+down_revision = 'a7c3e9f4b218'
+branch_labels = None
+depends_on = None
+
+
+def _has_index(table, name):
+    inspector = sa.inspect(op.get_bind())
+    return any(index['name'] == name for index in inspector.get_indexes(table))
+
+
+def upgrade():
+    if not _has_index('schedule', 'ix_schedule_week_day'):
+        op.create_index('ix_schedule_week_day', 'schedule', ['week_number', 'day_of_week'])
+
+
+def downgrade():
+    if _has_index('schedule', 'ix_schedule_week_day'):
+        op.drop_index('ix_schedule_week_day', table_name='schedule')
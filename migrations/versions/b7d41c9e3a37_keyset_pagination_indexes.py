@@ -0,0 +1,42 @@
+"""keyset pagination indexes
+
+Revision ID: b7d41c9e3a37
+Revises: a1c0e5d2f028
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d41c9e3a37'
+down_revision = 'a1c0e5d2f028'
+branch_labels = None
+depends_on = None
+
+# (index, table, columns) matching the lists' (sort column, id) order
+INDEXES = [
+    ('ix_financial_transactions_date_id', 'financial_transactions', ['transaction_date', 'id']),
+    ('ix_donation_assets_date_id', 'donation_assets', ['donation_date', 'id']),
+    ('ix_donation_records_date_id', 'donation_records', ['transaction_date', 'id']),
+    ('ix_expenses_date_id', 'expenses', ['expense_date', 'id']),
+    ('ix_student_active_name_id', 'student', ['is_active', 'full_name', 'id']),
+]
+
+
+def _has_index(table, name):
+    inspector = sa.inspect(op.get_bind())
+    return any(index['name'] == name for index in inspector.get_indexes(table))
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        if not _has_index(table, name):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, columns in INDEXES:
+        if _has_index(table, name):
+            op.drop_index(name, table_name=table)
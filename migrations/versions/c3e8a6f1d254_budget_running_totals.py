@@ -0,0 +1,50 @@
+"""budget running totals and donation record approval time
+
+Revision ID: c3e8a6f1d254
+Revises: b7d41c9e3a37
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e8a6f1d254'
+down_revision = 'b7d41c9e3a37'
+branch_labels = None
+depends_on = None
+
+
+def _has_column(table, name):
+    inspector = sa.inspect(op.get_bind())
+    return any(column['name'] == name for column in inspector.get_columns(table))
+
+
+def upgrade():
+    if not _has_column('budgets', 'spent_total'):
+        with op.batch_alter_table('budgets') as batch_op:
+            batch_op.add_column(sa.Column('spent_total', sa.Numeric(14, 2), nullable=False, server_default='0'))
+    if not _has_column('donation_records', 'approved_at'):
+        with op.batch_alter_table('donation_records') as batch_op:
+            batch_op.add_column(sa.Column('approved_at', sa.DateTime(), nullable=True))
+
+    # Backfill the running totals from approved expenses
+    op.execute("""
+        UPDATE budgets SET spent_total = COALESCE((
+            SELECT SUM(expenses.amount) FROM expenses
+            WHERE expenses.status = 'approved'
+              AND expenses.expense_date >= budgets.start_date
+              AND expenses.expense_date <= budgets.end_date
+              AND (budgets.category_id IS NULL OR expenses.category_id = budgets.category_id)
+        ), 0)
+    """)
+
+
+def downgrade():
+    if _has_column('donation_records', 'approved_at'):
+        with op.batch_alter_table('donation_records') as batch_op:
+            batch_op.drop_column('approved_at')
+    if _has_column('budgets', 'spent_total'):
+        with op.batch_alter_table('budgets') as batch_op:
+            batch_op.drop_column('spent_total')
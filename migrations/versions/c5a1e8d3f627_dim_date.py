@@ -0,0 +1,48 @@
+"""dim_date: calendar dimension (ISO weeks, terms, holidays)
+
+Revision ID: c5a1e8d3f627
+Revises: b2f7c5a8d904
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a1e8d3f627'
+down_revision = 'b2f7c5a8d904'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # Filled on first use, or by `flask dim-date`
+    if not _has_table('dim_date'):
+        op.create_table(
+            'dim_date',
+            sa.Column('date', sa.Date(), primary_key=True),
+            sa.Column('week_key', sa.String(8), nullable=False),
+            sa.Column('iso_year', sa.Integer(), nullable=False),
+            sa.Column('iso_week', sa.Integer(), nullable=False),
+            sa.Column('weekday', sa.Integer(), nullable=False),
+            sa.Column('year', sa.Integer(), nullable=False),
+            sa.Column('month', sa.Integer(), nullable=False),
+            sa.Column('month_key', sa.String(7), nullable=False),
+            sa.Column('school_year', sa.String(9), nullable=False),
+            sa.Column('term', sa.String(10), nullable=False),
+            sa.Column('is_weekend', sa.Boolean(), nullable=False),
+            sa.Column('is_holiday', sa.Boolean(), nullable=False),
+            sa.Column('holiday_name', sa.String(50), nullable=True),
+        )
+        op.create_index('ix_dim_date_week_weekday', 'dim_date', ['week_key', 'weekday'])
+        op.create_index('ix_dim_date_month_key', 'dim_date', ['month_key'])
+
+
+def downgrade():
+    if _has_table('dim_date'):
+        op.drop_table('dim_date')
@@ -0,0 +1,46 @@
+"""payroll snapshots: teacher workload per closed month
+
+Revision ID: c8e2f5a9d167
+Revises: b4d9f2c6e803
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e2f5a9d167'
+down_revision = 'b4d9f2c6e803'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if not _has_table('payroll_snapshots'):
+        op.create_table(
+            'payroll_snapshots',
+            sa.Column('month_key', sa.String(7), primary_key=True),
+            sa.Column('teacher_id', sa.Integer(), sa.ForeignKey('user.id'), primary_key=True),
+            sa.Column('session', sa.String(20), primary_key=True),
+            sa.Column('sessions', sa.Integer(), nullable=False),
+            sa.Column('minutes', sa.Integer(), nullable=False),
+        )
+    if not _has_table('payroll_months'):
+        op.create_table(
+            'payroll_months',
+            sa.Column('month_key', sa.String(7), primary_key=True),
+            sa.Column('sessions', sa.Integer(), nullable=False),
+            sa.Column('computed_at', sa.DateTime(), nullable=True),
+        )
+
+
+def downgrade():
+    # Snapshots are recomputed from attendance on the next report
+    for name in ('payroll_months', 'payroll_snapshots'):
+        if _has_table(name):
+            op.drop_table(name)
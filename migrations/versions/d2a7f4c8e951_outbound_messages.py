@@ -0,0 +1,49 @@
+"""outbound_messages: outbox of parent notifications
+
+Revision ID: d2a7f4c8e951
+Revises: c8e2f5a9d167
+Create Date: 2026-10-19 22:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a7f4c8e951'
+down_revision = 'c8e2f5a9d167'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if not _has_table('outbound_messages'):
+        op.create_table(
+            'outbound_messages',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('channel', sa.String(20), nullable=False),
+            sa.Column('recipient', sa.String(200), nullable=False),
+            sa.Column('subject', sa.String(200), nullable=True),
+            sa.Column('body', sa.Text(), nullable=False),
+            sa.Column('category', sa.String(50), nullable=True),
+            sa.Column('dedupe_key', sa.String(64), nullable=False, unique=True),
+            sa.Column('status', sa.String(20), nullable=True),
+            sa.Column('attempts', sa.Integer(), nullable=True),
+            sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+            sa.Column('claimed_at', sa.DateTime(), nullable=True),
+            sa.Column('last_error', sa.Text(), nullable=True),
+            sa.Column('student_id', sa.Integer(), sa.ForeignKey('student.id'), nullable=True),
+            sa.Column('created_by', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('sent_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_outbound_messages_status_next', 'outbound_messages', ['status', 'next_attempt_at'])
+
+
+def downgrade():
+    if _has_table('outbound_messages'):
+        op.drop_table('outbound_messages')
@@ -0,0 +1,97 @@
+"""rooms table and Schedule.room_id, normalized from the free-text room
+
+Revision ID: d5f2b8a4c619
+Revises: c3e8a6f1d254
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+import re
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5f2b8a4c619'
+down_revision = 'c3e8a6f1d254'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _has_column(table, name):
+    inspector = sa.inspect(op.get_bind())
+    return any(column['name'] == name for column in inspector.get_columns(table))
+
+
+def _has_index(table, name):
+    inspector = sa.inspect(op.get_bind())
+    return any(index['name'] == name for index in inspector.get_indexes(table))
+
+
+def _room_foreign_key():
+    inspector = sa.inspect(op.get_bind())
+    return next((fk['name'] for fk in inspector.get_foreign_keys('schedule')
+                 if fk['constrained_columns'] == ['room_id']), None)
+
+
+def _normalize(text):
+    # Frozen copy of app.utils.rooms.normalize_name at this revision
+    name = ' '.join((text or '').split()).upper()
+    name = re.sub(r'^(PHÒNG|PHONG|P\.?)\s*(?=\d)', 'P', name)
+    return name[:50] or None
+
+
+def upgrade():
+    if not _has_table('rooms'):
+        op.create_table(
+            'rooms',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(50), nullable=False, unique=True),
+            sa.Column('capacity', sa.Integer(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+        )
+    if not _has_column('schedule', 'room_id'):
+        with op.batch_alter_table('schedule') as batch_op:
+            batch_op.add_column(sa.Column('room_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key('fk_schedule_room_id_rooms', 'rooms', ['room_id'], ['id'])
+    if not _has_index('schedule', 'ix_schedule_room_week_day'):
+        op.create_index('ix_schedule_room_week_day', 'schedule', ['room_id', 'week_number', 'day_of_week'])
+
+    # One room per distinct normalized text, then one UPDATE per original spelling;
+    # the free text itself is left as entered
+    bind = op.get_bind()
+    rooms = sa.table('rooms', sa.column('id', sa.Integer), sa.column('name', sa.String),
+                     sa.column('is_active', sa.Boolean), sa.column('created_at', sa.DateTime))
+    schedule = sa.table('schedule', sa.column('room', sa.String), sa.column('room_id', sa.Integer))
+    spellings = {}
+    for (text,) in bind.execute(sa.select(schedule.c.room).where(schedule.c.room_id.is_(None)).distinct()):
+        name = _normalize(text)
+        if name:
+            spellings.setdefault(name, []).append(text)
+    existing = dict(bind.execute(sa.select(rooms.c.name, rooms.c.id)).all())
+    missing = [name for name in sorted(spellings) if name not in existing]
+    if missing:
+        now = datetime.utcnow()
+        bind.execute(rooms.insert(), [{'name': name, 'is_active': True, 'created_at': now} for name in missing])
+        existing = dict(bind.execute(sa.select(rooms.c.name, rooms.c.id)).all())
+    for name, texts in spellings.items():
+        bind.execute(schedule.update().where(schedule.c.room.in_(texts), schedule.c.room_id.is_(None))
+                     .values(room_id=existing[name]))
+
+
+def downgrade():
+    if _has_index('schedule', 'ix_schedule_room_week_day'):
+        op.drop_index('ix_schedule_room_week_day', table_name='schedule')
+    if _has_column('schedule', 'room_id'):
+        foreign_key = _room_foreign_key()
+        with op.batch_alter_table('schedule') as batch_op:
+            if foreign_key:
+                batch_op.drop_constraint(foreign_key, type_='foreignkey')
+            batch_op.drop_column('room_id')
+    if _has_table('rooms'):
+        op.drop_table('rooms')
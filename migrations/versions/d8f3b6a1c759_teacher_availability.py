@@ -0,0 +1,39 @@
+"""teacher_availability: weekly busy bitsets of teachers
+
+Revision ID: d8f3b6a1c759
+Revises: c5a1e8d3f627
+Create Date: 2026-10-19 23:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8f3b6a1c759'
+down_revision = 'c5a1e8d3f627'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # Filled from the existing schedules by `flask availability`
+    if not _has_table('teacher_availability'):
+        op.create_table(
+            'teacher_availability',
+            sa.Column('teacher_id', sa.Integer(), sa.ForeignKey('user.id'), primary_key=True),
+            sa.Column('week_number', sa.String(10), primary_key=True),
+            sa.Column('busy', sa.LargeBinary(), nullable=False),
+            sa.Column('sessions', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_teacher_availability_week', 'teacher_availability', ['week_number'])
+
+
+def downgrade():
+    if _has_table('teacher_availability'):
+        op.drop_table('teacher_availability')
@@ -0,0 +1,31 @@
+"""student (class_id, is_active) index for class head counts
+
+Revision ID: e4c9a7b2f318
+Revises: d8f3b6a1c759
+Create Date: 2026-10-19 23:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4c9a7b2f318'
+down_revision = 'd8f3b6a1c759'
+branch_labels = None
+depends_on = None
+
+
+def _has_index(table, name):
+    inspector = sa.inspect(op.get_bind())
+    return any(index['name'] == name for index in inspector.get_indexes(table))
+
+
+def upgrade():
+    if not _has_index('student', 'ix_student_class_active'):
+        op.create_index('ix_student_class_active', 'student', ['class_id', 'is_active'])
+
+
+def downgrade():
+    if _has_index('student', 'ix_student_class_active'):
+        op.drop_index('ix_student_class_active', table_name='student')
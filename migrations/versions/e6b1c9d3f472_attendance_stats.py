@@ -0,0 +1,54 @@
+"""student attendance stats and analytics cursors
+
+Revision ID: e6b1c9d3f472
+Revises: d2a7f4c8e951
+Create Date: 2026-10-19 22:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b1c9d3f472'
+down_revision = 'd2a7f4c8e951'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # Filled by `flask attendance-stats --full`
+    if not _has_table('student_attendance_stats'):
+        op.create_table(
+            'student_attendance_stats',
+            sa.Column('student_id', sa.Integer(), sa.ForeignKey('student.id'), primary_key=True),
+            sa.Column('class_id', sa.Integer(), sa.ForeignKey('class.id'), nullable=True),
+            sa.Column('absence_streak', sa.Integer(), nullable=True),
+            sa.Column('recent_total', sa.Integer(), nullable=True),
+            sa.Column('recent_present', sa.Integer(), nullable=True),
+            sa.Column('recent_rate', sa.Float(), nullable=True),
+            sa.Column('total_sessions', sa.Integer(), nullable=True),
+            sa.Column('present_sessions', sa.Integer(), nullable=True),
+            sa.Column('risk_score', sa.Integer(), nullable=True),
+            sa.Column('last_attendance_date', sa.Date(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_student_attendance_stats_class_risk', 'student_attendance_stats',
+                        ['class_id', 'risk_score'])
+    if not _has_table('analytics_cursors'):
+        op.create_table(
+            'analytics_cursors',
+            sa.Column('name', sa.String(50), primary_key=True),
+            sa.Column('last_id', sa.Integer(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+
+
+def downgrade():
+    for name in ('analytics_cursors', 'student_attendance_stats'):
+        if _has_table(name):
+            op.drop_table(name)
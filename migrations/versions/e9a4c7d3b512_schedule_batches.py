@@ -0,0 +1,73 @@
+"""schedule batches (draft timetables) and Schedule.batch_id
+
+Revision ID: e9a4c7d3b512
+Revises: d5f2b8a4c619
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9a4c7d3b512'
+down_revision = 'd5f2b8a4c619'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _has_column(table, name):
+    inspector = sa.inspect(op.get_bind())
+    return any(column['name'] == name for column in inspector.get_columns(table))
+
+
+def _has_index(table, name):
+    inspector = sa.inspect(op.get_bind())
+    return any(index['name'] == name for index in inspector.get_indexes(table))
+
+
+def _batch_foreign_key():
+    inspector = sa.inspect(op.get_bind())
+    return next((fk['name'] for fk in inspector.get_foreign_keys('schedule')
+                 if fk['constrained_columns'] == ['batch_id']), None)
+
+
+def upgrade():
+    if not _has_table('schedule_batches'):
+        op.create_table(
+            'schedule_batches',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('kind', sa.String(20), nullable=False),
+            sa.Column('week_number', sa.String(10), nullable=False),
+            sa.Column('status', sa.String(20), nullable=False),
+            sa.Column('summary', sa.Text(), nullable=True),
+            sa.Column('created_by', sa.Integer(), sa.ForeignKey('user.id'), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('published_at', sa.DateTime(), nullable=True),
+        )
+    if not _has_index('schedule_batches', 'ix_schedule_batches_status_week'):
+        op.create_index('ix_schedule_batches_status_week', 'schedule_batches', ['status', 'week_number'])
+    if not _has_column('schedule', 'batch_id'):
+        with op.batch_alter_table('schedule') as batch_op:
+            batch_op.add_column(sa.Column('batch_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key('fk_schedule_batch_id_schedule_batches', 'schedule_batches',
+                                        ['batch_id'], ['id'])
+    if not _has_index('schedule', 'ix_schedule_batch_id'):
+        op.create_index('ix_schedule_batch_id', 'schedule', ['batch_id'])
+
+
+def downgrade():
+    if _has_index('schedule', 'ix_schedule_batch_id'):
+        op.drop_index('ix_schedule_batch_id', table_name='schedule')
+    if _has_column('schedule', 'batch_id'):
+        foreign_key = _batch_foreign_key()
+        with op.batch_alter_table('schedule') as batch_op:
+            if foreign_key:
+                batch_op.drop_constraint(foreign_key, type_='foreignkey')
+            batch_op.drop_column('batch_id')
+    if _has_table('schedule_batches'):
+        op.drop_table('schedule_batches')
@@ -0,0 +1,49 @@
+"""calendar exceptions: closures, holiday openings and make-up sessions
+
+Revision ID: f1b6d8e2a745
+Revises: e9a4c7d3b512
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b6d8e2a745'
+down_revision = 'e9a4c7d3b512'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _has_index(table, name):
+    inspector = sa.inspect(op.get_bind())
+    return any(index['name'] == name for index in inspector.get_indexes(table))
+
+
+def upgrade():
+    if not _has_table('calendar_exceptions'):
+        op.create_table(
+            'calendar_exceptions',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('kind', sa.String(20), nullable=False),
+            sa.Column('start_date', sa.Date(), nullable=False),
+            sa.Column('end_date', sa.Date(), nullable=False),
+            sa.Column('class_id', sa.Integer(), sa.ForeignKey('class.id'), nullable=True),
+            sa.Column('schedule_id', sa.Integer(), sa.ForeignKey('schedule.id', ondelete='SET NULL'), nullable=True),
+            sa.Column('replaces_date', sa.Date(), nullable=True),
+            sa.Column('reason', sa.String(200), nullable=True),
+            sa.Column('created_by', sa.Integer(), sa.ForeignKey('user.id'), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+        )
+    if not _has_index('calendar_exceptions', 'ix_calendar_exceptions_dates'):
+        op.create_index('ix_calendar_exceptions_dates', 'calendar_exceptions', ['start_date', 'end_date'])
+
+
+def downgrade():
+    if _has_table('calendar_exceptions'):
+        op.drop_table('calendar_exceptions')
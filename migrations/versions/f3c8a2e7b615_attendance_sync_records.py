@@ -0,0 +1,48 @@
+"""attendance_sync_records: offline attendance sync log
+
+Revision ID: f3c8a2e7b615
+Revises: e6b1c9d3f472
+Create Date: 2026-10-19 22:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8a2e7b615'
+down_revision = 'e6b1c9d3f472'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if not _has_table('attendance_sync_records'):
+        op.create_table(
+            'attendance_sync_records',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('idempotency_key', sa.String(100), nullable=False),
+            sa.Column('teacher_id', sa.Integer(), sa.ForeignKey('user.id'), nullable=False),
+            sa.Column('schedule_id', sa.Integer(), sa.ForeignKey('schedule.id'), nullable=False),
+            sa.Column('student_id', sa.Integer(), sa.ForeignKey('student.id'), nullable=False),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('status', sa.String(20), nullable=False),
+            sa.Column('notes', sa.Text(), nullable=True),
+            sa.Column('device_id', sa.String(100), nullable=True),
+            sa.Column('client_updated_at', sa.DateTime(), nullable=False),
+            sa.Column('received_at', sa.DateTime(), nullable=True),
+            sa.Column('result', sa.String(20), nullable=False),
+            sa.Column('attendance_id', sa.Integer(), nullable=True),
+            sa.UniqueConstraint('teacher_id', 'idempotency_key', name='uq_attendance_sync_records_teacher_key'),
+        )
+        op.create_index('ix_attendance_sync_records_cell', 'attendance_sync_records',
+                        ['schedule_id', 'student_id', 'date'])
+
+
+def downgrade():
+    if _has_table('attendance_sync_records'):
+        op.drop_table('attendance_sync_records')
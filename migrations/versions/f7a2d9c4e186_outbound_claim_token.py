@@ -0,0 +1,33 @@
+"""outbound_messages.claim_token: per-claim token checked when recording delivery results
+
+Revision ID: f7a2d9c4e186
+Revises: e4c9a7b2f318
+Create Date: 2026-10-19 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7a2d9c4e186'
+down_revision = 'e4c9a7b2f318'
+branch_labels = None
+depends_on = None
+
+
+def _has_column(table, name):
+    inspector = sa.inspect(op.get_bind())
+    return any(column['name'] == name for column in inspector.get_columns(table))
+
+
+def upgrade():
+    if not _has_column('outbound_messages', 'claim_token'):
+        with op.batch_alter_table('outbound_messages') as batch_op:
+            batch_op.add_column(sa.Column('claim_token', sa.String(32), nullable=True))
+
+
+def downgrade():
+    if _has_column('outbound_messages', 'claim_token'):
+        with op.batch_alter_table('outbound_messages') as batch_op:
+            batch_op.drop_column('claim_token')
@@ -0,0 +1,41 @@
+"""
+Per-route query-count and latency budgets (app/utils/perf_budgets.py),
+checked against a small seeded center. A route that issues one query per
+row fails here long before the data is big enough to notice.
+"""
+
+import pytest
+
+from config import Config
+from app import create_app, db
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    class BudgetConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path_factory.mktemp('budgets') / 'budgets.db'}"
+        TESTING = True
+        METRICS_ENABLED = False
+
+    app = create_app(BudgetConfig)
+    with app.app_context():
+        from app.cli import init_database
+        from app.utils.seed_scale import seed_scale
+
+        init_database(echo=lambda *args: None)
+        # Enough rows per manager that an N+1 goes over every query budget
+        seed_scale(classes=40, students=1200, teachers=20, managers=4, weeks=4,
+                   sessions_per_week=3, transactions_per_month=30, echo=lambda *args: None)
+    return app
+
+
+def test_routes_within_budget(app):
+    from app.utils.perf_budgets import check_budgets
+
+    with app.app_context():
+        results = check_budgets(app, iterations=3)
+
+    failures = [f"{result['endpoint']}: {'; '.join(result['violations'])}"
+                for result in results if result['violations']]
+    assert not failures, '\n'.join(failures)
+    assert not [result for result in results if 'skipped' in result]